@@ -1,32 +1,56 @@
 import asyncio
 import ctypes
+import html
 import os
 import sys
-from pathlib import Path
+import time
+
+STARTED_AT = time.perf_counter()
 
-from pynput import keyboard
 from qasync import asyncSlot, QApplication, QEventLoop
 
 from PySide6 import  QtCore, QtWidgets, QtGui
 
+from evex.activity import ActivityRefresher
+from evex.completion import CompletionIndex
 from evex.gui.omnibox_widget import OmniboxWidget
-from evex.esi import login as esi_login
+from evex.location_tracker import get_location_tracker
 from evex.models import EsiCharacter
-from evex.settings import load_settings, save_settings, Settings
-from evex.utils import get_resource
+from evex.prices import PriceRefresher, get_price_table
+from evex.profiling import StartupProfile
+from evex.sde import get_solar_system_index, get_solar_system_name, get_solar_system_names, get_type_index, load_cached_solar_system_names, save_cached_solar_system_names
+from evex.settings import get_settings_store, Settings
+from evex.token_scheduler import TokenRefreshScheduler
+from evex.tracing import span, tracer
+from evex.transport import configure as configure_transport
+from evex.utils import get_config_path, get_resource
+
+TRACE_FLUSH_INTERVAL_MS = 30_000
 
 
 class MainWindow(QtWidgets.QMainWindow):
     omnibox_activated = QtCore.Signal(str)
+    settings_changed = QtCore.Signal(object)
 
-    def __init__(self, settings: Settings=None):
+    def __init__(self, settings: Settings=None, startup_profile: StartupProfile=None):
         super().__init__()
 
         self.settings = settings
+        self.startup_profile = startup_profile or StartupProfile()
+
+        self.token_scheduler = TokenRefreshScheduler()
+        self.price_refresher = PriceRefresher()
+        self.location_tracker = get_location_tracker()
+        self.location_tracker.system_changed.connect(self.update_character_location)
 
         self.omnibox = OmniboxWidget()
         self.omnibox_activated.connect(self.trigger_omnibox)
 
+        self.activity_refresher = ActivityRefresher(self.omnibox.setSystemActivity)
+
+        # Settings change on token refresh threads too, the signal hands them to the Qt thread
+        self.settings_changed.connect(self.update_characters)
+
         self.tray_menu = QtWidgets.QMenu()
         
         #self.tray_menu_show = QtGui.QAction("Show/Hide Main Window")
@@ -38,41 +62,108 @@ class MainWindow(QtWidgets.QMainWindow):
         self.tray_menu.addAction(self.tray_menu_login)
 
         self.tray_menu_characters = QtWidgets.QMenu("Characters...")
+        self.character_actions: dict[int, QtGui.QAction] = {}
 
         self.tray_menu.addMenu(self.tray_menu_characters)
 
+        self.tray_menu_stats = QtGui.QAction("Performance stats")
+        self.tray_menu_stats.triggered.connect(self.show_performance_stats)
+        self.tray_menu.addAction(self.tray_menu_stats)
+
         self.tray_menu_quit = QtGui.QAction("Quit")
         self.tray_menu.addAction(self.tray_menu_quit)
 
-        if self.settings and len(self.settings.characters):
-            character_names = list(map(lambda c: c.name, self.settings.characters.values()))
-            self.omnibox.setEsiCharacters(self.settings.characters)
+        if self.settings:
+            self.update_characters(self.settings)
+
+
+    @QtCore.Slot()
+    def update_characters(self, settings: Settings):
+        self.settings = settings
+
+        # Token refreshes update characters in place, only a login changes the list
+        if list(settings.characters) == list(self.character_actions):
+            return
+
+        self.omnibox.setEsiCharacters(settings.characters)
 
-            self.add_characters_to_tray(character_names)
+        self.add_characters_to_tray(list(settings.characters.values()))
 
 
-    def add_characters_to_tray(self, character_names: list[str]):
-        self.character_actions = []
+    def add_characters_to_tray(self, characters: list[EsiCharacter]):
+        self.character_actions = {}
         self.tray_menu_characters.clear()
 
-        for name in character_names:
-            action = QtGui.QAction(name)
+        for character in characters:
+            action = QtGui.QAction(self.character_action_text(character))
             action.setDisabled(True)
-            self.character_actions.append(action)
+            self.character_actions[character.id] = action
             self.tray_menu_characters.addAction(action)
 
 
+    def character_action_text(self, character: EsiCharacter) -> str:
+        location = self.location_tracker.locations.get(character.id)
+
+        if not location or location.solar_system_id is None:
+            return character.name
+
+        return f"{character.name} ({get_solar_system_name(location.solar_system_id) or location.solar_system_id})"
+
+
+    @QtCore.Slot()
+    def update_character_location(self, character_id: int, solar_system_id: int):
+        # Shows where each character is from the tray, the tracker only says when it changes
+        action = self.character_actions.get(character_id)
+
+        if action and self.settings and character_id in self.settings.characters:
+            action.setText(self.character_action_text(self.settings.characters[character_id]))
+
+
+    async def load_system_data(self):
+        loop = asyncio.get_running_loop()
+
+        # Completions from the last run are usable long before the SDE is
+        cached_names = load_cached_solar_system_names()
+        if cached_names:
+            with self.startup_profile.phase("completions (warm cache)"):
+                self.omnibox.setCompletionIndex(await loop.run_in_executor(None, CompletionIndex, cached_names))
+
+        with self.startup_profile.phase("sde index"):
+            await loop.run_in_executor(None, get_solar_system_index)
+
+        system_names = get_solar_system_names()
+        if system_names != cached_names:
+            with self.startup_profile.phase("completions"):
+                self.omnibox.setCompletionIndex(await loop.run_in_executor(None, CompletionIndex, system_names))
+
+            save_cached_solar_system_names(system_names)
+
+        # Appraisals resolve item names and prices without touching the network
+        with self.startup_profile.phase("types and prices"):
+            await loop.run_in_executor(None, get_type_index)
+            await loop.run_in_executor(None, get_price_table)
+
+        self.price_refresher.start()
+        self.activity_refresher.start()
+
+
     @asyncSlot()
     async def login(self):
+        # Network and crypto modules are only pulled in once they are needed
+        from evex.esi import login as esi_login
+
         esi_character = await esi_login()
-        self.settings.characters[esi_character.id] = esi_character
+        get_settings_store().put_character(esi_character)
 
-        save_settings(self.settings)
+        self.token_scheduler.schedule(esi_character)
+        self.location_tracker.track(esi_character)
 
-        character_names = list(map(lambda c: c.name, self.settings.characters.values()))
-        self.omnibox.setEsiCharacters(self.settings.characters)
 
-        self.add_characters_to_tray(character_names)
+    @QtCore.Slot()
+    def show_performance_stats(self):
+        tracer.flush()
+
+        QtWidgets.QMessageBox.information(self, "Performance stats", f"<pre>{html.escape(tracer.report())}</pre>")
 
 
     @QtCore.Slot()
@@ -86,67 +177,120 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
 if __name__ == "__main__":
+    profile_startup = "--profile-startup" in sys.argv
+
+    startup_profile = StartupProfile(STARTED_AT)
+    startup_profile.record("imports", STARTED_AT, time.perf_counter())
+
     app_id = u"com.mgoeppner.evex"
 
     if os.name == "nt":
         ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(app_id)
 
-    app = QApplication([])
+    with startup_profile.phase("qt"):
+        app = QApplication([])
 
     icon_path = get_resource("icon.png")
     icon = QtGui.QIcon(icon_path)
 
-    settings_path = Path.joinpath(Path.home(), ".config", "evex")
-    if not settings_path.exists():
-        settings_path.mkdir(parents=True, exist_ok=True)
+    settings_store = get_settings_store()
+
+    with startup_profile.phase("settings"):
+        settings = settings_store.settings
 
-    settings = load_settings()
+    configure_transport(settings.http)
 
     app.setApplicationName("evex")
     app.setWindowIcon(icon)
     app.setStyle("fusion")
 
-    window = MainWindow(settings)
-    window.setWindowTitle("evex")
-    window.setWindowIcon(icon)
-    window.resize(800, 600)
+    with startup_profile.phase("window"):
+        window = MainWindow(settings, startup_profile)
+        window.setWindowTitle("evex")
+        window.setWindowIcon(icon)
+        window.resize(800, 600)
 
     window.tray_menu_quit.triggered.connect(app.quit)
 
-    tray = QtWidgets.QSystemTrayIcon()
-    tray.setContextMenu(window.tray_menu)
-    tray.setIcon(icon)
-    tray.setVisible(True)
+    unsubscribe_settings = settings_store.subscribe(window.settings_changed.emit)
+    app.aboutToQuit.connect(unsubscribe_settings)
+
+    with startup_profile.phase("tray"):
+        tray = QtWidgets.QSystemTrayIcon()
+        tray.setContextMenu(window.tray_menu)
+        tray.setIcon(icon)
+        tray.setVisible(True)
+
+    window.omnibox.runner.finished.connect(lambda title, message: tray.showMessage(title, message, QtWidgets.QSystemTrayIcon.MessageIcon.Information))
+    window.omnibox.runner.failed.connect(lambda title, message: tray.showMessage(title, message, QtWidgets.QSystemTrayIcon.MessageIcon.Warning))
+    app.aboutToQuit.connect(window.omnibox.runner.cancel)
+
+    # Spans go to disk in batches, well away from the hotkey path
+    trace_flush_timer = QtCore.QTimer()
+    trace_flush_timer.timeout.connect(tracer.flush)
+    trace_flush_timer.start(TRACE_FLUSH_INTERVAL_MS)
+    app.aboutToQuit.connect(tracer.flush)
 
     def on_activate():
-        character_name: str | None = None
+        tracer.mark("hotkey")
 
-        if os.name == "nt":
-            GetForegroundWindow = ctypes.windll.user32.GetForegroundWindow
-            GetWindowText = ctypes.windll.user32.GetWindowTextW
-            GetWindowTextLength = ctypes.windll.user32.GetWindowTextLengthW
+        with span("hotkey"):
+            character_name: str | None = None
 
-            hwnd = GetForegroundWindow()
-            title_len = GetWindowTextLength(hwnd)
-            title_buff = ctypes.create_unicode_buffer(title_len + 1)
-            GetWindowText(hwnd, title_buff, title_len + 1)
+            if os.name == "nt":
+                GetForegroundWindow = ctypes.windll.user32.GetForegroundWindow
+                GetWindowText = ctypes.windll.user32.GetWindowTextW
+                GetWindowTextLength = ctypes.windll.user32.GetWindowTextLengthW
 
-            title = title_buff.value
+                hwnd = GetForegroundWindow()
+                title_len = GetWindowTextLength(hwnd)
+                title_buff = ctypes.create_unicode_buffer(title_len + 1)
+                GetWindowText(hwnd, title_buff, title_len + 1)
 
-            if title.startswith("EVE - "):
-                character_name = title.removeprefix("EVE - ").strip()
+                title = title_buff.value
 
+                if title.startswith("EVE - "):
+                    character_name = title.removeprefix("EVE - ").strip()
 
-        window.omnibox_activated.emit(character_name)
 
+            window.omnibox_activated.emit(character_name)
 
-    listener = keyboard.GlobalHotKeys({settings.hotkeys.trigger: on_activate})
-    listener.start()
+
+    with startup_profile.phase("hotkeys"):
+        from pynput import keyboard
+
+        listener = keyboard.GlobalHotKeys({settings.hotkeys.trigger: on_activate})
+        listener.start()
 
     loop = QEventLoop(app)
 
     asyncio.set_event_loop(loop)
 
+    window.token_scheduler.start(list(settings.characters.values()))
+    app.aboutToQuit.connect(window.token_scheduler.stop)
+    app.aboutToQuit.connect(window.price_refresher.stop)
+    app.aboutToQuit.connect(window.activity_refresher.stop)
+
+    window.location_tracker.start(list(settings.characters.values()))
+    app.aboutToQuit.connect(window.location_tracker.stop)
+    app.aboutToQuit.connect(settings_store.close)
+
+    async def finish_startup():
+        try:
+            await window.load_system_data()
+        finally:
+            if profile_startup:
+                report = startup_profile.report()
+                startup_profile.save(get_config_path("startup-profile.json"))
+
+                # Windowed builds have no stdout
+                if sys.stdout:
+                    print(report)
+
+                app.quit()
+
+    asyncio.ensure_future(finish_startup())
+
     with loop:
         loop.run_forever()
 
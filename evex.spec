@@ -8,7 +8,8 @@ a = Analysis(
     ['app.py'],
     pathex=['env\\Lib\\site-packages'],
     binaries=[],
-    datas=[],
+    # The compact SDE from evex.sde_compact, a fraction of the size of sde.sqlite
+    datas=[('resources\\sde', 'resources\\sde')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,48 @@
+import argparse
+import time
+import zipfile
+
+from evex.sde_compact import COMPACT_SDE_DIR, build_compact_sde
+from evex.utils import get_resource
+
+
+def sde_build(args):
+    from evex.sde_import import build_sde
+
+    started = time.perf_counter()
+    try:
+        stale = build_sde(args.zip, args.output, args.workers, args.force)
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        raise SystemExit(f"evex sde build: {e}")
+
+    print(f"rebuilt {len(stale)} table{'s' if len(stale) != 1 else ''} in {time.perf_counter() - started:.1f}s")
+
+
+def sde_compact(args):
+    build_compact_sde(args.sqlite, args.output)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="evex")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sde = commands.add_parser("sde", help="build the static data evex loads at startup").add_subparsers(dest="sde_command", required=True)
+
+    build = sde.add_parser("build", help="import a downloaded static data export zip")
+    build.add_argument("zip")
+    build.add_argument("--output", default=get_resource(COMPACT_SDE_DIR))
+    build.add_argument("--workers", type=int, help="processes parsing export files, defaults to one per CPU")
+    build.add_argument("--force", action="store_true", help="rebuild every table even if its source is unchanged")
+    build.set_defaults(handler=sde_build)
+
+    compact = sde.add_parser("compact", help="convert an sde.sqlite")
+    compact.add_argument("sqlite", nargs="?", default=get_resource("sde.sqlite"))
+    compact.add_argument("--output", default=get_resource(COMPACT_SDE_DIR))
+    compact.set_defaults(handler=sde_compact)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from typing import Callable
+
+import numpy as np
+
+from evex import esi
+from evex.esi_async import esi_get
+from evex.sde import SolarSystemIndex, get_solar_system_index
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_KILLS_PATH = "/universe/system_kills/"
+SYSTEM_JUMPS_PATH = "/universe/system_jumps/"
+
+# ESI rebuilds both every hour
+ACTIVITY_REFRESH_INTERVAL = 3600
+ACTIVITY_RETRY_INTERVAL = 60
+
+
+class SystemActivity:
+    def __init__(self, index: SolarSystemIndex, ship_kills: np.ndarray, pod_kills: np.ndarray, npc_kills: np.ndarray, jumps: np.ndarray, fetched_at: float):
+        # Columns share row positions with the SDE system index
+        self.index = index
+        self.ship_kills = ship_kills
+        self.pod_kills = pod_kills
+        self.npc_kills = npc_kills
+        self.jumps = jumps
+        self.fetched_at = fetched_at
+
+
+    def annotation(self, name: str) -> str:
+        system = self.index.get(name)
+        if not system:
+            return ""
+
+        position = self.index.positions[system.id]
+        ship_kills, pod_kills, npc_kills, jumps = (int(column[position]) for column in (self.ship_kills, self.pod_kills, self.npc_kills, self.jumps))
+
+        if not (ship_kills or pod_kills or npc_kills or jumps):
+            return ""
+
+        return f"{ship_kills} ships  {pod_kills} pods  {npc_kills} npc  {jumps} jumps"
+
+
+    @classmethod
+    def from_esi(cls, index: SolarSystemIndex, kills: list[dict], jumps: list[dict], fetched_at: float | None = None) -> "SystemActivity":
+        def column(rows: list[dict], field: str) -> np.ndarray:
+            values = np.zeros(len(index), dtype=np.int32)
+            if not rows or not len(index):
+                return values
+
+            ids = np.array([row["system_id"] for row in rows], dtype=np.int64)
+            positions = np.searchsorted(index.ids, ids).clip(0, len(index) - 1)
+            known = index.ids[positions] == ids
+
+            values[positions[known]] = np.array([row.get(field, 0) for row in rows], dtype=np.int32)[known]
+
+            return values
+
+        return cls(
+            index,
+            column(kills, "ship_kills"),
+            column(kills, "pod_kills"),
+            column(kills, "npc_kills"),
+            column(jumps, "ship_jumps"),
+            fetched_at if fetched_at is not None else time.time(),
+        )
+
+
+_system_activity: SystemActivity | None = None
+
+
+def get_system_activity() -> SystemActivity | None:
+    return _system_activity
+
+
+async def refresh_system_activity() -> SystemActivity:
+    global _system_activity
+
+    kills, jumps = await asyncio.gather(esi_get(SYSTEM_KILLS_PATH), esi_get(SYSTEM_JUMPS_PATH))
+
+    loop = asyncio.get_running_loop()
+    index = await loop.run_in_executor(None, get_solar_system_index)
+    _system_activity = await loop.run_in_executor(None, SystemActivity.from_esi, index, kills, jumps)
+
+    return _system_activity
+
+
+class ActivityRefresher:
+    def __init__(self, on_refresh: Callable[[SystemActivity], None] | None = None):
+        self.on_refresh = on_refresh
+
+        self._task: asyncio.Task | None = None
+
+
+    def start(self):
+        self.stop()
+        self._task = asyncio.ensure_future(self._run())
+
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+    def next_refresh_delay(self) -> float:
+        # Both bulk endpoints expire together, wait until ESI has published the next hour
+        expires_at = [
+            entry.expires_at
+            for entry in (esi.esi_cache.get(esi.esi_cache_key(path)) for path in (SYSTEM_KILLS_PATH, SYSTEM_JUMPS_PATH))
+            if entry
+        ]
+
+        if not expires_at:
+            return ACTIVITY_REFRESH_INTERVAL
+
+        return max(max(expires_at) - time.time(), ACTIVITY_RETRY_INTERVAL)
+
+
+    async def _run(self):
+        while True:
+            try:
+                activity = await refresh_system_activity()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("system activity refresh failed, retrying in %ss", ACTIVITY_RETRY_INTERVAL)
+
+                await asyncio.sleep(ACTIVITY_RETRY_INTERVAL)
+            else:
+                if self.on_refresh:
+                    self.on_refresh(activity)
+
+                await asyncio.sleep(self.next_refresh_delay())
@@ -0,0 +1,144 @@
+import io
+import math
+import re
+from typing import Iterator
+
+import numpy as np
+from pydantic import BaseModel
+
+from evex.prices import PriceTable
+from evex.sde import TypeIndex
+
+# Leading words of "1000 Tritanium", "1 000 x Tritanium" from cargo scans and multibuy
+QUANTITY_WORD = re.compile(r"^(\d[\d,.']*x?|x)$")
+# "Tritanium x 1000", "Tritanium x1000" from fittings and killmails
+QUANTITY_SUFFIX = re.compile(r"^(.+?)\s+x\s*(\d[\d,.'\s]*)$")
+
+# Thousands separators vary with the client language
+QUANTITY_SEPARATORS = re.compile(r"[^\d]")
+
+
+class AppraisalLine(BaseModel):
+    type_id: int
+    name: str
+    quantity: int
+    volume: float
+    unit_price: float | None
+    value: float
+
+
+class Appraisal(BaseModel):
+    lines: list[AppraisalLine]
+    unresolved: list[str] = []
+
+    @property
+    def total_value(self) -> float:
+        return sum(line.value for line in self.lines)
+
+
+    @property
+    def total_volume(self) -> float:
+        return sum(line.volume for line in self.lines)
+
+
+    @property
+    def total_quantity(self) -> int:
+        return sum(line.quantity for line in self.lines)
+
+
+    @property
+    def unpriced(self) -> list[AppraisalLine]:
+        return [line for line in self.lines if line.unit_price is None]
+
+
+def parse_quantity(text: str) -> int | None:
+    digits = QUANTITY_SEPARATORS.sub("", text)
+
+    return int(digits) if digits else None
+
+
+def parse_line(line: str, types: TypeIndex) -> tuple[int, int] | None:
+    # Inventory and contract rows are tab separated with the quantity in the second column
+    columns = line.split("\t")
+    name = columns[0].strip()
+
+    if not name:
+        return None
+
+    position = types.find(name)
+    if position is not None:
+        quantity = parse_quantity(columns[1]) if len(columns) > 1 else None
+        return (position, quantity or 1)
+
+    # Names like "100MN Afterburner" start with digits, so the whole name is tried first
+    words = name.split()
+    for split in range(1, len(words)):
+        if not QUANTITY_WORD.match(words[split - 1]):
+            break
+
+        position = types.find(" ".join(words[split:]))
+        if position is not None:
+            return (position, parse_quantity(" ".join(words[:split])) or 1)
+
+    match = QUANTITY_SUFFIX.match(name)
+    if match:
+        position = types.find(match.group(1))
+        if position is not None:
+            return (position, parse_quantity(match.group(2)) or 1)
+
+    return None
+
+
+def parse_paste(text: str, types: TypeIndex, unresolved: list[str] | None = None) -> Iterator[tuple[int, int]]:
+    for line in io.StringIO(text):
+        line = line.strip()
+        if not line:
+            continue
+
+        parsed = parse_line(line, types)
+
+        if parsed:
+            yield parsed
+        elif unresolved is not None:
+            unresolved.append(line)
+
+
+def appraise(text: str, types: TypeIndex, prices: PriceTable | None) -> Appraisal:
+    unresolved = []
+
+    quantities: dict[int, int] = {}
+    for position, quantity in parse_paste(text, types, unresolved):
+        quantities[position] = quantities.get(position, 0) + quantity
+
+    positions = np.fromiter(quantities.keys(), dtype=np.int64, count=len(quantities))
+    counts = np.fromiter(quantities.values(), dtype=np.int64, count=len(quantities))
+
+    type_ids = types.ids[positions]
+    volumes = types.volumes[positions] * counts
+    unit_prices = prices.prices(type_ids) if prices else np.full(len(positions), np.nan)
+    values = np.nan_to_num(unit_prices) * counts
+
+    lines = [
+        AppraisalLine(
+            type_id=type_id,
+            name=types.names[position],
+            quantity=count,
+            volume=volume,
+            unit_price=None if math.isnan(unit_price) else unit_price,
+            value=value,
+        )
+        for position, type_id, count, volume, unit_price, value in zip(
+            positions.tolist(), type_ids.tolist(), counts.tolist(), volumes.tolist(), unit_prices.tolist(), values.tolist()
+        )
+    ]
+    lines.sort(key=lambda line: line.value, reverse=True)
+
+    return Appraisal(lines=lines, unresolved=unresolved)
+
+
+def format_isk(value: float) -> str:
+    for threshold, suffix in ((1e12, "t"), (1e9, "b"), (1e6, "m"), (1e3, "k")):
+        if abs(value) >= threshold:
+            return f"{value / threshold:.2f}{suffix}"
+
+    return f"{value:.2f}"
@@ -1,85 +1,42 @@
-from enum import Enum
+import asyncio
 import time
-from typing import Callable
 import webbrowser
 
-from pydantic import BaseModel
 from PySide6 import QtGui
-import requests
 
+from evex.appraisal import appraise, format_isk
+from evex.dscan import dscan_history, parse_dscan
 from evex.models import EsiCharacter
-from evex.esi import set_destination as esi_set_destination, get_character_location
-from evex.sde import get_solar_system_id, get_solar_system_name
+from evex.esi_async import set_destination as esi_set_destination, get_character_location
+from evex.grammar import Command, CommandGrammar, CommandPredicate, CompletionType
+from evex.jump import DEFAULT_JUMP_DRIVE_CALIBRATION, JumpPlanObjective, get_jump_range, get_jump_range_engine, get_jump_ship
+from evex.location_tracker import get_location_tracker
+from evex.prices import get_price_table, refresh_price_table
+from evex.route import RoutePreference, get_route_graph
+from evex.sde import HIGHSEC_SECURITY, get_solar_system, get_solar_system_id, get_solar_system_name, get_type_index
+from evex.settings import get_settings_store
+from evex.transport import run_blocking, session
 
 
-class CompletionType(str, Enum):
-    NONE = "none"
-    COMMAND = "command"
-    SYSTEM = "system"
-    CHARACTER = "character"
+FUZZWORK_URL = "https://market.fuzzwork.co.uk"
+DSCAN_URL = "https://dscan.info"
 
+JUMP_RANGE_LISTED = 10
+APPRAISAL_LISTED = 5
+DSCAN_LISTED = 8
 
-class CommandPredicate(BaseModel):
-    text: str
-    arg_completion_type: CompletionType
 
+async def get_current_system_id(character: EsiCharacter) -> int:
+    # The tracker's snapshot answers without a round trip while it is fresh
+    location = get_location_tracker().get(character.id)
 
-class Command(BaseModel):
-    modifiers: list[str] = []
-    predicates: list[CommandPredicate]
-    action: Callable[[EsiCharacter, str, list[str]], None]
+    if location and location.solar_system_id is not None:
+        return location.solar_system_id
 
-    def match(self, input: str) -> bool:
-        potential_matches = self.generate_command_completions()
+    return await get_character_location(character)
 
-        for p in potential_matches:
-            if input.startswith(p):
-                return True
 
-        return False
-
-
-    def parse(self, input: str) -> tuple[str | None, list[str]]:
-        modifier: str | None = None
-        for m in self.modifiers:
-            if input.startswith(m):
-                modifier = m
-                break
-
-        input_without_modifier = input.replace(modifier, "").strip() if modifier else input.strip()
-
-        has_next_predicate = len(self.predicates) > 0
-        predicate_index: int = 0
-        args: list[str] = []
-        while(has_next_predicate):
-            has_next_predicate = len(self.predicates) - 1 > predicate_index
-            current_predicate = self.predicates[predicate_index]
-            next_predicate = self.predicates[predicate_index + 1] if has_next_predicate else None
-
-            arg = input_without_modifier.split(f"{current_predicate.text} ")[-1].strip()
-            if next_predicate:
-                arg = arg.split(f"{next_predicate.text} ")[0].strip()
-
-            args.append(arg)
-
-            predicate_index = predicate_index + 1
-
-        return (modifier, args)
-
-
-    def generate_command_completions(self) -> list[str]:
-        completions = []
-
-        intent = self.predicates[0].text
-
-        completions.append(intent)
-        for modifier in self.modifiers:
-            completions.append(f"{modifier} {intent}")
-
-        return completions
-
-        
-def show_kills(character: EsiCharacter, modifier: str, args: list[str]):
+async def show_kills(character: EsiCharacter, modifier: str, args: list[str]):
     if not len(args):
         return
 
@@ -87,7 +44,7 @@ def show_kills(character: EsiCharacter, modifier: str, args: list[str]):
 
     system_id = None
     if name == "current":
-        system_id = get_character_location(character)
+        system_id = await get_current_system_id(character)
     else:
         system_id = get_solar_system_id(name)
 
@@ -95,7 +52,7 @@ def show_kills(character: EsiCharacter, modifier: str, args: list[str]):
         webbrowser.open_new_tab(f"https://zkillboard.com/system/{system_id}/")
 
 
-def set_destination(character: EsiCharacter, modifier: str, args: list[str]):
+async def set_destination(character: EsiCharacter, modifier: str, args: list[str]):
     if not len(args):
         return
 
@@ -103,10 +60,10 @@ def set_destination(character: EsiCharacter, modifier: str, args: list[str]):
     system_id = get_solar_system_id(name)
 
     if system_id:
-        esi_set_destination(character, system_id)
+        await esi_set_destination(character, system_id)
 
 
-def add_waypoint(character: EsiCharacter, modifier: str, args: list[str]):
+async def add_waypoint(character: EsiCharacter, modifier: str, args: list[str]):
     if not len(args):
         return
 
@@ -114,96 +71,242 @@ def add_waypoint(character: EsiCharacter, modifier: str, args: list[str]):
     system_id = get_solar_system_id(name)
 
     if system_id:
-        esi_set_destination(character, system_id, False, False)
+        await esi_set_destination(character, system_id, False, False)
+
+
+async def appraise_clipboard(character: EsiCharacter, modifier: str, args: list[str]):
+    if modifier == "share":
+        return await share_appraisal(QtGui.QGuiApplication.clipboard().text())
+
+    text = QtGui.QGuiApplication.clipboard().text()
+
+    # The first appraisal ever has nothing cached to price against
+    prices = get_price_table()
+    if prices is None:
+        prices = await refresh_price_table()
+
+    loop = asyncio.get_running_loop()
+    appraisal = await loop.run_in_executor(None, lambda: appraise(text, get_type_index(), prices))
+
+    if not appraisal.lines:
+        return "nothing to appraise in the clipboard"
+
+    top = ", ".join(f"{line.name} x{line.quantity} ({format_isk(line.value)})" for line in appraisal.lines[:APPRAISAL_LISTED])
+    if len(appraisal.lines) > APPRAISAL_LISTED:
+        top += ", ..."
 
+    summary = f"{format_isk(appraisal.total_value)} ISK, {appraisal.total_volume:,.2f} m3, {appraisal.total_quantity:,} items in {len(appraisal.lines)} types"
 
-def appraise_clipboard(character: EsiCharacter, modifier: str, args: list[str]):
+    if appraisal.unpriced:
+        summary += f", {len(appraisal.unpriced)} unpriced"
+    if appraisal.unresolved:
+        summary += f", {len(appraisal.unresolved)} lines not recognised"
+
+    return f"{summary}: {top}"
+
+
+async def share_appraisal(pasteblock: str):
     headers = {
         "Content-Type": "application/x-www-form-urlencoded",
     }
 
     params = {
-        "pasteblock": QtGui.QClipboard().text(),
+        "pasteblock": pasteblock,
         "region": "10000002",
     }
 
-    response = requests.post("https://market.fuzzwork.co.uk/appraisal/", params, headers=headers, allow_redirects=False)
+    response = await run_blocking(session().post, f"{FUZZWORK_URL}/appraisal/", params, headers=headers, allow_redirects=False)
     response.raise_for_status()
 
-    appraisal_url = f"https://market.fuzzwork.co.uk{response.headers['Location']}"
+    appraisal_url = f"{FUZZWORK_URL}{response.headers['Location']}"
 
-    QtGui.QClipboard().setText(appraisal_url)
+    QtGui.QGuiApplication.clipboard().setText(appraisal_url)
     webbrowser.open_new_tab(appraisal_url)
 
 
-def dscan_clipboard(character: EsiCharacter, modifier: str, args: list[str]):
+async def dscan_clipboard(character: EsiCharacter, modifier: str, args: list[str]):
+    if modifier == "share":
+        return await share_dscan(QtGui.QGuiApplication.clipboard().text())
+
+    # A scan is a few hundred rows at most, cheap enough to run on the spot
+    result = parse_dscan(QtGui.QGuiApplication.clipboard().text(), get_type_index())
+
+    # Anything else in the clipboard must not replace the scan the next one is compared with
+    if not result.total_ships and not result.others:
+        return "nothing to analyse in the clipboard"
+
+    changes = dscan_history.push(result)
+
+    classes = ", ".join(f"{count} {name}" for name, count in list(result.classes.items())[:DSCAN_LISTED])
+    if len(result.classes) > DSCAN_LISTED:
+        classes += ", ..."
+
+    summary = f"{result.total_ships} ships" + (f": {classes}" if classes else "")
+
+    if result.flags:
+        summary += " | " + ", ".join(f"{count} {flag}".upper() for flag, count in result.flags.items())
+
+    if changes:
+        summary += " | since last scan: " + ", ".join(f"{change:+d} {name}" for name, change in list(changes.items())[:DSCAN_LISTED])
+    elif changes is not None:
+        summary += " | no change since last scan"
+
+    if result.others:
+        summary += f" | {result.others} other objects"
+
+    return summary
+
+
+async def share_dscan(paste: str):
     headers = {
         "Content-Type": "application/x-www-form-urlencoded",
     }
 
     params = {
-        "paste": QtGui.QClipboard().text(),
+        "paste": paste,
     }
 
-    response = requests.post(f"https://dscan.info/?_={time.time()}", params, headers=headers, allow_redirects=False)
+    response = await run_blocking(session().post, f"{DSCAN_URL}/?_={time.time()}", params, headers=headers, allow_redirects=False)
     response.raise_for_status()
 
     dscan_id = str(response.content).strip("\'").split(";")[-1]
-    dscan_url = f"https://dscan.info/v/{dscan_id}"
+    dscan_url = f"{DSCAN_URL}/v/{dscan_id}"
 
-    QtGui.QClipboard().setText(dscan_url)
+    QtGui.QGuiApplication.clipboard().setText(dscan_url)
     webbrowser.open_new_tab(dscan_url)
 
 
-def jump_range(character: EsiCharacter, modifier: str, args: list[str]):
-    if len(args) != 1:
+def get_jump_drive_calibration(character: EsiCharacter | None, level: str) -> int:
+    # "jdc N" on the command wins over the level stored for the character
+    if not level:
+        calibration = get_settings_store().settings.jump_drive_calibration
+
+        return calibration.get(character.id, DEFAULT_JUMP_DRIVE_CALIBRATION) if character else DEFAULT_JUMP_DRIVE_CALIBRATION
+
+    if not level.isdigit() or int(level) > 5:
+        raise Exception(f"jump drive calibration must be 0 to 5, not {level}!")
+
+    return int(level)
+
+
+async def jump_range(character: EsiCharacter, modifier: str, args: list[str]):
+    if len(args) != 2:
         return
 
-    ship = "Archon"
-    if modifier == "blops":
-        ship = "Marshal"
-    elif modifier == "super":
-        ship = "Avatar"
-    elif modifier == "jf" or modifier == "rorq":
-        ship = "Rhea"
+    ship = get_jump_ship(modifier)
+    calibration = get_jump_drive_calibration(character, args[1])
+    range_ly = get_jump_range(ship, calibration)
 
     from_system = args[0]
 
     if from_system == "current":
-        from_system = get_solar_system_name(get_character_location(character))
+        from_system = get_solar_system_name(await get_current_system_id(character))
 
         if not from_system:
             from_system = args[0]
 
-    from_system = from_system.replace(" ", "_")
-    
-    webbrowser.open_new_tab(f"https://evemaps.dotlan.net/range/{ship},5/{from_system}")
+    origin = get_solar_system(from_system)
 
-def jump_plan(character: EsiCharacter, modifier: str, args: list[str]):
-    if len(args) != 2:
+    if not origin:
+        raise Exception(f"unknown system {from_system}!")
+
+    systems = get_jump_range_engine().systems_in_range(origin, range_ly)
+
+    in_range = ", ".join(f"{system.name} ({distance:.2f})" for system, distance in systems[:JUMP_RANGE_LISTED])
+    if len(systems) > JUMP_RANGE_LISTED:
+        in_range += ", ..."
+
+    return f"{len(systems)} systems within {range_ly:g} LY of {origin.name} ({ship.name}, JDC {calibration}): {in_range}"
+
+
+async def jump_plan(character: EsiCharacter, modifier: str, args: list[str]):
+    if len(args) != 4:
         return
 
-    ship = "Archon"
-    if modifier == "blops":
-        ship = "Marshal"
-    elif modifier == "super":
-        ship = "Avatar"
-    elif modifier == "jf" or modifier == "rorq":
-        ship = "Rhea"
+    ship = get_jump_ship(modifier)
+    calibration = get_jump_drive_calibration(character, args[3])
+    range_ly = get_jump_range(ship, calibration)
 
     from_system = args[0]
 
     if from_system == "current":
-        from_system = get_solar_system_name(get_character_location(character))
+        from_system = get_solar_system_name(await get_current_system_id(character))
 
         if not from_system:
             from_system = args[0]
 
-    from_system = from_system.replace(" ", "_")
+    origin = get_solar_system(from_system)
+    destination = get_solar_system(args[1])
+
+    if not origin or not destination:
+        raise Exception(f"unknown system {args[1] if origin else from_system}!")
+
+    objectives = [objective.value for objective in JumpPlanObjective]
+    if args[2] and args[2].lower() not in objectives:
+        raise Exception(f"unknown objective {args[2]}, plan by {', '.join(objectives)}!")
+
+    objective = JumpPlanObjective(args[2].lower()) if args[2] else JumpPlanObjective.JUMPS
+
+    plan = get_jump_range_engine().plan(origin, destination, ship, range_ly, objective)
+
+    if not plan:
+        return f"no jump plan from {origin.name} to {destination.name} ({ship.name}, JDC {calibration})"
+
+    hops = ", ".join(f"{hop.system.name} ({hop.distance:.2f} LY, {format_minutes(hop.fatigue)})" for hop in plan.hops)
 
-    to_system = args[-1].replace(" ", "_")
+    return f"{len(plan.hops)} jumps, {plan.distance:.2f} LY, {format_minutes(plan.fatigue)} fatigue from {origin.name} to {destination.name} ({ship.name}, JDC {calibration}): {hops}"
 
-    webbrowser.open_new_tab(f"https://evemaps.dotlan.net/jump/{ship},544/{from_system}:{to_system}")
+
+def format_minutes(minutes: float) -> str:
+    hours, minutes = divmod(round(minutes), 60)
+
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m"
+
+
+async def route(character: EsiCharacter, modifier: str, args: list[str]):
+    if len(args) != 3:
+        return
+
+    from_system = args[0]
+
+    if from_system == "current":
+        from_system = get_solar_system_name(await get_current_system_id(character))
+
+        if not from_system:
+            from_system = args[0]
+
+    origin = get_solar_system(from_system)
+    destination = get_solar_system(args[1])
+
+    if not origin or not destination:
+        raise Exception(f"unknown system {args[1] if origin else from_system}!")
+
+    avoid = set()
+    for name in filter(None, map(str.strip, args[2].split(","))):
+        system = get_solar_system(name)
+
+        if not system:
+            raise Exception(f"unknown system {name}!")
+
+        avoid.add(system.id)
+
+    graph = get_route_graph()
+    positions = graph.index.positions
+
+    path = graph.route(
+        positions[origin.id],
+        positions[destination.id],
+        RoutePreference(modifier) if modifier else RoutePreference.SHORTEST,
+        {positions[system_id] for system_id in avoid},
+    )
+
+    if not path:
+        return f"no route from {origin.name} to {destination.name}"
+
+    systems = [graph.index.systems[position] for position in path]
+    unsafe = sum(1 for system in systems[1:] if system.security < HIGHSEC_SECURITY)
+
+    return f"{len(systems) - 1} jumps from {origin.name} to {destination.name} ({unsafe} outside highsec): " + ", ".join(system.name for system in systems)
 
 
 COMMANDS = [
@@ -217,21 +320,25 @@ COMMANDS = [
         predicates=[
             CommandPredicate(text="set destination", arg_completion_type=CompletionType.SYSTEM),
         ],
+        fan_out=True,
         action=set_destination,
     ),
     Command(
         predicates=[
             CommandPredicate(text="add waypoint", arg_completion_type=CompletionType.SYSTEM),
         ],
+        fan_out=True,
         action=add_waypoint,
     ),
     Command(
+        modifiers=["share"],
         predicates=[
             CommandPredicate(text="appraise clipboard", arg_completion_type=CompletionType.NONE),
         ],
         action=appraise_clipboard,
     ),
     Command(
+        modifiers=["share"],
         predicates=[
             CommandPredicate(text="dscan clipboard", arg_completion_type=CompletionType.NONE),
         ],
@@ -241,6 +348,7 @@ COMMANDS = [
         modifiers=["super", "blops", "jf", "rorq"],
         predicates=[
             CommandPredicate(text="jump range", arg_completion_type=CompletionType.SYSTEM),
+            CommandPredicate(text="jdc", arg_completion_type=CompletionType.NONE, optional=True),
         ],
         action=jump_range,
     ),
@@ -249,14 +357,24 @@ COMMANDS = [
         predicates=[
             CommandPredicate(text="jump plan from", arg_completion_type=CompletionType.SYSTEM),
             CommandPredicate(text="to", arg_completion_type=CompletionType.SYSTEM),
+            CommandPredicate(text="by", arg_completion_type=CompletionType.NONE, optional=True),
+            CommandPredicate(text="jdc", arg_completion_type=CompletionType.NONE, optional=True),
         ],
         action=jump_plan,
     ),
+    Command(
+        modifiers=[preference.value for preference in RoutePreference],
+        predicates=[
+            CommandPredicate(text="route from", arg_completion_type=CompletionType.SYSTEM),
+            CommandPredicate(text="to", arg_completion_type=CompletionType.SYSTEM),
+            CommandPredicate(text="avoid", arg_completion_type=CompletionType.SYSTEM, optional=True),
+        ],
+        action=route,
+    ),
 ]
 
-def generate_command_completions():
-    completions = []
-    for command in COMMANDS:
-        completions.extend(command.generate_command_completions())
+COMMAND_GRAMMAR = CommandGrammar(COMMANDS)
 
-    return completions
+
+def generate_command_completions():
+    return list(COMMAND_GRAMMAR.completions)
@@ -0,0 +1,127 @@
+import bisect
+
+COMPLETION_LIMIT = 20
+
+# Longest query, in characters, that still tolerates only a single typo
+SINGLE_TYPO_LENGTH = 5
+
+
+def trigrams(key: str) -> set[str]:
+    padded = f"^{key}"
+
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def prefix_distance(query: str, key: str, max_distance: int) -> int:
+    # Optimal string alignment distance between the query and the closest prefix of key,
+    # so a transposition like "jtia" for "jita" costs one edit
+    width = min(len(key), len(query) + max_distance)
+    previous_previous: list[int] = []
+    previous = list(range(width + 1))
+
+    for i in range(1, len(query) + 1):
+        current = [i] + [0] * width
+
+        for j in range(1, width + 1):
+            substitution = 0 if query[i - 1] == key[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + substitution)
+
+            if i > 1 and j > 1 and query[i - 1] == key[j - 2] and query[i - 2] == key[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+
+        if min(current) > max_distance:
+            return max_distance + 1
+
+        previous_previous, previous = previous, current
+
+    return min(previous)
+
+
+class CompletionIndex:
+    def __init__(self, names: list[str]):
+        self.names = names
+        self.keys = [name.lower() for name in names]
+
+        # Sorted keys stand in for a prefix trie, every prefix is one contiguous bisect range
+        self._sorted = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self._sorted_keys = [self.keys[i] for i in self._sorted]
+
+        self._trigrams: dict[str, list[int]] = {}
+        self._initials: dict[str, list[int]] = {}
+
+        for i, key in enumerate(self.keys):
+            for trigram in trigrams(key):
+                self._trigrams.setdefault(trigram, []).append(i)
+
+            if key:
+                self._initials.setdefault(key[0], []).append(i)
+
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+    def search(self, query: str, limit: int = COMPLETION_LIMIT) -> list[int]:
+        query = query.strip().lower()
+
+        if not query:
+            return self._sorted[:limit]
+
+        ranked = self._prefix_matches(query)
+        if len(ranked) < limit:
+            ranked += self._substring_matches(query, set(ranked))
+        if len(ranked) < limit:
+            ranked += self._fuzzy_matches(query, set(ranked))
+
+        return ranked[:limit]
+
+
+    def _prefix_matches(self, query: str) -> list[int]:
+        start = bisect.bisect_left(self._sorted_keys, query)
+        end = bisect.bisect_left(self._sorted_keys, query + "\uffff", start)
+
+        return sorted(self._sorted[start:end], key=lambda i: (len(self.keys[i]), self.keys[i]))
+
+
+    def _substring_matches(self, query: str, seen: set[int]) -> list[int]:
+        if len(query) < 3:
+            return []
+
+        # Every trigram of the query has to be somewhere in the name, start with the rarest
+        postings = sorted((self._trigrams.get(query[i:i + 3], []) for i in range(len(query) - 2)), key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+
+        matches = [i for i in candidates if i not in seen and query in self.keys[i]]
+
+        return sorted(matches, key=lambda i: (self.keys[i].index(query), len(self.keys[i]), self.keys[i]))
+
+
+    def _fuzzy_matches(self, query: str, seen: set[int]) -> list[int]:
+        if len(query) < 2:
+            return []
+
+        max_distance = 1 if len(query) <= SINGLE_TYPO_LENGTH else 2
+
+        candidates = set(self._initials.get(query[0], []))
+        for trigram in trigrams(query):
+            candidates.update(self._trigrams.get(trigram, []))
+
+        characters = set(query)
+        scored = []
+        for i in candidates:
+            if i in seen:
+                continue
+
+            key = self.keys[i]
+
+            # Cheap rejection before running the edit distance
+            if len(characters - set(key[:len(query) + max_distance])) > max_distance:
+                continue
+
+            distance = prefix_distance(query, key, max_distance)
+            if distance <= max_distance:
+                scored.append((distance, len(key), key, i))
+
+        scored.sort()
+
+        return [i for _, _, _, i in scored]
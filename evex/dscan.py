@@ -0,0 +1,107 @@
+import io
+import threading
+from collections import Counter
+
+import numpy as np
+from pydantic import BaseModel
+
+from evex.sde import TypeIndex
+
+SHIP_CATEGORY_ID = 6
+
+# Hulls worth shouting about, by SDE group
+NOTABLE_GROUP_IDS = {
+    "dictor": {541},
+    "hic": {894},
+    # Titan, Dreadnought, Carrier, Supercarrier, Capital Industrial Ship, Force Auxiliary, Lancer Dreadnought
+    "capital": {30, 485, 547, 659, 883, 1538, 4594},
+}
+
+
+class DscanResult(BaseModel):
+    # Ship counts per type name and per ship class (SDE group)
+    ships: dict[str, int] = {}
+    classes: dict[str, int] = {}
+    flags: dict[str, int] = {}
+    others: int = 0
+    unresolved: int = 0
+
+    @property
+    def total_ships(self) -> int:
+        return sum(self.ships.values())
+
+
+def parse_dscan(text: str, types: TypeIndex) -> DscanResult:
+    # Each row is "typeID<tab>name<tab>type name<tab>distance"
+    type_ids: list[int] = []
+    type_names: list[str] = []
+
+    for line in io.StringIO(text):
+        columns = line.rstrip("\r\n").split("\t")
+        if len(columns) < 3:
+            continue
+
+        type_ids.append(int(columns[0]) if columns[0].isdigit() else -1)
+        type_names.append(columns[2])
+
+    positions = types.positions(np.array(type_ids, dtype=np.int64)).tolist()
+
+    ships: Counter[str] = Counter()
+    classes: Counter[str] = Counter()
+    flags: Counter[str] = Counter()
+    others = 0
+    unresolved = 0
+
+    for position, type_name in zip(positions, type_names):
+        if position < 0:
+            position = types.find(type_name)
+
+            if position is None:
+                unresolved += 1
+                continue
+
+        if types.category_ids[position] != SHIP_CATEGORY_ID:
+            others += 1
+            continue
+
+        group_id = int(types.group_ids[position])
+
+        ships[types.names[position]] += 1
+        classes[types.group_names.get(group_id, "Unknown")] += 1
+
+        for flag, group_ids in NOTABLE_GROUP_IDS.items():
+            if group_id in group_ids:
+                flags[flag] += 1
+
+    return DscanResult(
+        ships=dict(ships.most_common()),
+        classes=dict(classes.most_common()),
+        flags=dict(flags),
+        others=others,
+        unresolved=unresolved,
+    )
+
+
+def diff_dscan(previous: DscanResult, current: DscanResult) -> dict[str, int]:
+    changes = Counter(current.ships)
+    changes.subtract(previous.ships)
+
+    return {name: change for name, change in sorted(changes.items(), key=lambda item: -abs(item[1])) if change}
+
+
+class DscanHistory:
+    def __init__(self):
+        self.previous: DscanResult | None = None
+
+        self._lock = threading.Lock()
+
+
+    def push(self, result: DscanResult) -> dict[str, int] | None:
+        # Changes since the last scan, None for the first one
+        with self._lock:
+            previous, self.previous = self.previous, result
+
+        return diff_dscan(previous, result) if previous else None
+
+
+dscan_history = DscanHistory()
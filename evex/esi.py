@@ -1,9 +1,9 @@
 import asyncio
 import base64
 import hashlib
-import requests
 import secrets
 import socket
+import threading
 import time
 import webbrowser
 
@@ -11,10 +11,13 @@ from contextlib import contextmanager
 from urllib import parse
 from urllib.parse import urlencode
 
-from jose import jwt
-
+from evex.esi_cache import EsiCache, EsiCacheEntry, get_expires_at
+from evex.jwks import JwksCache
 from evex.models import EsiCharacter
-from evex.settings import load_settings, save_settings
+from evex.settings import get_settings_store
+from evex.tracing import span
+from evex.transport import run_blocking, session
+from evex.utils import get_config_path
 
 CLIENT_ID = "1b677fbf08124810a442ba019ee4f1b8"
 
@@ -28,14 +31,35 @@ JWK_ALGORITHM = "RS256"
 JWK_ISSUERS = ("login.eveonline.com", "https://login.eveonline.com")
 JWK_AUDIENCE = "EVE Online"
 
+# Refresh slightly early so a token can't expire between the check and the request
+TOKEN_EXPIRY_MARGIN = 10
+
+esi_cache = EsiCache()
+
+_jwks_cache: JwksCache | None = None
+_jwks_cache_lock = threading.Lock()
+
+
+def get_jwks_cache() -> JwksCache:
+    global _jwks_cache
+
+    # Built on first use, importing evex.esi must not create the config dir
+    if _jwks_cache is None:
+        with _jwks_cache_lock:
+            if _jwks_cache is None:
+                _jwks_cache = JwksCache(JWKS_URL, get_config_path("jwks.json"), JWK_ALGORITHM)
+
+    return _jwks_cache
+
 
 def decode_token(token: str):
-    response = requests.get(JWKS_URL)
-    response.raise_for_status()
+    from jose import jwt
 
-    jwks = response.json()
+    kid = jwt.get_unverified_header(token).get("kid")
+    jwk = get_jwks_cache().get_key(kid)
 
-    jwk = [item for item in jwks["keys"] if item["alg"] == JWK_ALGORITHM].pop()
+    if not jwk:
+        raise Exception(f"unknown token signing key {kid}!")
 
     return jwt.decode(token=token, key=jwk, algorithms=jwk["alg"], issuer=JWK_ISSUERS, audience=JWK_AUDIENCE)
 
@@ -104,12 +128,12 @@ async def login() -> EsiCharacter:
         "code_verifier": code_verifier,
     }
 
-    response = requests.post(TOKEN_URL, data=token_params)
+    response = await run_blocking(session().post, TOKEN_URL, data=token_params)
     response.raise_for_status()
 
     result = response.json()
 
-    claims = decode_token(result["access_token"])
+    claims = await run_blocking(decode_token, result["access_token"])
 
     character_id = claims["sub"].replace("CHARACTER:EVE:", "")
     character = EsiCharacter(
@@ -130,12 +154,13 @@ def refresh(character: EsiCharacter) -> EsiCharacter:
         "client_id": CLIENT_ID,
     }
 
-    response = requests.post(TOKEN_URL, data=refresh_params)
-    response.raise_for_status()
+    with span("token refresh", character_id=character.id):
+        response = session().post(TOKEN_URL, data=refresh_params)
+        response.raise_for_status()
 
-    result = response.json()
+        result = response.json()
 
-    claims = decode_token(result["access_token"])
+        claims = decode_token(result["access_token"])
 
     if character.name != claims["name"]:
         raise Exception("bad character refresh!")
@@ -144,15 +169,17 @@ def refresh(character: EsiCharacter) -> EsiCharacter:
     character.expires_at = claims["exp"]
     character.refresh_token = result["refresh_token"]
 
-    settings = load_settings()
-    settings.characters[character.id] = character
-    save_settings(settings)
+    get_settings_store().put_character(character)
 
     return character
 
 
+def is_token_expired(character: EsiCharacter) -> bool:
+    return time.time() >= character.expires_at - TOKEN_EXPIRY_MARGIN
+
+
 def get_auth_headers(character: EsiCharacter) -> dict:
-    if time.time() >= character.expires_at:
+    if is_token_expired(character):
         character = refresh(character)
 
     headers = {
@@ -162,22 +189,55 @@ def get_auth_headers(character: EsiCharacter) -> dict:
     return headers
 
 
-def set_destination(character: EsiCharacter, destination_id: str, add_to_beginning=True, clear_other_waypoints=True):
-    response = requests.post(
+def set_destination(character: EsiCharacter, destination_id: str, add_to_beginning=True, clear_other_waypoints=True, headers: dict | None = None):
+    response = session().post(
         f"{ESI_BASE_URL}/ui/autopilot/waypoint/?add_to_beginning={str(add_to_beginning).lower()}&clear_other_waypoints={str(clear_other_waypoints).lower()}&datasource=tranquility&destination_id={destination_id}",
-        headers=get_auth_headers(character)
+        headers=headers or get_auth_headers(character)
     )
     response.raise_for_status()
 
 
-def get_character_location(character: EsiCharacter):
-    response = requests.get(
-        f"{ESI_BASE_URL}/characters/{character.id}/location/",
-        headers=get_auth_headers(character)
-    )
+def esi_cache_key(path: str, character: EsiCharacter | None = None) -> tuple[int | None, str]:
+    return (character.id if character else None, path)
+
+
+def esi_get(path: str, character: EsiCharacter | None = None, headers: dict | None = None):
+    key = esi_cache_key(path, character)
+
+    entry = esi_cache.get(key)
+    if entry and entry.is_fresh():
+        return entry.data
+
+    if character and not headers:
+        headers = get_auth_headers(character)
+
+    request_headers = dict(headers or {})
+    if entry:
+        request_headers.update(entry.validators())
+
+    response = session().get(f"{ESI_BASE_URL}{path}", headers=request_headers)
+
+    if response.status_code == 304 and entry:
+        entry.expires_at = get_expires_at(response)
+        esi_cache.put(key, entry)
+
+        return entry.data
+
     response.raise_for_status()
 
-    location = response.json()
+    data = response.json()
+    esi_cache.put(key, EsiCacheEntry(
+        data,
+        get_expires_at(response),
+        response.headers.get("ETag"),
+        response.headers.get("Last-Modified"),
+    ))
+
+    return data
+
+
+def get_character_location(character: EsiCharacter, headers: dict | None = None):
+    location = esi_get(f"/characters/{character.id}/location/", character, headers)
 
     return location["solar_system_id"]
 
@@ -185,7 +245,7 @@ def get_character_location(character: EsiCharacter):
 '''
 def get_portrait(esi_character) -> QtGui.QPixmap:
     portrait_url = f"https://images.evetech.net/characters/{esi_character.id}/portrait?size=32"
-    response = requests.get(portrait_url)
+    response = session().get(portrait_url)
     response.raise_for_status()
 
     pixmap = QtGui.QPixmap()
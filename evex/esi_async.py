@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+from evex import esi
+from evex.models import EsiCharacter
+from evex.transport import run_blocking
+
+# The blocking ESI calls run on the transport's worker pool, so any number of them can be
+# in flight while the qasync loop keeps serving Qt. Cancelling a task abandons the
+# in-flight request, whose result is then discarded.
+
+_refresh_locks: dict[int, asyncio.Lock] = {}
+
+
+def refresh_lock(character: EsiCharacter) -> asyncio.Lock:
+    if character.id not in _refresh_locks:
+        _refresh_locks[character.id] = asyncio.Lock()
+
+    return _refresh_locks[character.id]
+
+
+async def refresh(character: EsiCharacter) -> EsiCharacter:
+    async with refresh_lock(character):
+        return await run_blocking(esi.refresh, character)
+
+
+async def refresh_if_expiring(character: EsiCharacter, margin: float = esi.TOKEN_EXPIRY_MARGIN) -> EsiCharacter:
+    async with refresh_lock(character):
+        # Concurrent callers for the same character share a single refresh
+        if time.time() >= character.expires_at - margin:
+            character = await run_blocking(esi.refresh, character)
+
+    return character
+
+
+async def get_auth_headers(character: EsiCharacter) -> dict:
+    if esi.is_token_expired(character):
+        character = await refresh_if_expiring(character)
+
+    headers = {
+        "Authorization": f"Bearer {character.access_token}"
+    }
+
+    return headers
+
+
+async def set_destination(character: EsiCharacter, destination_id: str, add_to_beginning=True, clear_other_waypoints=True):
+    headers = await get_auth_headers(character)
+
+    await run_blocking(esi.set_destination, character, destination_id, add_to_beginning, clear_other_waypoints, headers=headers)
+
+
+async def esi_get(path: str, character: EsiCharacter | None = None):
+    # Fresh cache hits skip both the refresh check and the worker pool
+    data = esi.esi_cache.get_fresh(esi.esi_cache_key(path, character))
+    if data is not None:
+        return data
+
+    headers = await get_auth_headers(character) if character else None
+
+    return await run_blocking(esi.esi_get, path, character, headers)
+
+
+async def get_character_location(character: EsiCharacter):
+    location = await esi_get(f"/characters/{character.id}/location/", character)
+
+    return location["solar_system_id"]
@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+ESI_CACHE_MAX_ENTRIES = 512
+
+
+class EsiCacheEntry:
+    def __init__(self, data, expires_at: float, etag: str | None = None, last_modified: str | None = None):
+        self.data = data
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+    def validators(self) -> dict:
+        headers = {}
+
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+
+class EsiCache:
+    def __init__(self, max_entries: int = ESI_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[tuple[int | None, str], EsiCacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+    def get(self, key: tuple[int | None, str]) -> EsiCacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry:
+                self._entries.move_to_end(key)
+
+            return entry
+
+
+    def get_fresh(self, key: tuple[int | None, str]):
+        entry = self.get(key)
+
+        return entry.data if entry and entry.is_fresh() else None
+
+
+    def put(self, key: tuple[int | None, str], entry: EsiCacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+    def clear(self, character_id: int | None = None):
+        with self._lock:
+            if character_id is None:
+                self._entries.clear()
+                return
+
+            for key in [key for key in self._entries if key[0] == character_id]:
+                del self._entries[key]
+
+
+def get_expires_at(response) -> float:
+    expires = response.headers.get("Expires")
+    if not expires:
+        return 0
+
+    try:
+        expires_at = parsedate_to_datetime(expires).timestamp()
+        # Measure against the server's clock so a skewed local clock doesn't matter
+        date = response.headers.get("Date")
+        served_at = parsedate_to_datetime(date).timestamp() if date else time.time()
+    except (TypeError, ValueError):
+        return 0
+
+    return time.time() + max(expires_at - served_at, 0)
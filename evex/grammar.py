@@ -0,0 +1,203 @@
+from enum import Enum
+from typing import Awaitable, Callable
+
+from pydantic import BaseModel, PrivateAttr
+
+from evex.models import EsiCharacter
+
+
+class CompletionType(str, Enum):
+    NONE = "none"
+    COMMAND = "command"
+    SYSTEM = "system"
+    CHARACTER = "character"
+
+
+class CommandPredicate(BaseModel):
+    text: str
+    arg_completion_type: CompletionType
+    optional: bool = False
+
+
+# Leading words that run a command for several characters at once
+SELECT_ALL = "all"
+SELECT_GROUP = "group"
+
+
+class CharacterSelector(BaseModel):
+    # None selects every character
+    group: str | None = None
+
+
+class Command(BaseModel):
+    modifiers: list[str] = []
+    predicates: list[CommandPredicate]
+    fan_out: bool = False
+    action: Callable[[EsiCharacter, str, list[str]], Awaitable[str | None] | str | None]
+
+    _grammar: "CommandGrammar | None" = PrivateAttr(default=None)
+
+    def grammar(self) -> "CommandGrammar":
+        if self._grammar is None:
+            self._grammar = CommandGrammar([self])
+
+        return self._grammar
+
+
+    def match(self, input: str) -> bool:
+        return self.grammar().parse(input).command is self
+
+
+    def parse(self, input: str) -> tuple[str | None, list[str]]:
+        parsed = self.grammar().parse(input)
+
+        return (parsed.modifier, parsed.args)
+
+
+    def generate_command_completions(self) -> list[str]:
+        completions = []
+
+        intent = self.predicates[0].text
+
+        completions.append(intent)
+        for modifier in self.modifiers:
+            completions.append(f"{modifier} {intent}")
+
+        return completions
+
+
+class ParsedCommand(BaseModel):
+    command: Command | None = None
+    selector: CharacterSelector | None = None
+    modifier: str | None = None
+    args: list[str] = []
+    # Predicate whose argument is being typed, -1 while still typing the command itself
+    predicate_index: int = -1
+    completion_type: CompletionType = CompletionType.COMMAND
+    # Offset in the input where the argument being typed starts, the end of the input while it is empty
+    arg_start: int = 0
+    # Why a command was matched but can't run, for the user
+    error: str | None = None
+
+
+class CommandNode:
+    __slots__ = ("children", "command", "modifier")
+
+    def __init__(self):
+        self.children: dict[str, CommandNode] = {}
+        self.command: Command | None = None
+        self.modifier: str | None = None
+
+
+class CommandGrammar:
+    def __init__(self, commands: list[Command]):
+        self.commands = commands
+
+        # Token trie over every "[modifier] intent" phrase
+        self.root = CommandNode()
+
+        for command in commands:
+            intent = command.predicates[0].text.split()
+
+            for modifier in [None, *command.modifiers]:
+                node = self.root
+                for token in (modifier.split() if modifier else []) + intent:
+                    node = node.children.setdefault(token, CommandNode())
+
+                node.command = command
+                node.modifier = modifier
+
+        self.predicate_tokens: dict[int, list[list[str]]] = {
+            id(command): [predicate.text.split() for predicate in command.predicates]
+            for command in commands
+        }
+
+        self.completions = [completion for command in commands for completion in command.generate_command_completions()]
+
+
+    def parse(self, input: str) -> ParsedCommand:
+        tokens = input.split()
+        words = [token.lower() for token in tokens]
+
+        selector = None
+        start = 0
+
+        if words[:1] == [SELECT_ALL]:
+            selector = CharacterSelector()
+            start = 1
+        elif words[:1] == [SELECT_GROUP]:
+            # Still typing the group name
+            if len(tokens) < 2 or (len(tokens) == 2 and not input[-1:].isspace()):
+                return ParsedCommand(selector=CharacterSelector(group=" ".join(tokens[1:])), completion_type=CompletionType.NONE)
+
+            selector = CharacterSelector(group=tokens[1])
+            start = 2
+
+        # Longest "[modifier] intent" phrase at the start wins
+        node = self.root
+        matched: CommandNode | None = None
+        position = start
+        for i, word in enumerate(words[start:], start):
+            node = node.children.get(word)
+            if node is None:
+                break
+
+            if node.command:
+                matched = node
+                position = i + 1
+
+        if not matched:
+            return ParsedCommand(selector=selector)
+
+        command = matched.command
+
+        if selector and not command.fan_out:
+            return ParsedCommand(selector=selector, completion_type=CompletionType.NONE, error=f"{command.predicates[0].text} can't target multiple characters")
+
+        predicates = self.predicate_tokens[id(command)]
+
+        args: list[list[str]] = [[] for _ in predicates]
+        predicate_index = 0
+
+        while position < len(tokens):
+            next_index = self._next_predicate(command, predicates, predicate_index, words, position, bool(args[predicate_index]))
+
+            if next_index is None:
+                args[predicate_index].append(tokens[position])
+                position += 1
+            else:
+                position += len(predicates[next_index])
+                predicate_index = next_index
+
+        # The argument being typed is always the trailing tokens, walk back over them
+        arg_start = len(input.rstrip()) if args[predicate_index] else len(input)
+        for token in reversed(args[predicate_index]):
+            arg_start = input.rindex(token, 0, arg_start)
+
+        return ParsedCommand(
+            command=command,
+            selector=selector,
+            modifier=matched.modifier,
+            args=[" ".join(arg) for arg in args],
+            predicate_index=predicate_index,
+            completion_type=command.predicates[predicate_index].arg_completion_type,
+            arg_start=arg_start,
+        )
+
+
+    def _next_predicate(self, command: Command, predicates: list[list[str]], predicate_index: int, words: list[str], position: int, has_arg: bool) -> int | None:
+        # A predicate word only ends an argument that already has something in it, so a
+        # system named after a predicate word can still be typed straight after the keyword
+        if not has_arg:
+            return None
+
+        for next_index in range(predicate_index + 1, len(predicates)):
+            predicate = predicates[next_index]
+
+            if words[position:position + len(predicate)] == predicate:
+                return next_index
+
+            if not command.predicates[next_index].optional:
+                break
+
+        return None
@@ -1,28 +1,143 @@
-import sqlite3
 from PySide6 import QtCore, QtWidgets
 
-from evex.sde import get_solar_system_names
-from evex.utils import get_resource
+from evex.activity import SystemActivity
+from evex.completion import COMPLETION_LIMIT, CompletionIndex
+from evex.grammar import CompletionType
+
+
+class SystemCompletionModel(QtCore.QAbstractListModel):
+    def __init__(self, index: CompletionIndex, limit: int = COMPLETION_LIMIT):
+        super().__init__()
+
+        self.completion_index = index
+        self.limit = limit
+        self.query: str | None = None
+        self.activity: SystemActivity | None = None
+
+        # Only the ranked top rows for the current query ever live in the model
+        self.rows: list[int] = []
+
+
+    def setQuery(self, query: str):
+        if query == self.query:
+            return
+
+        self.beginResetModel()
+        self.query = query
+        self.rows = self.completion_index.search(query, self.limit)
+        self.endResetModel()
+
+
+    def setCompletionIndex(self, index: CompletionIndex):
+        self.beginResetModel()
+        self.completion_index = index
+        self.rows = index.search(self.query, self.limit) if self.query is not None else []
+        self.endResetModel()
+
+
+    def setActivity(self, activity: SystemActivity | None):
+        self.activity = activity
+
+        if self.rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self.rows) - 1), [QtCore.Qt.ItemDataRole.DisplayRole])
+
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+
+        name = self.completion_index.names[self.rows[index.row()]]
+
+        # The popup shows the last hour of activity, completing only ever inserts the name
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            annotation = self.activity.annotation(name) if self.activity else ""
+
+            return f"{name}    {annotation}" if annotation else name
+
+        if role == QtCore.Qt.ItemDataRole.EditRole:
+            return name
+
+        return None
+
 
 class SystemCompleter(QtWidgets.QCompleter):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, index: CompletionIndex | None = None):
+
+        # System names arrive once the SDE has loaded in the background
+        self.system_name_model = SystemCompletionModel(index or CompletionIndex([]))
+
+        # Models are built once and swapped, never rebuilt per keystroke
+        self.command_model = QtCore.QStringListModel()
+        self.character_model = QtCore.QStringListModel()
+        self.empty_model = QtCore.QStringListModel()
 
-        self.system_names = get_solar_system_names()
-        self.system_name_model = QtCore.QStringListModel(self.system_names)
+        self.completion_type: CompletionType | None = None
 
         super().__init__(parent)
-        self.setModel(self.system_name_model)
+        self.setSystems()
+
+
+    def setCompletionPrefix(self, prefix: str):
+        # System completions are ranked and filtered by the index, not by QCompleter
+        if self.completion_type == CompletionType.SYSTEM:
+            self.system_name_model.setQuery(prefix)
+
+        super().setCompletionPrefix(prefix)
+
+
+    def currentCompletion(self) -> str:
+        if self.completion_type != CompletionType.SYSTEM:
+            return super().currentCompletion()
+
+        # QCompleter only tracks rows that prefix match, fuzzy rows come from the popup
+        rows = self.system_name_model.rows
+        row = max(self.popup().currentIndex().row(), 0)
+
+        return self.system_name_model.completion_index.names[rows[row]] if row < len(rows) else ""
+
+
+    def setCompletionType(self, completion_type: CompletionType):
+        if completion_type == self.completion_type:
+            return
+
+        self.completion_type = completion_type
+
+        if completion_type == CompletionType.SYSTEM:
+            self.system_name_model.setQuery(self.completionPrefix())
+            self.setModel(self.system_name_model)
+            self.setCompletionMode(QtWidgets.QCompleter.CompletionMode.UnfilteredPopupCompletion)
+            return
+
+        models = {
+            CompletionType.COMMAND: self.command_model,
+            CompletionType.CHARACTER: self.character_model,
+        }
+
+        self.setModel(models.get(completion_type, self.empty_model))
+        self.setCompletionMode(QtWidgets.QCompleter.CompletionMode.PopupCompletion)
+
+
+    def setCompletionIndex(self, index: CompletionIndex):
+        self.system_name_model.setCompletionIndex(index)
+
+
+    def setActivity(self, activity: SystemActivity | None):
+        self.system_name_model.setActivity(activity)
 
 
     def setCommands(self, commands: list[str]):
-        model = QtCore.QStringListModel(commands)
-        self.setModel(model)
+        self.command_model.setStringList(commands)
+        self.setCompletionType(CompletionType.COMMAND)
 
 
     def setSystems(self):
-        self.setModel(self.system_name_model)
+        self.setCompletionType(CompletionType.SYSTEM)
 
 
     def setCharacters(self, character_names: list[str]):
-        model = QtCore.QStringListModel(character_names)
-        self.setModel(model)
+        self.character_model.setStringList(character_names)
+        self.setCompletionType(CompletionType.CHARACTER)
@@ -1,15 +1,19 @@
 from PySide6 import QtCore, QtWidgets, QtGui
 
+from evex.grammar import CommandGrammar, CompletionType
+
 class Omnibox(QtWidgets.QTextEdit):
     activated = QtCore.Signal()
 
     _completer: QtWidgets.QCompleter | None
+    _grammar: CommandGrammar | None
     _highlighted = False
 
     def __init__(self):
         super().__init__()
 
         self._completer = None
+        self._grammar = None
         self._highlighted = False
 
         self.setPlaceholderText("type something...")
@@ -17,16 +21,17 @@ class Omnibox(QtWidgets.QTextEdit):
 
     @QtCore.Slot()
     def insertCompletion(self, completion: str):
-        if self._completer.widget() != self:
+        if self._completer.widget() != self or not completion:
             return
 
-        text_cursor = self.textCursor()
-        extra = len(completion) - len(self._completer.completionPrefix())
+        start, end = self.completionRange()
 
-        text_cursor.movePosition(QtGui.QTextCursor.MoveOperation.Left)
-        text_cursor.movePosition(QtGui.QTextCursor.MoveOperation.EndOfWord)
+        # Completions can be fuzzy matches, so replace what was typed instead of appending to it
+        text_cursor = self.textCursor()
+        text_cursor.setPosition(start)
+        text_cursor.setPosition(end, QtGui.QTextCursor.MoveMode.KeepAnchor)
 
-        text_cursor.insertText(completion[(-1*extra):])
+        text_cursor.insertText(completion)
 
         self.setTextCursor(text_cursor)
         self._highlighted = False
@@ -107,6 +112,10 @@ class Omnibox(QtWidgets.QTextEdit):
             self._completer.highlighted.connect(self.highlightCompletion)
 
 
+    def setGrammar(self, grammar: CommandGrammar | None):
+        self._grammar = grammar
+
+
     def focusInEvent(self, event: QtGui.QFocusEvent):
         if self._completer:
             self._completer.setWidget(self)
@@ -114,7 +123,21 @@ class Omnibox(QtWidgets.QTextEdit):
         super().focusInEvent(event)
 
 
-    def textUnderCursor(self) -> str:
+    def completionRange(self) -> tuple[int, int]:
         text_cursor = self.textCursor()
+
+        # System names have spaces and dashes, so the whole argument is the query, not the last word
+        if self._grammar:
+            position = text_cursor.position()
+            parsed = self._grammar.parse(self.toPlainText()[:position])
+
+            if parsed.completion_type == CompletionType.SYSTEM:
+                return (parsed.arg_start, position)
+
         text_cursor.select(QtGui.QTextCursor.SelectionType.WordUnderCursor)
-        return text_cursor.selectedText()
+        return (text_cursor.selectionStart(), text_cursor.selectionEnd())
+
+
+    def textUnderCursor(self) -> str:
+        start, end = self.completionRange()
+        return self.toPlainText()[start:end]
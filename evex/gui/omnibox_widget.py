@@ -1,16 +1,22 @@
+import asyncio
 import time
 import sqlite3
 import webbrowser
 from PySide6 import QtCore, QtWidgets, QtGui
 
-import requests
-
-from evex.commands import COMMANDS, generate_command_completions
+from evex.activity import SystemActivity
+from evex.commands import COMMAND_GRAMMAR
+from evex.grammar import CharacterSelector
+from evex.completion import CompletionIndex
 from evex.esi import set_destination
 from evex.gui.completers import SystemCompleter
 from evex.gui.omnibox import Omnibox
 from evex.models import EsiCharacter, EsiCharacterListModel
+from evex.prefetch import prefetch
+from evex.runner import CommandRunner
 from evex.sde import get_solar_system_id
+from evex.settings import get_settings_store
+from evex.tracing import span, tracer
 
 class OmniboxWidget(QtWidgets.QWidget):
     activated = QtCore.Signal(str)
@@ -22,6 +28,9 @@ class OmniboxWidget(QtWidgets.QWidget):
         self.esi_state = None
         self.esi_characters: dict[int, EsiCharacter] = {}
 
+        self.runner = CommandRunner()
+        self.prefetch_task: asyncio.Task | None = None
+
         self.setWindowFlags(QtCore.Qt.FramelessWindowHint | QtCore.Qt.WindowStaysOnTopHint)
 
         self.activated.connect(self.show_and_focus)
@@ -42,8 +51,9 @@ class OmniboxWidget(QtWidgets.QWidget):
         
         self.textbox = Omnibox()
         self.textbox.setFont(QtGui.QFont("Arial", 32))
+        self.textbox.setGrammar(COMMAND_GRAMMAR)
         self.textbox.setCompleter(SystemCompleter())
-        self.textbox.completer().setCommands(generate_command_completions())
+        self.textbox.completer().setCommands(COMMAND_GRAMMAR.completions)
         self.textbox.textChanged.connect(self.update_completer)
         self.textbox.activated.connect(self.exec_command)
 
@@ -59,6 +69,24 @@ class OmniboxWidget(QtWidgets.QWidget):
         self.character_context_box.setModel(EsiCharacterListModel(list(esi_characters.values())))
 
 
+    def setCompletionIndex(self, index: CompletionIndex):
+        self.textbox.completer().setCompletionIndex(index)
+
+
+    def setSystemActivity(self, activity: SystemActivity | None):
+        self.textbox.completer().setActivity(activity)
+
+
+    def select_characters(self, selector: CharacterSelector) -> list[EsiCharacter]:
+        if selector.group is None:
+            return list(self.esi_characters.values())
+
+        groups = {name.lower(): members for name, members in get_settings_store().settings.groups.items()}
+        members = {member.lower() for member in groups.get(selector.group.lower(), [])}
+
+        return [character for character in self.esi_characters.values() if character.name.lower() in members]
+
+
     @QtCore.Slot()
     def character_context_changed(self, index):
         self.esi_state = self.character_context_box.currentData()
@@ -82,32 +110,52 @@ class OmniboxWidget(QtWidgets.QWidget):
         self.activateWindow()
         self.textbox.setFocus()
 
+        tracer.since("hotkey", "hotkey to window shown")
+
+        # Token and location are usually settled by the time Enter is pressed
+        self.start_prefetch()
+
+
+    def start_prefetch(self):
+        self.cancel_prefetch()
+        self.prefetch_task = asyncio.ensure_future(prefetch(self.esi_state))
+
+
+    def cancel_prefetch(self):
+        if self.prefetch_task and not self.prefetch_task.done():
+            self.prefetch_task.cancel()
+
+        self.prefetch_task = None
+
 
     @QtCore.Slot()
     def update_completer(self):
-        text = self.textbox.toPlainText()
-
-        for command in COMMANDS:
-            if command.match(text):
-                self.textbox.completer().setSystems()
-                return
+        with span("completer update"):
+            parsed = COMMAND_GRAMMAR.parse(self.textbox.toPlainText())
 
-        self.textbox.completer().setCommands(generate_command_completions())
+            self.textbox.completer().setCompletionType(parsed.completion_type)
 
 
     @QtCore.Slot()
     def exec_command(self):
         text = self.textbox.toPlainText().strip()
 
-        for command in COMMANDS:
-            if command.match(text):
-                modifier, args = command.parse(text)
-                command.action(self.esi_state, modifier, args)
-                break
-
+        # Get out of the way before anything touches the network
         self.hide_and_reset()
 
+        with span("command parse"):
+            parsed = COMMAND_GRAMMAR.parse(text)
+
+        if parsed.command and parsed.selector:
+            return self.runner.submit_many(self.select_characters(parsed.selector), parsed.command, parsed.modifier, parsed.args)
+        elif parsed.command:
+            return self.runner.submit(self.esi_state, parsed.command, parsed.modifier, parsed.args)
+        elif text:
+            # Say why instead of silently swallowing what was typed
+            self.runner.failed.emit(text, parsed.error or "unknown command")
+
 
     @QtCore.Slot()
     def cancel_command(self):
+        self.cancel_prefetch()
         self.hide_and_reset()
@@ -0,0 +1,257 @@
+import heapq
+import math
+import threading
+from enum import Enum
+
+import numpy as np
+from pydantic import BaseModel
+
+from evex.sde import HIGHSEC_SECURITY, SolarSystem, SolarSystemIndex, get_solar_system_index
+
+# EVE's light year, in the metres used by the SDE coordinates
+LIGHT_YEAR = 9_460_528_400_000_000
+
+POCHVEN_REGION_ID = 10000070
+ZARZAKH_REGION_ID = 10001000
+WORMHOLE_REGION_ID_MIN = 11000000
+
+JUMP_DRIVE_CALIBRATION_BONUS = 0.2
+DEFAULT_JUMP_DRIVE_CALIBRATION = 5
+
+# Jump fatigue and reactivation timers, in minutes
+FATIGUE_MIN = 10
+FATIGUE_MAX = 300
+REACTIVATION_MAX = 30
+
+# Spatial hash for range queries, cell coordinates are shifted to stay positive
+GRID_CELL_OFFSET = 1 << 19
+GRID_CELL_SPAN = 1 << 20
+
+# Breaks ties between plans with the same number of jumps in favour of fewer light years
+JUMPS_DISTANCE_WEIGHT = 1e-4
+
+
+class JumpPlanObjective(str, Enum):
+    JUMPS = "jumps"
+    DISTANCE = "ly"
+    FATIGUE = "fatigue"
+
+
+class JumpHop(BaseModel):
+    system: SolarSystem
+    distance: float
+    fatigue: float
+    reactivation: float
+
+
+class JumpPlan(BaseModel):
+    origin: SolarSystem
+    hops: list[JumpHop]
+
+    @property
+    def distance(self) -> float:
+        return sum(hop.distance for hop in self.hops)
+
+    @property
+    def fatigue(self) -> float:
+        return self.hops[-1].fatigue if self.hops else 0
+
+
+class JumpShip(BaseModel):
+    name: str
+    base_range: float
+    fatigue_reduction: float = 0
+
+
+JUMP_SHIPS: dict[str | None, JumpShip] = {
+    None: JumpShip(name="Archon", base_range=3.5),
+    "super": JumpShip(name="Avatar", base_range=3.0),
+    "blops": JumpShip(name="Marshal", base_range=4.0, fatigue_reduction=0.75),
+    "jf": JumpShip(name="Rhea", base_range=5.0, fatigue_reduction=0.9),
+    "rorq": JumpShip(name="Rhea", base_range=5.0, fatigue_reduction=0.9),
+}
+
+
+def get_jump_ship(modifier: str | None) -> JumpShip:
+    return JUMP_SHIPS.get(modifier, JUMP_SHIPS[None])
+
+
+def get_jump_range(ship: JumpShip, calibration_level: int = DEFAULT_JUMP_DRIVE_CALIBRATION) -> float:
+    return ship.base_range * (1 + JUMP_DRIVE_CALIBRATION_BONUS * calibration_level)
+
+
+class JumpRangeEngine:
+    def __init__(self, index: SolarSystemIndex):
+        self.index = index
+        self.coordinates = index.coordinates / LIGHT_YEAR
+
+        kspace = (index.region_ids < WORMHOLE_REGION_ID_MIN) & (index.region_ids != POCHVEN_REGION_ID) & (index.region_ids != ZARZAKH_REGION_ID)
+        self.jumpable = kspace & (index.security < HIGHSEC_SECURITY)
+
+        self._grids: dict[float, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._grid_lock = threading.Lock()
+
+
+    def distances_from(self, position: int) -> np.ndarray:
+        return np.linalg.norm(self.coordinates - self.coordinates[position], axis=1)
+
+
+    def distance(self, from_position: int, to_position: int) -> float:
+        return float(np.linalg.norm(self.coordinates[to_position] - self.coordinates[from_position]))
+
+
+    def in_range(self, position: int, range_ly: float) -> tuple[np.ndarray, np.ndarray]:
+        keys, positions, offsets = self._grid(range_ly)
+
+        # Anything in range sits in the 3x3x3 block of range-sized cells around the origin
+        cell_key = self._cell_keys(self.coordinates[position:position + 1], range_ly)[0]
+        starts = np.searchsorted(keys, cell_key + offsets, side="left")
+        ends = np.searchsorted(keys, cell_key + offsets, side="right")
+
+        cells = [positions[start:end] for start, end in zip(starts.tolist(), ends.tolist()) if end > start]
+        if not cells:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+
+        candidates = np.concatenate(cells)
+        distances = np.sqrt(np.square(self.coordinates[candidates] - self.coordinates[position]).sum(axis=1))
+
+        mask = (distances <= range_ly) & (candidates != position)
+        candidates, distances = candidates[mask], distances[mask]
+
+        order = np.argsort(distances, kind="stable")
+
+        return candidates[order], distances[order]
+
+
+    def _cell_keys(self, coordinates: np.ndarray, cell_size: float) -> np.ndarray:
+        cells = np.floor(coordinates / cell_size).astype(np.int64) + GRID_CELL_OFFSET
+
+        return (cells[:, 0] * GRID_CELL_SPAN + cells[:, 1]) * GRID_CELL_SPAN + cells[:, 2]
+
+
+    def _grid(self, cell_size: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        grid = self._grids.get(cell_size)
+        if grid:
+            return grid
+
+        with self._grid_lock:
+            if cell_size not in self._grids:
+                positions = np.flatnonzero(self.jumpable)
+                keys = self._cell_keys(self.coordinates[positions], cell_size)
+
+                order = np.argsort(keys, kind="stable")
+
+                steps = np.array([-1, 0, 1], dtype=np.int64)
+                offsets = (steps[:, None, None] * GRID_CELL_SPAN + steps[None, :, None]) * GRID_CELL_SPAN + steps[None, None, :]
+
+                self._grids[cell_size] = (keys[order], positions[order], np.unique(offsets.ravel()))
+
+            return self._grids[cell_size]
+
+
+    def systems_in_range(self, origin: SolarSystem, range_ly: float) -> list[tuple[SolarSystem, float]]:
+        positions, distances = self.in_range(self.index.positions[origin.id], range_ly)
+
+        return [(self.index.systems[p], float(d)) for p, d in zip(positions.tolist(), distances.tolist())]
+
+
+    def plan(self, origin: SolarSystem, destination: SolarSystem, ship: JumpShip, range_ly: float, objective: JumpPlanObjective = JumpPlanObjective.JUMPS) -> JumpPlan | None:
+        from_position = self.index.positions[origin.id]
+        to_position = self.index.positions[destination.id]
+
+        if from_position == to_position:
+            return JumpPlan(origin=origin, hops=[])
+
+        # Jump drives can't be lit in highsec and nothing can land there
+        if not self.jumpable[from_position] or not self.jumpable[to_position]:
+            return None
+
+        efficiency = 1 - ship.fatigue_reduction
+
+        def cost(distances: np.ndarray) -> np.ndarray:
+            if objective == JumpPlanObjective.DISTANCE:
+                return distances
+            if objective == JumpPlanObjective.FATIGUE:
+                # Fatigue multiplies by (1 + ly) per jump, so its log adds up along the plan
+                return np.log1p(distances * efficiency)
+
+            return 1 + JUMPS_DISTANCE_WEIGHT * distances
+
+        # Straight line distance to the destination never overestimates any of the costs
+        remaining = self.distances_from(to_position)
+        if objective == JumpPlanObjective.JUMPS:
+            heuristic = np.ceil(remaining / range_ly - 1e-9) + JUMPS_DISTANCE_WEIGHT * remaining
+        elif objective == JumpPlanObjective.FATIGUE:
+            # log1p is concave, so the cheapest way to cover a distance is in as many full range jumps as possible
+            full_jumps = np.floor(remaining / range_ly)
+            heuristic = full_jumps * math.log1p(range_ly * efficiency) + np.log1p((remaining - full_jumps * range_ly) * efficiency)
+        else:
+            heuristic = cost(remaining)
+
+        best = np.full(len(self.index), np.inf)
+        previous = np.full(len(self.index), -1, dtype=np.int64)
+        closed = np.zeros(len(self.index), dtype=bool)
+
+        best[from_position] = 0
+        queue = [(float(heuristic[from_position]), from_position)]
+
+        while queue:
+            _, position = heapq.heappop(queue)
+
+            if closed[position]:
+                continue
+            if position == to_position:
+                break
+
+            closed[position] = True
+
+            neighbours, distances = self.in_range(position, range_ly)
+            costs = best[position] + cost(distances)
+
+            improved = costs < best[neighbours]
+            neighbours, costs = neighbours[improved], costs[improved]
+
+            best[neighbours] = costs
+            previous[neighbours] = position
+
+            for neighbour, f in zip(neighbours.tolist(), (costs + heuristic[neighbours]).tolist()):
+                heapq.heappush(queue, (f, neighbour))
+        else:
+            return None
+
+        path = [to_position]
+        while path[-1] != from_position:
+            path.append(int(previous[path[-1]]))
+
+        path.reverse()
+
+        hops = []
+        fatigue = 0.0
+        for from_hop, to_hop in zip(path, path[1:]):
+            distance = self.distance(from_hop, to_hop)
+            effective_distance = distance * efficiency
+
+            reactivation = min(max(1 + effective_distance, fatigue / 10), REACTIVATION_MAX)
+            fatigue = min(max(fatigue, FATIGUE_MIN) * (1 + effective_distance), FATIGUE_MAX)
+
+            hops.append(JumpHop(system=self.index.systems[to_hop], distance=distance, fatigue=fatigue, reactivation=reactivation))
+
+            # Fatigue keeps ticking down while waiting out the reactivation timer
+            fatigue -= reactivation
+
+        return JumpPlan(origin=origin, hops=hops)
+
+
+_jump_range_engine: JumpRangeEngine | None = None
+_jump_range_engine_lock = threading.Lock()
+
+
+def get_jump_range_engine() -> JumpRangeEngine:
+    global _jump_range_engine
+
+    if _jump_range_engine is None:
+        with _jump_range_engine_lock:
+            if _jump_range_engine is None:
+                _jump_range_engine = JumpRangeEngine(get_solar_system_index())
+
+    return _jump_range_engine
@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+from evex.transport import session
+from evex.utils import write_file_atomic
+
+# Signing keys are long lived, refetch at most once a day unless an unknown kid shows up
+JWKS_TTL = 24 * 60 * 60
+# Keys that disappear from the endpoint still verify tokens issued before the rollover
+JWKS_RETIRED_TTL = 60 * 60
+# Don't hammer the endpoint when handed a token with a bogus kid
+JWKS_MIN_REFETCH_INTERVAL = 60
+JWKS_TIMEOUT = 5
+
+
+class JwksCache:
+    def __init__(self, url: str, path: Path | None = None, algorithm: str = "RS256"):
+        self.url = url
+        self.path = path
+        self.algorithm = algorithm
+
+        self.keys: dict[str, dict] = {}
+        self.retired: dict[str, tuple[dict, float]] = {}
+        self.fetched_at: float = 0
+        self.last_attempt_at: float = 0
+
+        self._loaded = False
+        self._lock = threading.Lock()
+
+
+    def get_key(self, kid: str | None) -> dict | None:
+        from requests import RequestException
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+            now = time.time()
+            jwk = self._find(kid, now)
+
+            if jwk and now - self.fetched_at < JWKS_TTL:
+                return jwk
+
+            # Stale and unknown keys are refetched, but only if we haven't just tried.
+            # Until a refetch succeeds a stale key keeps verifying tokens.
+            if now - self.last_attempt_at < JWKS_MIN_REFETCH_INTERVAL:
+                return jwk
+
+            try:
+                self._fetch(now)
+            except RequestException:
+                # Endpoint is slow or down, verify against what we have
+                return jwk
+
+            return self._find(kid, now)
+
+
+    def _find(self, kid: str | None, now: float) -> dict | None:
+        if kid is None:
+            candidates = [jwk for jwk in self.keys.values() if jwk.get("alg") == self.algorithm]
+            return candidates[-1] if candidates else None
+
+        if kid in self.keys:
+            return self.keys[kid]
+
+        retired = self.retired.get(kid)
+        if retired and now - retired[1] < JWKS_RETIRED_TTL:
+            return retired[0]
+
+        return None
+
+
+    def _fetch(self, now: float):
+        self.last_attempt_at = now
+
+        response = session().get(self.url, timeout=JWKS_TIMEOUT)
+        response.raise_for_status()
+
+        keys = {jwk["kid"]: jwk for jwk in response.json()["keys"] if jwk.get("alg") == self.algorithm}
+
+        for kid, jwk in self.keys.items():
+            if kid not in keys:
+                self.retired[kid] = (jwk, now)
+
+        self.retired = {kid: retired for kid, retired in self.retired.items() if kid not in keys and now - retired[1] < JWKS_RETIRED_TTL}
+        self.keys = keys
+        self.fetched_at = now
+
+        self._save()
+
+
+    def _load(self):
+        self._loaded = True
+
+        if not self.path or not self.path.is_file():
+            return
+
+        try:
+            with open(self.path, "r") as jwks_file:
+                cached = json.load(jwks_file)
+
+            self.keys = cached["keys"]
+            self.retired = {kid: (jwk, retired_at) for kid, (jwk, retired_at) in cached.get("retired", {}).items()}
+            self.fetched_at = cached["fetched_at"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self.keys = {}
+            self.retired = {}
+            self.fetched_at = 0
+
+
+    def _save(self):
+        if not self.path:
+            return
+
+        cached = {
+            "fetched_at": self.fetched_at,
+            "keys": self.keys,
+            "retired": self.retired,
+        }
+
+        # A truncated key file would fail to load, leaving nothing to verify against offline
+        try:
+            write_file_atomic(self.path, json.dumps(cached))
+        except OSError:
+            pass
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import random
+import time
+
+from pydantic import BaseModel
+from PySide6 import QtCore
+
+from evex import esi
+from evex.esi_async import esi_get
+from evex.models import EsiCharacter
+
+logger = logging.getLogger(__name__)
+
+# ESI caches location and ship for 5 seconds and online status for 60
+ONLINE_POLL_INTERVAL = 5
+OFFLINE_POLL_INTERVAL = 60
+
+RETRY_BACKOFF_MIN = 5
+RETRY_BACKOFF_MAX = 300
+
+# Older snapshots are not trusted to stand in for a live lookup, online characters can move at any time
+ONLINE_LOCATION_MAX_AGE = 2 * ONLINE_POLL_INTERVAL
+OFFLINE_LOCATION_MAX_AGE = 2 * OFFLINE_POLL_INTERVAL
+
+
+class CharacterLocation(BaseModel):
+    character_id: int
+    solar_system_id: int | None = None
+    station_id: int | None = None
+    structure_id: int | None = None
+    ship_type_id: int | None = None
+    ship_name: str | None = None
+    online: bool = False
+    updated_at: float = 0
+
+    def is_fresh(self) -> bool:
+        max_age = ONLINE_LOCATION_MAX_AGE if self.online else OFFLINE_LOCATION_MAX_AGE
+
+        return time.time() - self.updated_at < max_age
+
+
+class LocationTracker(QtCore.QObject):
+    # character id, solar system id
+    system_changed = QtCore.Signal(int, int)
+
+
+    def __init__(self):
+        super().__init__()
+
+        self.locations: dict[int, CharacterLocation] = {}
+
+        self._tasks: dict[int, asyncio.Task] = {}
+
+
+    def get(self, character_id: int) -> CharacterLocation | None:
+        location = self.locations.get(character_id)
+
+        return location if location and location.is_fresh() else None
+
+
+    def start(self, characters: list[EsiCharacter]):
+        for character in characters:
+            self.track(character)
+
+
+    def track(self, character: EsiCharacter):
+        self.untrack(character.id)
+        self._tasks[character.id] = asyncio.ensure_future(self._run(character))
+
+
+    def untrack(self, character_id: int):
+        task = self._tasks.pop(character_id, None)
+
+        if task:
+            task.cancel()
+
+
+    def stop(self):
+        for character_id in list(self._tasks):
+            self.untrack(character_id)
+
+
+    async def poll(self, character: EsiCharacter) -> CharacterLocation:
+        previous = self.locations.get(character.id)
+
+        online = await esi_get(f"/characters/{character.id}/online/", character)
+
+        location = CharacterLocation(character_id=character.id, online=online["online"], updated_at=time.time())
+
+        # Offline characters don't move, one lookup is enough to know where they logged off
+        if location.online or not previous or previous.solar_system_id is None:
+            system, ship = await asyncio.gather(
+                esi_get(f"/characters/{character.id}/location/", character),
+                esi_get(f"/characters/{character.id}/ship/", character),
+            )
+
+            location.solar_system_id = system["solar_system_id"]
+            location.station_id = system.get("station_id")
+            location.structure_id = system.get("structure_id")
+            location.ship_type_id = ship["ship_type_id"]
+            location.ship_name = ship.get("ship_name")
+        else:
+            location = previous.model_copy(update={"online": False, "updated_at": location.updated_at})
+
+        self.locations[character.id] = location
+
+        if location.solar_system_id is not None and (not previous or previous.solar_system_id != location.solar_system_id):
+            self.system_changed.emit(character.id, location.solar_system_id)
+
+        return location
+
+
+    def next_poll_delay(self, character: EsiCharacter, location: CharacterLocation) -> float:
+        path = f"/characters/{character.id}/location/" if location.online else f"/characters/{character.id}/online/"
+        interval = ONLINE_POLL_INTERVAL if location.online else OFFLINE_POLL_INTERVAL
+
+        # Never ask again before ESI has something new to say
+        entry = esi.esi_cache.get(esi.esi_cache_key(path, character))
+        expires_in = entry.expires_at - time.time() if entry else 0
+
+        return max(interval, expires_in)
+
+
+    async def _run(self, character: EsiCharacter):
+        backoff = RETRY_BACKOFF_MIN
+
+        while True:
+            try:
+                location = await self.poll(character)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("location poll for %s failed, retrying in %ss", character.name, backoff)
+
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, RETRY_BACKOFF_MAX)
+            else:
+                backoff = RETRY_BACKOFF_MIN
+
+                await asyncio.sleep(self.next_poll_delay(character, location))
+
+
+_location_tracker: LocationTracker | None = None
+
+
+def get_location_tracker() -> LocationTracker:
+    global _location_tracker
+
+    # Only ever touched from the event loop thread
+    if _location_tracker is None:
+        _location_tracker = LocationTracker()
+
+    return _location_tracker
@@ -0,0 +1,43 @@
+import asyncio
+import logging
+
+from evex.esi_async import esi_get, get_character_location, refresh_if_expiring
+from evex.location_tracker import get_location_tracker
+from evex.models import EsiCharacter
+from evex.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Tokens this close to expiry are refreshed while the user is still typing
+PREFETCH_REFRESH_MARGIN = 60
+
+# Cheapest ESI route there is, fetching it opens a pooled connection to ESI
+WARM_UP_PATH = "/status/"
+
+
+async def warm_pool():
+    await esi_get(WARM_UP_PATH)
+
+
+async def prefetch_character(character: EsiCharacter):
+    # SSO rotates the refresh token, so a refresh already sent has to land even if the omnibox is dismissed
+    character = await asyncio.shield(refresh_if_expiring(character, PREFETCH_REFRESH_MARGIN))
+
+    # The result goes into the ESI cache, where "current" picks it up
+    if not get_location_tracker().get(character.id):
+        await get_character_location(character)
+
+
+async def prefetch(character: EsiCharacter | None):
+    with span("prefetch"):
+        steps = [warm_pool()]
+        if character:
+            steps.append(prefetch_character(character))
+
+        results = await asyncio.gather(*steps, return_exceptions=True)
+
+    for result in results:
+        if isinstance(result, asyncio.CancelledError):
+            raise result
+        if isinstance(result, Exception):
+            logger.debug("prefetch failed: %s", result)
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+
+import numpy as np
+
+from evex.esi_async import esi_get
+from evex.utils import get_config_path
+
+logger = logging.getLogger(__name__)
+
+MARKET_PRICES_PATH = "/markets/prices/"
+
+# ESI caches market prices for an hour
+PRICE_REFRESH_INTERVAL = 3600
+PRICE_RETRY_INTERVAL = 60
+
+
+class PriceTable:
+    def __init__(self, type_ids: np.ndarray, average_prices: np.ndarray, adjusted_prices: np.ndarray, fetched_at: float):
+        # Column arrays sorted by type id, so a whole paste is priced with one searchsorted
+        self.type_ids = type_ids
+        self.average_prices = average_prices
+        self.adjusted_prices = adjusted_prices
+        self.fetched_at = fetched_at
+
+
+    def __len__(self) -> int:
+        return len(self.type_ids)
+
+
+    def prices(self, type_ids: np.ndarray) -> np.ndarray:
+        if not len(self.type_ids):
+            return np.full(len(type_ids), np.nan)
+
+        positions = np.searchsorted(self.type_ids, type_ids).clip(0, len(self.type_ids) - 1)
+        known = self.type_ids[positions] == type_ids
+
+        # Thinly traded items only have an adjusted price
+        average = self.average_prices[positions]
+        prices = np.where(np.isnan(average), self.adjusted_prices[positions], average)
+
+        return np.where(known, prices, np.nan)
+
+
+    @classmethod
+    def from_esi(cls, data: list[dict], fetched_at: float | None = None) -> "PriceTable":
+        data = sorted(data, key=lambda row: row["type_id"])
+
+        return cls(
+            np.array([row["type_id"] for row in data], dtype=np.int64),
+            np.array([row.get("average_price", np.nan) for row in data], dtype=np.float64),
+            np.array([row.get("adjusted_price", np.nan) for row in data], dtype=np.float64),
+            fetched_at if fetched_at is not None else time.time(),
+        )
+
+
+def save_price_table(data: list[dict], fetched_at: float):
+    try:
+        with open(get_config_path("prices.json"), "w") as prices_file:
+            json.dump({"fetched_at": fetched_at, "prices": data}, prices_file)
+    except OSError:
+        logger.warning("could not write the price cache", exc_info=True)
+
+
+def load_price_table() -> PriceTable | None:
+    try:
+        with open(get_config_path("prices.json"), "r") as prices_file:
+            cached = json.load(prices_file)
+
+        return PriceTable.from_esi(cached["prices"], cached["fetched_at"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+_price_table: PriceTable | None = None
+_price_table_loaded = False
+_price_table_lock = threading.Lock()
+
+
+def get_price_table() -> PriceTable | None:
+    global _price_table, _price_table_loaded
+
+    # Last run's prices are good enough until the background refresh lands
+    if not _price_table_loaded:
+        with _price_table_lock:
+            if not _price_table_loaded:
+                _price_table = load_price_table()
+                _price_table_loaded = True
+
+    return _price_table
+
+
+async def refresh_price_table() -> PriceTable:
+    global _price_table, _price_table_loaded
+
+    data = await esi_get(MARKET_PRICES_PATH)
+
+    loop = asyncio.get_running_loop()
+    fetched_at = time.time()
+    price_table = await loop.run_in_executor(None, PriceTable.from_esi, data, fetched_at)
+
+    with _price_table_lock:
+        _price_table = price_table
+        _price_table_loaded = True
+
+    await loop.run_in_executor(None, save_price_table, data, fetched_at)
+
+    return price_table
+
+
+class PriceRefresher:
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+
+    def start(self):
+        self.stop()
+        self._task = asyncio.ensure_future(self._run())
+
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+    async def _run(self):
+        while True:
+            price_table = get_price_table()
+            age = time.time() - price_table.fetched_at if price_table else PRICE_REFRESH_INTERVAL
+
+            if age < PRICE_REFRESH_INTERVAL:
+                await asyncio.sleep(PRICE_REFRESH_INTERVAL - age)
+
+            try:
+                await refresh_price_table()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("market price refresh failed, retrying in %ss", PRICE_RETRY_INTERVAL)
+
+                await asyncio.sleep(PRICE_RETRY_INTERVAL)
@@ -0,0 +1,49 @@
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class StartupProfile:
+    def __init__(self, started_at: float | None = None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.phases: list[tuple[str, float, float]] = []
+
+
+    def record(self, name: str, start: float, end: float):
+        self.phases.append((name, start - self.started_at, end - start))
+
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+
+    def total(self) -> float:
+        return max((offset + duration for _, offset, duration in self.phases), default=0)
+
+
+    def report(self) -> str:
+        lines = [f"{'phase':<28}{'start':>10}{'duration':>10}"]
+
+        for name, offset, duration in self.phases:
+            lines.append(f"{name:<28}{offset * 1000:>8.1f}ms{duration * 1000:>8.1f}ms")
+
+        lines.append(f"{'total':<28}{'':>10}{self.total() * 1000:>8.1f}ms")
+
+        return "\n".join(lines)
+
+
+    def save(self, path: Path):
+        profile = {
+            "total": self.total(),
+            "phases": [{"name": name, "start": offset, "duration": duration} for name, offset, duration in self.phases],
+        }
+
+        with open(path, "w") as profile_file:
+            json.dump(profile, profile_file, indent=2)
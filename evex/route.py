@@ -0,0 +1,166 @@
+import heapq
+import threading
+from enum import Enum
+
+import numpy as np
+
+from evex.sde import HIGHSEC_SECURITY, SolarSystemIndex, get_solar_system_index, load_solar_system_jumps
+
+# Cost of a jump into a system of the less wanted security band, like the in-game autopilot
+SECURITY_PENALTY = 50
+
+
+class RoutePreference(str, Enum):
+    SHORTEST = "shortest"
+    SAFER = "safer"
+    LESS_SECURE = "less secure"
+
+
+class RouteGraph:
+    def __init__(self, index: SolarSystemIndex, indptr: np.ndarray, indices: np.ndarray):
+        self.index = index
+
+        # CSR adjacency: neighbours of row i are indices[indptr[i]:indptr[i + 1]]
+        self.indptr = indptr
+        self.indices = indices
+
+        # Walking plain lists from python is much faster than indexing numpy scalars
+        self._indptr: list[int] = indptr.tolist()
+        self._indices: list[int] = indices.tolist()
+        self._highsec: list[bool] = (index.security >= HIGHSEC_SECURITY).tolist()
+
+
+    def neighbours(self, position: int) -> list[int]:
+        return self._indices[self._indptr[position]:self._indptr[position + 1]]
+
+
+    def route(self, from_position: int, to_position: int, preference: RoutePreference = RoutePreference.SHORTEST, avoid: set[int] = frozenset()) -> list[int] | None:
+        if from_position == to_position:
+            return [from_position]
+
+        # The ends of the route are always allowed, even when listed to avoid
+        avoid = set(avoid) - {from_position, to_position}
+
+        if preference == RoutePreference.SHORTEST:
+            return self._bfs(from_position, to_position, avoid)
+
+        return self._dijkstra(from_position, to_position, preference, avoid)
+
+
+    def _bfs(self, from_position: int, to_position: int, avoid: set[int]) -> list[int] | None:
+        indptr, indices = self._indptr, self._indices
+
+        # Grow from both ends, always expanding the smaller frontier
+        parents = ({from_position: -1}, {to_position: -1})
+        frontiers = ([from_position], [to_position])
+
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            seen, other = parents[side], parents[1 - side]
+
+            next_frontier = []
+            for position in frontiers[side]:
+                for neighbour in indices[indptr[position]:indptr[position + 1]]:
+                    if neighbour in seen or neighbour in avoid:
+                        continue
+
+                    seen[neighbour] = position
+
+                    if neighbour in other:
+                        return self._join(parents[0], parents[1], neighbour)
+
+                    next_frontier.append(neighbour)
+
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+
+        return None
+
+
+    def _join(self, forward: dict[int, int], backward: dict[int, int], meeting: int) -> list[int]:
+        path = []
+
+        position = meeting
+        while position != -1:
+            path.append(position)
+            position = forward[position]
+
+        path.reverse()
+
+        position = backward[meeting]
+        while position != -1:
+            path.append(position)
+            position = backward[position]
+
+        return path
+
+
+    def _dijkstra(self, from_position: int, to_position: int, preference: RoutePreference, avoid: set[int]) -> list[int] | None:
+        indptr, indices, highsec = self._indptr, self._indices, self._highsec
+        penalise_highsec = preference == RoutePreference.LESS_SECURE
+
+        unreached = len(indptr) * SECURITY_PENALTY
+        costs = [unreached] * (len(indptr) - 1)
+        previous = [-1] * (len(indptr) - 1)
+
+        costs[from_position] = 0
+        queue = [(0, from_position)]
+
+        while queue:
+            cost, position = heapq.heappop(queue)
+
+            if position == to_position:
+                path = []
+                while position != -1:
+                    path.append(position)
+                    position = previous[position]
+
+                path.reverse()
+                return path
+
+            if cost > costs[position]:
+                continue
+
+            for neighbour in indices[indptr[position]:indptr[position + 1]]:
+                next_cost = cost + (SECURITY_PENALTY if highsec[neighbour] == penalise_highsec else 1)
+
+                if next_cost < costs[neighbour] and neighbour not in avoid:
+                    costs[neighbour] = next_cost
+                    previous[neighbour] = position
+                    heapq.heappush(queue, (next_cost, neighbour))
+
+        return None
+
+
+def load_route_graph(index: SolarSystemIndex) -> RouteGraph:
+    return build_route_graph(index, load_solar_system_jumps())
+
+
+def build_route_graph(index: SolarSystemIndex, jumps: np.ndarray) -> RouteGraph:
+    known = np.isin(jumps, index.ids).all(axis=1)
+    jumps = jumps[known]
+
+    # index.ids is sorted, so ids map straight to row positions
+    from_positions = np.searchsorted(index.ids, jumps[:, 0])
+    to_positions = np.searchsorted(index.ids, jumps[:, 1])
+
+    order = np.lexsort((to_positions, from_positions))
+    indices = to_positions[order].astype(np.int32)
+    indptr = np.zeros(len(index) + 1, dtype=np.int32)
+    np.cumsum(np.bincount(from_positions, minlength=len(index)), out=indptr[1:])
+
+    return RouteGraph(index, indptr, indices)
+
+
+_route_graph: RouteGraph | None = None
+_route_graph_lock = threading.Lock()
+
+
+def get_route_graph() -> RouteGraph:
+    global _route_graph
+
+    if _route_graph is None:
+        with _route_graph_lock:
+            if _route_graph is None:
+                _route_graph = load_route_graph(get_solar_system_index())
+
+    return _route_graph
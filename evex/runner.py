@@ -0,0 +1,134 @@
+import asyncio
+import inspect
+
+from PySide6 import QtCore
+
+from evex.models import EsiCharacter
+from evex.tracing import span
+
+COMMAND_TIMEOUT = 30
+
+# Characters a fanned out command talks to ESI for at the same time
+FAN_OUT_CONCURRENCY = 8
+
+
+class CommandRunner(QtCore.QObject):
+    finished = QtCore.Signal(str, str)
+    failed = QtCore.Signal(str, str)
+
+
+    def __init__(self, timeout: float = COMMAND_TIMEOUT, concurrency: int = FAN_OUT_CONCURRENCY):
+        super().__init__()
+
+        self.timeout = timeout
+        self.concurrency = concurrency
+
+        self._tasks: set[asyncio.Task] = set()
+        self._tails: dict[int | None, asyncio.Task] = {}
+
+
+    def submit(self, character: EsiCharacter | None, command, modifier: str | None, args: list[str]) -> asyncio.Task:
+        key = character.id if character else None
+
+        # Commands for the same character run in the order they were entered
+        previous = self._tails.get(key)
+        task = asyncio.ensure_future(self._run(previous, character, command, modifier, args))
+
+        self._tasks.add(task)
+        self._tails[key] = task
+        task.add_done_callback(lambda t: self._task_done([key], t))
+
+        return task
+
+
+    def submit_many(self, characters: list[EsiCharacter], command, modifier: str | None, args: list[str]) -> asyncio.Task:
+        keys = [character.id for character in characters]
+
+        # Runs after anything already queued for any of the characters, and ahead of what comes next
+        previous = [self._tails[key] for key in keys if key in self._tails]
+        task = asyncio.ensure_future(self._run_many(previous, characters, command, modifier, args))
+
+        self._tasks.add(task)
+        for key in keys:
+            self._tails[key] = task
+        task.add_done_callback(lambda t: self._task_done(keys, t))
+
+        return task
+
+
+    def cancel(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+
+    def _task_done(self, keys: list[int | None], task: asyncio.Task):
+        self._tasks.discard(task)
+
+        for key in keys:
+            if self._tails.get(key) is task:
+                del self._tails[key]
+
+
+    async def _run(self, previous: asyncio.Task | None, character: EsiCharacter | None, command, modifier: str | None, args: list[str]):
+        if previous:
+            await asyncio.wait([previous])
+
+        name = command.predicates[0].text
+
+        try:
+            with span("command", command=name):
+                result = await asyncio.wait_for(self._call(command.action, character, modifier, args), self.timeout)
+        except asyncio.TimeoutError:
+            self.failed.emit(name, f"timed out after {self.timeout:g}s")
+        except Exception as e:
+            self.failed.emit(name, str(e) or e.__class__.__name__)
+        else:
+            if result:
+                self.finished.emit(name, result)
+
+
+    async def _run_many(self, previous: list[asyncio.Task], characters: list[EsiCharacter], command, modifier: str | None, args: list[str]):
+        if previous:
+            await asyncio.wait(previous)
+
+        name = command.predicates[0].text
+
+        if not characters:
+            self.failed.emit(name, "no characters selected")
+            return
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(character: EsiCharacter):
+            async with semaphore:
+                return await asyncio.wait_for(self._call(command.action, character, modifier, args), self.timeout)
+
+        # Token refreshes and ESI calls for every character overlap, one slow alt doesn't hold up the rest
+        with span("command", command=name, characters=len(characters)):
+            results = await asyncio.gather(*(run(character) for character in characters), return_exceptions=True)
+
+        failures = []
+        for character, result in zip(characters, results):
+            if isinstance(result, asyncio.TimeoutError):
+                failures.append(f"{character.name}: timed out after {self.timeout:g}s")
+            elif isinstance(result, asyncio.CancelledError):
+                raise result
+            elif isinstance(result, BaseException):
+                failures.append(f"{character.name}: {str(result) or result.__class__.__name__}")
+
+        done = len(characters) - len(failures)
+        summary = f"{done}/{len(characters)} characters done"
+
+        if failures:
+            self.failed.emit(name, f"{summary}, " + ", ".join(failures))
+        else:
+            self.finished.emit(name, f"{summary}: " + ", ".join(character.name for character in characters))
+
+
+    async def _call(self, action, character: EsiCharacter | None, modifier: str | None, args: list[str]):
+        result = action(character, modifier, args)
+
+        if inspect.isawaitable(result):
+            result = await result
+
+        return result
@@ -1,34 +1,349 @@
+import json
+import os
 import sqlite3
+import threading
+
+import numpy as np
+from pydantic import BaseModel
+
+from evex.sde_compact import COMPACT_SDE_DIR, MANIFEST_FILE, CompactSde, is_compact_sde
+from evex.utils import get_config_path, get_resource
+
+# Security status rounds to 0.5 and up from here
+HIGHSEC_SECURITY = 0.45
+
+# Points the app at another SDE, like the generated one the benchmarks run against.
+# Either a sqlite file or a compact SDE directory.
+SDE_PATH_ENV = "EVEX_SDE_PATH"
+
+
+def get_sde_path() -> str:
+    path = os.environ.get(SDE_PATH_ENV)
+    if path:
+        return path
+
+    compact_path = get_resource(COMPACT_SDE_DIR)
+
+    return compact_path if is_compact_sde(compact_path) else get_resource("sde.sqlite")
+
+
+def get_compact_sde() -> CompactSde | None:
+    path = get_sde_path()
+
+    return CompactSde(path) if is_compact_sde(path) else None
 
-from evex.utils import get_resource
 
 def db():
-    return sqlite3.connect(get_resource("sde.sqlite"))
+    return sqlite3.connect(get_sde_path())
 
 
-def get_solar_system_names() -> list[str]:
+class SolarSystem(BaseModel):
+    id: int
+    name: str
+    region_id: int
+    region_name: str | None
+    constellation_id: int
+    constellation_name: str | None
+    security: float
+
+
+class SolarSystemIndex:
+    def __init__(self, ids: np.ndarray, names: list[str], region_ids: np.ndarray, constellation_ids: np.ndarray, security: np.ndarray, coordinates: np.ndarray | None = None, region_names: dict[int, str] | None = None, constellation_names: dict[int, str] | None = None):
+        # Column arrays share row positions, ordered by system id. They may be memory-mapped,
+        # SolarSystem models are only built for the rows that get looked up.
+        self.ids = ids
+        self.names = names
+        self.region_ids = region_ids
+        self.constellation_ids = constellation_ids
+        self.security = security
+        self.coordinates = coordinates if coordinates is not None else np.zeros((len(names), 3), dtype=np.float64)
+
+        self.region_names = region_names or {}
+        self.constellation_names = constellation_names or {}
+
+        self.positions: dict[int, int] = dict(zip(ids.tolist(), range(len(names))))
+        self.name_positions: dict[str, int] = {name.lower(): position for position, name in enumerate(names)}
+
+        self.systems = SolarSystemRows(self)
+
+
+    @classmethod
+    def from_systems(cls, systems: list[SolarSystem], coordinates: np.ndarray | None = None) -> "SolarSystemIndex":
+        index = cls(
+            np.array([s.id for s in systems], dtype=np.int64),
+            [s.name for s in systems],
+            np.array([s.region_id for s in systems], dtype=np.int64),
+            np.array([s.constellation_id for s in systems], dtype=np.int64),
+            np.array([s.security for s in systems], dtype=np.float64),
+            coordinates,
+            {s.region_id: s.region_name for s in systems if s.region_name is not None},
+            {s.constellation_id: s.constellation_name for s in systems if s.constellation_name is not None},
+        )
+        index.systems.rows = list(systems)
+
+        return index
+
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+    def get(self, key: int | str) -> SolarSystem | None:
+        position = self.positions.get(key) if isinstance(key, int) else self.name_positions.get(key.strip().lower())
+
+        return self.systems[position] if position is not None else None
+
+
+class SolarSystemRows:
+    def __init__(self, index: SolarSystemIndex):
+        self.index = index
+        # Filled in as rows are used, two threads building the same row get equal models
+        self.rows: list[SolarSystem | None] = [None] * len(index.names)
+
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+    def __getitem__(self, position: int) -> SolarSystem:
+        system = self.rows[position]
+        if system is None:
+            index = self.index
+            region_id = int(index.region_ids[position])
+            constellation_id = int(index.constellation_ids[position])
+
+            system = SolarSystem(
+                id=int(index.ids[position]),
+                name=index.names[position],
+                region_id=region_id,
+                region_name=index.region_names.get(region_id),
+                constellation_id=constellation_id,
+                constellation_name=index.constellation_names.get(constellation_id),
+                security=float(index.security[position]),
+            )
+            self.rows[position] = system
+
+        return system
+
+
+    def __iter__(self):
+        return (self[position] for position in range(len(self.rows)))
+
+
+def load_compact_solar_system_index(sde: CompactSde) -> SolarSystemIndex:
+    return SolarSystemIndex(
+        sde.column("systems", "id"),
+        sde.strings("systems", "name").tolist(),
+        sde.column("systems", "region_id"),
+        sde.column("systems", "constellation_id"),
+        sde.column("systems", "security"),
+        sde.column("systems", "coordinates"),
+        dict(zip(sde.column("regions", "id").tolist(), sde.strings("regions", "name").tolist())),
+        dict(zip(sde.column("constellations", "id").tolist(), sde.strings("constellations", "name").tolist())),
+    )
+
+
+def load_solar_system_index() -> SolarSystemIndex:
+    sde = get_compact_sde()
+    if sde:
+        return load_compact_solar_system_index(sde)
+
     with db() as con:
         cur = con.cursor()
-        res = cur.execute(f"SELECT solarSystemName FROM mapSolarSystems")
 
-        system_names = list(map(lambda a: a[0],res.fetchall()))
-        system_names.append("current")
+        rows = cur.execute(
+            "SELECT solarSystemID, solarSystemName, regionID, constellationID, security, x, y, z FROM mapSolarSystems ORDER BY solarSystemID"
+        ).fetchall()
+        region_names = dict(cur.execute("SELECT regionID, regionName FROM mapRegions").fetchall())
+        constellation_names = dict(cur.execute("SELECT constellationID, constellationName FROM mapConstellations").fetchall())
+
+    return SolarSystemIndex(
+        np.array([row[0] for row in rows], dtype=np.int64),
+        [row[1] for row in rows],
+        np.array([row[2] for row in rows], dtype=np.int64),
+        np.array([row[3] for row in rows], dtype=np.int64),
+        np.array([row[4] for row in rows], dtype=np.float64),
+        np.array([row[5:8] for row in rows], dtype=np.float64).reshape(-1, 3),
+        region_names,
+        constellation_names,
+    )
+
+
+_solar_system_index: SolarSystemIndex | None = None
+_solar_system_index_lock = threading.Lock()
+
+
+def is_solar_system_index_loaded() -> bool:
+    return _solar_system_index is not None
+
+
+def get_solar_system_index() -> SolarSystemIndex:
+    global _solar_system_index
+
+    if _solar_system_index is None:
+        with _solar_system_index_lock:
+            if _solar_system_index is None:
+                _solar_system_index = load_solar_system_index()
 
-        return system_names
+    return _solar_system_index
+
+
+def get_solar_system(key: int | str) -> SolarSystem | None:
+    return get_solar_system_index().get(key)
+
+
+def get_solar_system_names() -> list[str]:
+    system_names = list(get_solar_system_index().names)
+    system_names.append("current")
+
+    return system_names
+
+
+def get_sde_fingerprint() -> str | None:
+    path = get_sde_path()
+
+    try:
+        # Every compact build rewrites the manifest, the directory itself may not change
+        stat = os.stat(os.path.join(path, MANIFEST_FILE) if os.path.isdir(path) else path)
+    except OSError:
+        return None
+
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def load_cached_solar_system_names() -> list[str] | None:
+    # Completion data from the last run, valid for as long as the SDE file is unchanged
+    try:
+        with open(get_config_path("system_names.json"), "r") as cache_file:
+            cached = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(cached, dict) or cached.get("sde") != get_sde_fingerprint():
+        return None
+
+    return cached.get("names")
+
+
+def save_cached_solar_system_names(names: list[str]):
+    try:
+        with open(get_config_path("system_names.json"), "w") as cache_file:
+            json.dump({"sde": get_sde_fingerprint(), "names": names}, cache_file)
+    except OSError:
+        pass
 
 
 def get_solar_system_name(solar_system_id: int) -> str:
+    index = get_solar_system_index()
+    position = index.positions.get(int(solar_system_id))
+
+    return index.names[position] if position is not None else None
+
+def get_solar_system_id(name: str) -> int:
+    index = get_solar_system_index()
+    position = index.name_positions.get(name.strip().lower())
+
+    return int(index.ids[position]) if position is not None else None
+
+
+def load_solar_system_jumps() -> np.ndarray:
+    sde = get_compact_sde()
+    if sde:
+        return sde.column("jumps", "edges")
+
     with db() as con:
         cur = con.cursor()
-        res = cur.execute(f"SELECT solarSystemName FROM mapSolarSystems WHERE solarSystemID = ?", [solar_system_id])
-        name = res.fetchone()
-    
-        return name[0] if name else None
+        res = cur.execute("SELECT fromSolarSystemID, toSolarSystemID FROM mapSolarSystemJumps")
+
+        return np.array(res.fetchall(), dtype=np.int64).reshape(-1, 2)
+
+
+class TypeIndex:
+    def __init__(self, ids: np.ndarray, names: list[str], group_ids: np.ndarray, category_ids: np.ndarray, volumes: np.ndarray, group_names: dict[int, str] | None = None, category_names: dict[int, str] | None = None):
+        # Column arrays share row positions, ordered by type id
+        self.ids = ids
+        self.names = names
+        self.group_ids = group_ids
+        self.category_ids = category_ids
+        self.volumes = volumes
+
+        self.group_names = group_names or {}
+        self.category_names = category_names or {}
+
+        self.by_name: dict[str, int] = {}
+        for position, name in enumerate(names):
+            self.by_name.setdefault(name.lower(), position)
+
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+    def find(self, name: str) -> int | None:
+        return self.by_name.get(name.strip().lower())
+
+
+    def positions(self, type_ids: np.ndarray) -> np.ndarray:
+        # Row positions for a batch of type ids, -1 for ids the SDE doesn't know
+        if not len(self.ids):
+            return np.full(len(type_ids), -1, dtype=np.int64)
+
+        positions = np.searchsorted(self.ids, type_ids).clip(0, len(self.ids) - 1)
+
+        return np.where(self.ids[positions] == type_ids, positions, -1)
+
+
+def load_type_index() -> TypeIndex:
+    sde = get_compact_sde()
+    if sde:
+        return TypeIndex(
+            sde.column("types", "id"),
+            sde.strings("types", "name").tolist(),
+            sde.column("types", "group_id"),
+            sde.column("types", "category_id"),
+            sde.column("types", "volume"),
+            dict(zip(sde.column("groups", "id").tolist(), sde.strings("groups", "name").tolist())),
+            dict(zip(sde.column("categories", "id").tolist(), sde.strings("categories", "name").tolist())),
+        )
 
-def get_solar_system_id(name: str) -> int:
     with db() as con:
         cur = con.cursor()
-        res = cur.execute(f"SELECT solarSystemID FROM mapSolarSystems WHERE lower(solarSystemName) = ?", [name.lower()])
-        sid = res.fetchone()
-    
-        return sid[0] if sid else None
+        res = cur.execute(
+            """
+            SELECT t.typeID, t.typeName, t.groupID, g.categoryID, t.volume
+            FROM invTypes t
+            LEFT JOIN invGroups g ON g.groupID = t.groupID
+            WHERE t.typeName IS NOT NULL
+            ORDER BY t.typeID
+            """
+        )
+
+        rows = res.fetchall()
+
+        group_names = dict(cur.execute("SELECT groupID, groupName FROM invGroups").fetchall())
+        category_names = dict(cur.execute("SELECT categoryID, categoryName FROM invCategories").fetchall())
+
+    return TypeIndex(
+        np.array([row[0] for row in rows], dtype=np.int64),
+        [row[1] for row in rows],
+        np.array([row[2] or 0 for row in rows], dtype=np.int64),
+        np.array([row[3] or 0 for row in rows], dtype=np.int64),
+        np.array([row[4] or 0 for row in rows], dtype=np.float64),
+        group_names,
+        category_names,
+    )
+
+
+_type_index: TypeIndex | None = None
+_type_index_lock = threading.Lock()
+
+
+def get_type_index() -> TypeIndex:
+    global _type_index
+
+    if _type_index is None:
+        with _type_index_lock:
+            if _type_index is None:
+                _type_index = load_type_index()
+
+    return _type_index
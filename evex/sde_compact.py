@@ -0,0 +1,177 @@
+import json
+import os
+import sqlite3
+
+import numpy as np
+
+# Bumped whenever the layout changes, older directories are ignored in favour of sqlite
+COMPACT_SDE_VERSION = 1
+
+COMPACT_SDE_DIR = "sde"
+MANIFEST_FILE = "manifest.json"
+
+
+def is_compact_sde(path: str) -> bool:
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), "r") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return False
+
+    # Builds in progress record each finished table, the directory is only usable once all are in
+    return isinstance(manifest, dict) and manifest.get("version") == COMPACT_SDE_VERSION and manifest.get("complete", True)
+
+
+class StringTable:
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        # Packed UTF-8, entry i is data[offsets[i]:offsets[i + 1]]
+        self.data = data
+        self.offsets = offsets
+
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode()
+
+
+    def tolist(self) -> list[str]:
+        data = bytes(self.data)
+        offsets = self.offsets.tolist()
+
+        return [data[start:end].decode() for start, end in zip(offsets, offsets[1:])]
+
+
+class CompactSde:
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(os.path.join(path, MANIFEST_FILE), "r") as manifest_file:
+            self.manifest = json.load(manifest_file)
+
+
+    def rows(self, table: str) -> int:
+        return self.manifest["tables"][table]["rows"]
+
+
+    def column(self, table: str, name: str) -> np.ndarray:
+        # Memory-mapped, pages are only read when touched and are shared with other processes
+        return np.load(os.path.join(self.path, f"{table}.{name}.npy"), mmap_mode="r")
+
+
+    def strings(self, table: str, name: str) -> StringTable:
+        offsets = self.column(table, f"{name}.offsets")
+
+        data_path = os.path.join(self.path, f"{table}.{name}.strings")
+        data = np.memmap(data_path, dtype=np.uint8, mode="r") if os.path.getsize(data_path) else np.zeros(0, dtype=np.uint8)
+
+        return StringTable(data, offsets)
+
+
+def replace_file(path: str, write):
+    with open(f"{path}.tmp", "wb") as tmp_file:
+        write(tmp_file)
+
+    os.replace(f"{path}.tmp", path)
+
+
+def write_table(path: str, table: str, columns: dict[str, np.ndarray | list[str]]) -> dict:
+    rows = None
+
+    for name, values in columns.items():
+        if rows is None:
+            rows = len(values)
+        elif len(values) != rows:
+            raise ValueError(f"{table}.{name} has {len(values)} rows, expected {rows}")
+
+        if isinstance(values, np.ndarray):
+            replace_file(os.path.join(path, f"{table}.{name}.npy"), lambda f, values=values: np.save(f, np.ascontiguousarray(values)))
+            continue
+
+        encoded = [value.encode() for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+
+        replace_file(os.path.join(path, f"{table}.{name}.strings"), lambda f, encoded=encoded: f.write(b"".join(encoded)))
+        replace_file(os.path.join(path, f"{table}.{name}.offsets.npy"), lambda f, offsets=offsets: np.save(f, offsets))
+
+    return {"rows": rows or 0, "columns": list(columns)}
+
+
+def write_manifest(path: str, tables: dict[str, dict], **extra):
+    # Written after the columns it lists, so a half-built directory never looks complete
+    manifest = {"version": COMPACT_SDE_VERSION, "complete": True, "tables": tables, **extra}
+
+    replace_file(os.path.join(path, MANIFEST_FILE), lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+
+
+def read_sqlite_tables(sqlite_path: str) -> dict[str, dict[str, np.ndarray | list[str]]]:
+    with sqlite3.connect(sqlite_path) as con:
+        cur = con.cursor()
+
+        regions = cur.execute("SELECT regionID, regionName FROM mapRegions ORDER BY regionID").fetchall()
+        constellations = cur.execute("SELECT constellationID, constellationName FROM mapConstellations ORDER BY constellationID").fetchall()
+        systems = cur.execute(
+            "SELECT solarSystemID, solarSystemName, regionID, constellationID, security, x, y, z FROM mapSolarSystems ORDER BY solarSystemID"
+        ).fetchall()
+        jumps = cur.execute("SELECT fromSolarSystemID, toSolarSystemID FROM mapSolarSystemJumps").fetchall()
+
+        types = cur.execute(
+            """
+            SELECT t.typeID, t.typeName, t.groupID, g.categoryID, t.volume
+            FROM invTypes t
+            LEFT JOIN invGroups g ON g.groupID = t.groupID
+            WHERE t.typeName IS NOT NULL
+            ORDER BY t.typeID
+            """
+        ).fetchall()
+        groups = cur.execute("SELECT groupID, groupName FROM invGroups ORDER BY groupID").fetchall()
+        categories = cur.execute("SELECT categoryID, categoryName FROM invCategories ORDER BY categoryID").fetchall()
+
+    return {
+        "regions": {
+            "id": np.array([row[0] for row in regions], dtype=np.int64),
+            "name": [row[1] or "" for row in regions],
+        },
+        "constellations": {
+            "id": np.array([row[0] for row in constellations], dtype=np.int64),
+            "name": [row[1] or "" for row in constellations],
+        },
+        "systems": {
+            "id": np.array([row[0] for row in systems], dtype=np.int64),
+            "name": [row[1] for row in systems],
+            "region_id": np.array([row[2] for row in systems], dtype=np.int64),
+            "constellation_id": np.array([row[3] for row in systems], dtype=np.int64),
+            "security": np.array([row[4] for row in systems], dtype=np.float64),
+            "coordinates": np.array([row[5:8] for row in systems], dtype=np.float64).reshape(-1, 3),
+        },
+        "jumps": {
+            "edges": np.array(jumps, dtype=np.int64).reshape(-1, 2),
+        },
+        "types": {
+            "id": np.array([row[0] for row in types], dtype=np.int64),
+            "name": [row[1] for row in types],
+            "group_id": np.array([row[2] or 0 for row in types], dtype=np.int64),
+            "category_id": np.array([row[3] or 0 for row in types], dtype=np.int64),
+            "volume": np.array([row[4] or 0 for row in types], dtype=np.float64),
+        },
+        "groups": {
+            "id": np.array([row[0] for row in groups], dtype=np.int64),
+            "name": [row[1] or "" for row in groups],
+        },
+        "categories": {
+            "id": np.array([row[0] for row in categories], dtype=np.int64),
+            "name": [row[1] or "" for row in categories],
+        },
+    }
+
+
+def build_compact_sde(sqlite_path: str, path: str):
+    os.makedirs(path, exist_ok=True)
+
+    tables = {table: write_table(path, table, columns) for table, columns in read_sqlite_tables(sqlite_path).items()}
+
+    write_manifest(path, tables)
+
@@ -0,0 +1,271 @@
+import io
+import json
+import os
+import posixpath
+import zipfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator
+
+import numpy as np
+
+from evex.sde_compact import COMPACT_SDE_VERSION, MANIFEST_FILE, write_manifest, write_table
+
+# Compact SDE table -> file in CCP's static data export, as <name>.jsonl or <name>.yaml
+SDE_SOURCES = {
+    "regions": "mapRegions",
+    "constellations": "mapConstellations",
+    "systems": "mapSolarSystems",
+    "jumps": "mapStargates",
+    "types": "types",
+    "groups": "groups",
+    "categories": "categories",
+}
+
+# JSON lines parse several times faster than YAML, prefer them when the export has both
+SOURCE_EXTENSIONS = (".jsonl", ".yaml")
+
+# Top level YAML entries handed to the parser at once
+YAML_BATCH_ENTRIES = 500
+
+
+def find_sources(names: list[str]) -> dict[str, str]:
+    members = {}
+    for extension in reversed(SOURCE_EXTENSIONS):
+        for name in names:
+            stem, ext = posixpath.splitext(posixpath.basename(name))
+            if ext == extension:
+                members[stem] = name
+
+    missing = [source for source in SDE_SOURCES.values() if source not in members]
+    if missing:
+        raise ValueError(f"not a static data export, missing {', '.join(missing)}")
+
+    return {table: members[source] for table, source in SDE_SOURCES.items()}
+
+
+def source_hash(info: zipfile.ZipInfo) -> str:
+    # The zip directory already stores a checksum of every member, no need to decompress to compare
+    return f"{info.CRC:08x}:{info.file_size}"
+
+
+def iter_jsonl(lines: io.TextIOBase) -> Iterator[tuple[int, dict]]:
+    for line in lines:
+        if line.strip():
+            record = json.loads(line)
+            yield record.pop("_key"), record
+
+
+def iter_yaml(lines: io.TextIOBase) -> Iterator[tuple[int, dict]]:
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+    def parse(chunk: list[str]) -> Iterator[tuple[int, dict]]:
+        yield from yaml.load("".join(chunk), Loader=loader).items()
+
+    # Every file is one mapping keyed by id, each entry starts at column 0.
+    # Parsing a batch of entries at a time keeps memory flat however big the file is.
+    chunk: list[str] = []
+    entries = 0
+    for line in lines:
+        if line[:1] not in ("", " ", "\t", "\n", "#"):
+            if entries == YAML_BATCH_ENTRIES:
+                yield from parse(chunk)
+                chunk = []
+                entries = 0
+
+            entries += 1
+
+        chunk.append(line)
+
+    if chunk:
+        yield from parse(chunk)
+
+
+def iter_records(zip_path: str, member: str) -> Iterator[tuple[int, dict]]:
+    with zipfile.ZipFile(zip_path) as archive, archive.open(member) as raw:
+        lines = io.TextIOWrapper(raw, encoding="utf-8")
+
+        yield from (iter_jsonl(lines) if member.endswith(".jsonl") else iter_yaml(lines))
+
+
+def localized(value) -> str:
+    if isinstance(value, dict):
+        return value.get("en") or ""
+
+    return value or ""
+
+
+def coordinates(value) -> tuple[float, float, float]:
+    if isinstance(value, dict):
+        return value.get("x", 0), value.get("y", 0), value.get("z", 0)
+
+    return tuple(value or (0, 0, 0))
+
+
+def read_named(records: Iterator[tuple[int, dict]], **id_fields: str) -> dict:
+    ids = array("q")
+    names: list[str] = []
+    extra = {column: array("q") for column in id_fields}
+
+    for key, record in records:
+        ids.append(int(key))
+        names.append(localized(record.get("name")))
+
+        for column, field in id_fields.items():
+            extra[column].append(int(record.get(field) or 0))
+
+    return {"id": ids, "name": names, **extra}
+
+
+def read_systems(records: Iterator[tuple[int, dict]]) -> dict:
+    columns = {column: array("q") for column in ("id", "region_id", "constellation_id")}
+    security = array("d")
+    positions = array("d")
+    names: list[str] = []
+
+    for key, record in records:
+        columns["id"].append(int(key))
+        columns["region_id"].append(int(record.get("regionID") or 0))
+        columns["constellation_id"].append(int(record.get("constellationID") or 0))
+        names.append(localized(record.get("name")))
+        security.append(float(record.get("securityStatus", record.get("security")) or 0))
+        positions.extend(coordinates(record.get("position")))
+
+    return {**columns, "name": names, "security": security, "coordinates": np.frombuffer(positions, dtype=np.float64).reshape(-1, 3)}
+
+
+def read_jumps(records: Iterator[tuple[int, dict]]) -> dict:
+    edges = array("q")
+
+    for key, record in records:
+        destination = record.get("destination") or {}
+        if "solarSystemID" in record and "solarSystemID" in destination:
+            edges.extend((int(record["solarSystemID"]), int(destination["solarSystemID"])))
+
+    return {"edges": np.frombuffer(edges, dtype=np.int64).reshape(-1, 2)}
+
+
+def read_types(records: Iterator[tuple[int, dict]]) -> dict:
+    ids = array("q")
+    group_ids = array("q")
+    volumes = array("d")
+    names: list[str] = []
+
+    for key, record in records:
+        name = localized(record.get("name"))
+        if not name:
+            continue
+
+        ids.append(int(key))
+        names.append(name)
+        group_ids.append(int(record.get("groupID") or 0))
+        volumes.append(float(record.get("volume") or 0))
+
+    return {"id": ids, "name": names, "group_id": group_ids, "volume": volumes}
+
+
+TABLE_READERS = {
+    "regions": read_named,
+    "constellations": lambda records: read_named(records, region_id="regionID"),
+    "systems": read_systems,
+    "jumps": read_jumps,
+    "types": read_types,
+    "groups": lambda records: read_named(records, category_id="categoryID"),
+    "categories": read_named,
+}
+
+
+def sort_by_id(columns: dict) -> dict:
+    # Lookups binary search on id, the export makes no promise about order
+    if "id" not in columns:
+        return {name: np.asarray(values) for name, values in columns.items()}
+
+    order = np.argsort(np.frombuffer(columns["id"], dtype=np.int64), kind="stable")
+
+    return {
+        name: [values[i] for i in order.tolist()] if isinstance(values, list) else np.asarray(values)[order]
+        for name, values in columns.items()
+    }
+
+
+def build_table(zip_path: str, member: str, table: str, output: str) -> dict:
+    # Runs in a worker process, one export file each
+    columns = sort_by_id(TABLE_READERS[table](iter_records(zip_path, member)))
+
+    return write_table(output, table, columns)
+
+
+def load_manifest(output: str) -> dict:
+    try:
+        with open(os.path.join(output, MANIFEST_FILE), "r") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+    return manifest if manifest.get("version") == COMPACT_SDE_VERSION else {}
+
+
+def is_table_current(output: str, table: str, entry: dict | None, source: str) -> bool:
+    if not entry or entry.get("source") != source:
+        return False
+
+    return all(
+        os.path.exists(os.path.join(output, f"{table}.{column}.npy")) or os.path.exists(os.path.join(output, f"{table}.{column}.strings"))
+        for column in entry.get("columns", [])
+    )
+
+
+def write_type_categories(output: str, tables: dict[str, dict]):
+    # types only carry a group, the category comes from whichever groups table is current
+    type_groups = np.load(os.path.join(output, "types.group_id.npy"), mmap_mode="r")
+    group_ids = np.load(os.path.join(output, "groups.id.npy"), mmap_mode="r")
+    group_categories = np.load(os.path.join(output, "groups.category_id.npy"), mmap_mode="r")
+
+    category_ids = np.zeros(len(type_groups), dtype=np.int64)
+    if len(group_ids):
+        positions = np.searchsorted(group_ids, type_groups).clip(0, len(group_ids) - 1)
+        known = group_ids[positions] == type_groups
+        category_ids[known] = group_categories[positions[known]]
+
+    write_table(output, "types", {"category_id": category_ids})
+
+    columns = tables["types"]["columns"]
+    if "category_id" not in columns:
+        columns.append("category_id")
+
+
+def build_sde(zip_path: str, output: str, workers: int | None = None, force: bool = False, progress=print) -> list[str]:
+    os.makedirs(output, exist_ok=True)
+
+    with zipfile.ZipFile(zip_path) as archive:
+        members = find_sources(archive.namelist())
+        sources = {table: source_hash(archive.getinfo(member)) for table, member in members.items()}
+
+    tables = {} if force else load_manifest(output).get("tables", {})
+    stale = [table for table in SDE_SOURCES if force or not is_table_current(output, table, tables.get(table), sources[table])]
+
+    for table in SDE_SOURCES:
+        if table not in stale:
+            progress(f"{table}: unchanged")
+
+    # Columns are replaced in place, mark the directory unusable before the first one is touched
+    write_manifest(output, tables, complete=False)
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=min(len(stale), workers or os.cpu_count() or 1)) as pool:
+            futures = {pool.submit(build_table, zip_path, members[table], table, output): table for table in stale}
+
+            for future in as_completed(futures):
+                table = futures[future]
+                tables[table] = {**future.result(), "source": sources[table]}
+
+                # Recorded as each table lands, an interrupted build picks up where it stopped
+                write_manifest(output, tables, complete=False)
+                progress(f"{table}: {tables[table]['rows']} rows from {members[table]}")
+
+    write_type_categories(output, tables)
+    write_manifest(output, tables)
+
+    return stale
@@ -1,32 +1,179 @@
+import logging
+import threading
 from pathlib import Path
-from typing import Dict
+from typing import Callable, Dict
 
 from pydantic_settings import BaseSettings
 
 from evex.models import EsiCharacter
+from evex.utils import get_config_path, write_file_atomic
+
+logger = logging.getLogger(__name__)
+
+# Changes landing within this many seconds of each other go to disk in one write
+SAVE_DELAY = 1.0
+# Seconds before a background write that failed is tried again
+SAVE_RETRY_DELAY = 10.0
 
 
 class HotkeySettings(BaseSettings):
     trigger: str = "<alt>+j"
 
 
+class HttpSettings(BaseSettings):
+    connect_timeout: float = 3.05
+    read_timeout: float = 10
+    retries: int = 2
+    backoff_factor: float = 0.25
+    pool_maxsize: int = 10
+
+
 class Settings(BaseSettings):
     characters: Dict[int, EsiCharacter] = {}
+    # Named sets of character names for "group <name> ..." commands
+    groups: Dict[str, list[str]] = {}
+    # Jump Drive Calibration level per character id, characters not listed have it at 5
+    jump_drive_calibration: Dict[int, int] = {}
     hotkeys: HotkeySettings = HotkeySettings()
+    http: HttpSettings = HttpSettings()
+
+
+def get_settings_path() -> Path:
+    return get_config_path("settings.json")
 
 
-def save_settings(settings: Settings):
-    settings_path = Path.joinpath(Path.home(), ".config", "evex", "settings.json")
+def save_settings(settings: Settings, settings_path: Path | None = None):
+    write_settings_json(settings.model_dump_json(indent=2), settings_path or get_settings_path())
 
-    with open(settings_path, "w") as settings_file:
-        settings_file.write(settings.model_dump_json(indent=2))
 
+def write_settings_json(data: str, settings_path: Path):
+    write_file_atomic(settings_path, data)
 
-def load_settings() -> Settings:
-    settings_path = Path.joinpath(Path.home(), ".config", "evex", "settings.json")
+
+def load_settings(settings_path: Path | None = None) -> Settings:
+    settings_path = settings_path or get_settings_path()
 
     if not settings_path.exists() or not settings_path.is_file():
-        save_settings(Settings())
+        save_settings(Settings(), settings_path)
 
     with open(settings_path, "r") as settings_file:
         return Settings.model_validate_json(settings_file.read())
+
+
+class SettingsStore:
+    def __init__(self, settings_path: Path | None = None, delay: float = SAVE_DELAY):
+        self.settings_path = settings_path or get_settings_path()
+        self.delay = delay
+
+        self._settings: Settings | None = None
+        self._subscribers: list[Callable[[Settings], None]] = []
+
+        # Token refreshes update settings from worker threads
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._dirty = False
+
+
+    @property
+    def settings(self) -> Settings:
+        if self._settings is None:
+            with self._lock:
+                if self._settings is None:
+                    self._settings = load_settings(self.settings_path)
+
+        return self._settings
+
+
+    def update(self, change: Callable[[Settings], None]):
+        with self._lock:
+            change(self.settings)
+            self._dirty = True
+            self._schedule_save()
+
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            subscriber(self.settings)
+
+
+    def put_character(self, character: EsiCharacter):
+        def change(settings: Settings):
+            settings.characters[character.id] = character
+
+        self.update(change)
+
+
+    def subscribe(self, subscriber: Callable[[Settings], None]) -> Callable[[], None]:
+        with self._lock:
+            self._subscribers.append(subscriber)
+
+        def unsubscribe():
+            with self._lock:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+
+        return unsubscribe
+
+
+    def flush(self):
+        # Serialise under the state lock so a concurrent update never tears the snapshot,
+        # but keep the disk write itself outside it
+        with self._write_lock:
+            with self._lock:
+                if self._timer:
+                    self._timer.cancel()
+                    self._timer = None
+
+                if not self._dirty:
+                    return
+
+                data = self.settings.model_dump_json(indent=2)
+                self._dirty = False
+
+            try:
+                write_settings_json(data, self.settings_path)
+            except OSError:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+
+    def close(self):
+        self.flush()
+
+
+    def _schedule_save(self, delay: float | None = None):
+        # The first change opens the window, later ones ride along with its write
+        if self._timer:
+            return
+
+        self._timer = threading.Timer(self.delay if delay is None else delay, self._flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+
+    def _flush(self):
+        # Runs on the timer thread, nobody is there to catch a failed write
+        try:
+            self.flush()
+        except OSError:
+            logger.exception("could not write settings, retrying in %ss", SAVE_RETRY_DELAY)
+
+            with self._lock:
+                self._schedule_save(SAVE_RETRY_DELAY)
+
+
+_settings_store: SettingsStore | None = None
+_settings_store_lock = threading.Lock()
+
+
+def get_settings_store() -> SettingsStore:
+    global _settings_store
+
+    if _settings_store is None:
+        with _settings_store_lock:
+            if _settings_store is None:
+                _settings_store = SettingsStore()
+
+    return _settings_store
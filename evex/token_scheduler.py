@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import random
+import time
+
+from evex.esi_async import refresh_if_expiring
+from evex.models import EsiCharacter
+
+logger = logging.getLogger(__name__)
+
+# Tokens live for 20 minutes, refresh them a couple of minutes before they run out
+REFRESH_AHEAD = 120
+REFRESH_JITTER = 30
+
+RETRY_BACKOFF_MIN = 5
+RETRY_BACKOFF_MAX = 300
+
+
+class TokenRefreshScheduler:
+    def __init__(self):
+        self._tasks: dict[int, asyncio.Task] = {}
+
+
+    def start(self, characters: list[EsiCharacter]):
+        # Anything already expired is refreshed right away, all characters concurrently
+        for character in characters:
+            self.schedule(character)
+
+
+    def schedule(self, character: EsiCharacter):
+        self.unschedule(character.id)
+        self._tasks[character.id] = asyncio.ensure_future(self._run(character))
+
+
+    def unschedule(self, character_id: int):
+        task = self._tasks.pop(character_id, None)
+
+        if task:
+            task.cancel()
+
+
+    def stop(self):
+        for character_id in list(self._tasks):
+            self.unschedule(character_id)
+
+
+    async def _run(self, character: EsiCharacter):
+        backoff = RETRY_BACKOFF_MIN
+
+        while True:
+            # Jitter keeps a fleet of alts from all hitting SSO in the same second
+            refresh_at = character.expires_at - REFRESH_AHEAD - random.uniform(0, REFRESH_JITTER)
+            delay = refresh_at - time.time()
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                await refresh_if_expiring(character, REFRESH_AHEAD + REFRESH_JITTER)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("token refresh for %s failed, retrying in %ss", character.name, backoff)
+
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, RETRY_BACKOFF_MAX)
+            else:
+                backoff = RETRY_BACKOFF_MIN
+
+                # SSO handed back a token that is already due, don't spin on it
+                if character.expires_at - REFRESH_AHEAD <= time.time():
+                    await asyncio.sleep(RETRY_BACKOFF_MIN)
@@ -0,0 +1,126 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from evex.utils import get_config_path
+
+TRACE_BUFFER_SIZE = 4096
+TRACE_FILE = "trace.jsonl"
+# The trace file is rotated once, so at most twice this much is kept on disk
+TRACE_FILE_MAX_BYTES = 4 * 1024 * 1024
+
+
+class Span:
+    __slots__ = ("name", "started_at", "duration", "attributes")
+
+    def __init__(self, name: str, started_at: float, duration: float, attributes: dict | None = None):
+        self.name = name
+        # Wall clock, so spans line up with logs
+        self.started_at = started_at
+        self.duration = duration
+        self.attributes = attributes or {}
+
+
+    def to_json(self) -> str:
+        return json.dumps({"name": self.name, "ts": self.started_at, "ms": round(self.duration * 1000, 3), **self.attributes})
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+
+    # Nearest rank, the smallest value with at least this fraction of the values at or below it
+    return ordered[min(max(math.ceil(fraction * len(ordered)) - 1, 0), len(ordered) - 1)]
+
+
+class Tracer:
+    def __init__(self, capacity: int = TRACE_BUFFER_SIZE):
+        self.spans: deque[Span] = deque(maxlen=capacity)
+
+        # Spans happen on the Qt thread, the pynput thread and the HTTP workers
+        self._lock = threading.Lock()
+        self._marks: dict[str, float] = {}
+        self._unflushed = 0
+
+
+    def record(self, name: str, start: float, end: float, **attributes):
+        # start and end come from time.perf_counter()
+        span = Span(name, time.time() - (time.perf_counter() - start), end - start, attributes)
+
+        with self._lock:
+            self.spans.append(span)
+            self._unflushed = min(self._unflushed + 1, self.spans.maxlen)
+
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        start = time.perf_counter()
+
+        try:
+            yield attributes
+        finally:
+            self.record(name, start, time.perf_counter(), **attributes)
+
+
+    def mark(self, name: str):
+        # Start of a span that ends somewhere else, like a hotkey press that ends with the window on screen
+        with self._lock:
+            self._marks[name] = time.perf_counter()
+
+
+    def since(self, mark: str, name: str, **attributes):
+        with self._lock:
+            start = self._marks.pop(mark, None)
+
+        if start is not None:
+            self.record(name, start, time.perf_counter(), **attributes)
+
+
+    def summary(self) -> dict[str, tuple[int, float, float]]:
+        with self._lock:
+            spans = list(self.spans)
+
+        durations: dict[str, list[float]] = {}
+        for span in spans:
+            durations.setdefault(span.name, []).append(span.duration)
+
+        return {name: (len(values), percentile(values, 0.5), percentile(values, 0.95)) for name, values in sorted(durations.items())}
+
+
+    def report(self) -> str:
+        lines = [f"{'stage':<28}{'count':>8}{'p50':>10}{'p95':>10}"]
+
+        for name, (count, p50, p95) in self.summary().items():
+            lines.append(f"{name:<28}{count:>8}{p50 * 1000:>8.1f}ms{p95 * 1000:>8.1f}ms")
+
+        return "\n".join(lines)
+
+
+    def flush(self, path=None):
+        with self._lock:
+            spans = list(self.spans)[len(self.spans) - self._unflushed:] if self._unflushed else []
+            self._unflushed = 0
+
+        if not spans:
+            return
+
+        path = path or get_config_path(TRACE_FILE)
+
+        try:
+            if os.path.exists(path) and os.path.getsize(path) > TRACE_FILE_MAX_BYTES:
+                os.replace(path, f"{path}.1")
+
+            with open(path, "a") as trace_file:
+                trace_file.writelines(span.to_json() + "\n" for span in spans)
+        except OSError:
+            pass
+
+
+tracer = Tracer()
+
+
+def span(name: str, **attributes):
+    return tracer.span(name, **attributes)
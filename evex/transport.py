@@ -0,0 +1,116 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from evex.settings import HttpSettings
+from evex.tracing import span
+
+USER_AGENT = "evex (+https://github.com/mgoeppner/evex)"
+
+# Hosts we talk to: esi, sso, images, fuzzwork and dscan.info
+POOL_CONNECTIONS = 8
+
+
+class Session:
+    def __init__(self, settings: HttpSettings):
+        # requests and urllib3 are only imported once something actually goes over the wire
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.timeout = (settings.connect_timeout, settings.read_timeout)
+        self.pool_maxsize = settings.pool_maxsize
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+
+        retry = Retry(
+            total=settings.retries,
+            backoff_factor=settings.backoff_factor,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=settings.pool_maxsize, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+
+        parts = urlsplit(url)
+
+        with span(f"http {parts.hostname}", method=method, path=parts.path) as attributes:
+            response = self.session.request(method, url, **kwargs)
+            attributes["status"] = response.status_code
+
+        return response
+
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+
+    def head(self, url, **kwargs):
+        return self.request("HEAD", url, **kwargs)
+
+
+    def post(self, url, data=None, **kwargs):
+        return self.request("POST", url, data=data, **kwargs)
+
+
+    def close(self):
+        self.session.close()
+
+
+_settings = HttpSettings()
+_session: Session | None = None
+_session_lock = threading.Lock()
+
+
+def configure(settings: HttpSettings):
+    global _settings, _session
+
+    with _session_lock:
+        if _session:
+            _session.close()
+
+        # The session itself is built on first use
+        _settings = settings
+        _session = None
+
+
+def session() -> Session:
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = Session(_settings)
+
+    return _session
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # One worker per pooled connection so concurrent calls never queue on the pool
+                _executor = ThreadPoolExecutor(max_workers=_settings.pool_maxsize, thread_name_prefix="evex-http")
+
+    return _executor
+
+
+async def run_blocking(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+
+    return await loop.run_in_executor(executor(), functools.partial(fn, *args, **kwargs))
@@ -1,6 +1,36 @@
 import os
+import sys
+import tempfile
+from pathlib import Path
 
 def get_resource(name: str) -> str:
+    # Onefile builds unpack bundled resources into a temp dir, anything else lives next to the working dir
+    bundled = getattr(sys, "_MEIPASS", None)
+    if bundled and os.path.exists(os.path.join(bundled, "resources", name)):
+        return os.path.join(bundled, "resources", name)
+
     return os.path.join(os.path.abspath(os.getcwd()), fr'resources/{name}')
 
 
+def get_config_path(name: str) -> Path:
+    config_path = Path.joinpath(Path.home(), ".config", "evex")
+    if not config_path.exists():
+        config_path.mkdir(parents=True, exist_ok=True)
+
+    return Path.joinpath(config_path, name)
+
+
+def write_file_atomic(path: Path, data: str):
+    # Write next to the target and rename over it, a crash never leaves a truncated file
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, "w") as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
@@ -0,0 +1,121 @@
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+# Benchmarks only run when asked for, timings mean little on a loaded or shared machine
+BENCHMARKS_ENV = "EVEX_BENCHMARKS"
+
+# Rewrite baseline.json from this run instead of checking against it
+UPDATE_BASELINE_ENV = "EVEX_UPDATE_BASELINE"
+
+# A benchmark fails once it is this many times slower than the baseline, relative to the calibration loop
+REGRESSION_THRESHOLD = 2.0
+
+ROUNDS = 15
+MIN_ROUND_TIME = 0.01
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get(BENCHMARKS_ENV) or os.environ.get(UPDATE_BASELINE_ENV):
+        return
+
+    skip = pytest.mark.skip(reason=f"benchmarks run with {BENCHMARKS_ENV}=1")
+    for item in items:
+        if Path(item.fspath).parent == Path(__file__).parent:
+            item.add_marker(skip)
+
+
+def calibration_workload():
+    # Interpreter-bound work of the kind the hot paths do: string building, dict and list churn
+    names = {}
+    for i in range(2000):
+        name = f"system {i}"
+        names[name.lower()] = i
+
+    return sorted(names, key=names.get)[:10]
+
+
+def load_baseline() -> dict[str, float]:
+    if not BASELINE_PATH.exists():
+        return {}
+
+    return json.loads(BASELINE_PATH.read_text())
+
+
+def measure(fn, *args, **kwargs):
+    # Calls per round grow until a round is long enough for the timer to be meaningful
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            result = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        if elapsed >= MIN_ROUND_TIME:
+            break
+
+        calls *= 2
+
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn(*args, **kwargs)
+        timings.append((time.perf_counter() - start) / calls)
+
+    return statistics.median(timings), result
+
+
+class Benchmark:
+    def __init__(self, baseline: dict[str, float], results: dict[str, float], calibration: float):
+        self.baseline = baseline
+        self.results = results
+        # Median seconds of the calibration loop on this machine, right now
+        self.calibration = calibration
+
+
+    def __call__(self, name: str, fn, *args, **kwargs):
+        median, result = measure(fn, *args, **kwargs)
+
+        # Stored as multiples of the calibration loop, so the baseline carries over between machines
+        relative = median / self.calibration
+        self.results[name] = relative
+
+        baseline = self.baseline.get(name)
+        if baseline is not None and not os.environ.get(UPDATE_BASELINE_ENV):
+            assert relative <= baseline * REGRESSION_THRESHOLD, (
+                f"{name} took {relative:.4g}x the calibration loop ({median * 1e6:.1f}us), baseline is {baseline:.4g}x"
+            )
+
+        return result
+
+
+_results: dict[str, float] = {}
+
+
+@pytest.fixture(scope="session")
+def benchmark_results():
+    yield _results
+
+    if os.environ.get(UPDATE_BASELINE_ENV) and _results:
+        baseline = load_baseline()
+        baseline.update({name: float(f"{value:.4g}") for name, value in _results.items()})
+
+        BASELINE_PATH.write_text(json.dumps(dict(sorted(baseline.items())), indent=2) + "\n")
+
+
+@pytest.fixture(scope="session")
+def calibration():
+    return measure(calibration_workload)[0]
+
+
+@pytest.fixture
+def benchmark(benchmark_results, calibration):
+    return Benchmark(load_baseline(), benchmark_results, calibration)
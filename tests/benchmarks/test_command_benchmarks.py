@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip("PySide6")
+
+from evex.commands import COMMAND_GRAMMAR, COMMANDS
+
+INPUTS = [
+    "",
+    "se",
+    "set destination Jita",
+    "show kills in New Caldari",
+    "all set destination Amarr",
+    "group scouts add waypoint Tama",
+    "blops jump plan from Jita to Amarr by fatigue",
+    "safer route from Jita to Amarr avoid Tama, Rancer",
+    "share appraise clipboard",
+    "not a command at all",
+]
+
+
+@pytest.mark.parametrize("text", INPUTS)
+def test_grammar_parse(benchmark, text):
+    benchmark(f"grammar.parse[{text}]", COMMAND_GRAMMAR.parse, text)
+
+
+def test_command_match_all(benchmark):
+    def match_all():
+        return [command for command in COMMANDS for text in INPUTS if command.match(text)]
+
+    assert benchmark("command.match.all", match_all)
+
+
+def test_command_parse_all(benchmark):
+    def parse_all():
+        return [command.parse(text) for command in COMMANDS for text in INPUTS]
+
+    benchmark("command.parse.all", parse_all)
@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("PySide6")
+
+from evex.completion import CompletionIndex
+from evex.gui.completers import SystemCompleter
+from evex.grammar import CompletionType
+from evex.sde import get_solar_system_names
+
+QUERIES = ["j", "ji", "jita", "new cal", "jtia", "ama", "zz", "-7"]
+
+
+@pytest.fixture(scope="module")
+def completion_index():
+    return CompletionIndex(get_solar_system_names())
+
+
+def test_completion_index_build(benchmark):
+    names = get_solar_system_names()
+
+    benchmark("completion.index.build", CompletionIndex, names)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_completion_search(benchmark, completion_index, query):
+    benchmark(f"completion.search[{query}]", completion_index.search, query)
+
+
+def test_system_completer_typing(benchmark, qapp, completion_index):
+    completer = SystemCompleter(index=completion_index)
+    completer.setCompletionType(CompletionType.SYSTEM)
+
+    def type_name():
+        # Each keystroke re-filters the popup model
+        for i in range(1, len("new caldari") + 1):
+            completer.setCompletionPrefix("new caldari"[:i])
+
+        completer.setCompletionPrefix("")
+
+    benchmark("completer.typing", type_name)
+
+    completer.setCompletionPrefix("jita")
+    assert completer.currentCompletion() == "Jita"
@@ -0,0 +1,58 @@
+from evex.sde import get_solar_system, get_solar_system_id, get_solar_system_index, get_solar_system_name, get_type_index
+
+
+def test_solar_system_by_name(benchmark):
+    get_solar_system_index()
+
+    assert benchmark("sde.get_solar_system.name", get_solar_system, "Jita").id == 30000001
+
+
+def test_solar_system_by_id(benchmark):
+    get_solar_system_index()
+
+    assert benchmark("sde.get_solar_system.id", get_solar_system, 30000002).name == "Amarr"
+
+
+def test_solar_system_id(benchmark):
+    get_solar_system_index()
+
+    assert benchmark("sde.get_solar_system_id", get_solar_system_id, "perimeter") == 30000003
+
+
+def test_solar_system_name(benchmark):
+    get_solar_system_index()
+
+    assert benchmark("sde.get_solar_system_name", get_solar_system_name, 30000004) == "New Caldari"
+
+
+def test_type_by_name(benchmark):
+    types = get_type_index()
+
+    position = benchmark("sde.type_index.find", types.find, "Tritanium")
+
+    assert types.ids[position] == 34
+
+
+def test_compact_sde_load(benchmark, fixture_sde, tmp_path, monkeypatch):
+    from evex.sde import SDE_PATH_ENV, load_solar_system_index, load_type_index
+    from evex.sde_compact import build_compact_sde
+
+    benchmark("sde.load_solar_system_index.sqlite", load_solar_system_index)
+
+    build_compact_sde(str(fixture_sde), str(tmp_path))
+    monkeypatch.setenv(SDE_PATH_ENV, str(tmp_path))
+
+    assert len(benchmark("sde.load_solar_system_index.compact", load_solar_system_index)) == 8000
+    benchmark("sde.load_type_index.compact", load_type_index)
+
+
+def test_sde_import_unchanged(benchmark, fixture_sde, tmp_path):
+    from evex.sde_import import build_sde
+    from fixture_sde import build_fixture_sde_zip
+
+    export = tmp_path / "sde.zip"
+    build_fixture_sde_zip(str(fixture_sde), str(export), ".jsonl")
+    build_sde(str(export), str(tmp_path / "sde"), progress=lambda line: None)
+
+    # Nothing changed, nothing is parsed
+    assert benchmark("sde.import.unchanged", build_sde, str(export), str(tmp_path / "sde"), progress=lambda line: None) == []
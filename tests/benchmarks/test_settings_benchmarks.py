@@ -0,0 +1,39 @@
+import pytest
+
+from evex.models import EsiCharacter
+from evex.settings import Settings, SettingsStore, load_settings, save_settings
+
+
+@pytest.fixture
+def settings():
+    characters = {
+        i: EsiCharacter(id=i, name=f"Character {i}", access_token="a" * 1024, refresh_token="r" * 64, expires_at=0)
+        for i in range(1, 21)
+    }
+
+    return Settings(characters=characters, groups={"scouts": [f"Character {i}" for i in range(1, 6)]})
+
+
+def test_settings_save(benchmark, tmp_path, settings):
+    benchmark("settings.save", save_settings, settings, tmp_path / "settings.json")
+
+
+def test_settings_load(benchmark, tmp_path, settings):
+    path = tmp_path / "settings.json"
+    save_settings(settings, path)
+
+    assert len(benchmark("settings.load", load_settings, path).characters) == 20
+
+
+def test_settings_store_update(benchmark, tmp_path, settings):
+    path = tmp_path / "settings.json"
+    save_settings(settings, path)
+
+    # The write behind timer never fires inside the benchmark
+    store = SettingsStore(path, delay=60)
+    character = store.settings.characters[1]
+
+    benchmark("settings.store.put_character", store.put_character, character)
+
+    store.close()
+    assert load_settings(path).characters[1] == character
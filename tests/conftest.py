@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from evex.sde import SDE_PATH_ENV
+from fixture_sde import build_fixture_sde
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fixture_sde(tmp_path_factory):
+    path = tmp_path_factory.mktemp("sde") / "sde.sqlite"
+    build_fixture_sde(str(path))
+
+    previous = os.environ.get(SDE_PATH_ENV)
+    os.environ[SDE_PATH_ENV] = str(path)
+
+    yield path
+
+    if previous is None:
+        del os.environ[SDE_PATH_ENV]
+    else:
+        os.environ[SDE_PATH_ENV] = previous
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    pytest.importorskip("PySide6")
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from PySide6 import QtWidgets
+
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
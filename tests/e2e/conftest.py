@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+pytest.importorskip("PySide6")
+pytest.importorskip("qasync")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def replay_home(tmp_path_factory):
+    # Token refreshes persist characters through the settings store, keep that out of the real config dir
+    home = tmp_path_factory.mktemp("home")
+
+    previous = os.environ.get("HOME")
+    os.environ["HOME"] = str(home)
+
+    yield home
+
+    if previous is None:
+        del os.environ["HOME"]
+    else:
+        os.environ["HOME"] = previous
+
+
+@pytest.fixture(scope="session")
+def event_loop(qapp):
+    import asyncio
+
+    from qasync import QEventLoop
+
+    loop = QEventLoop(qapp)
+    asyncio.set_event_loop(loop)
+
+    yield loop
+
+    loop.close()
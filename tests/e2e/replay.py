@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+import webbrowser
+from pathlib import Path
+
+# Streams are "one omnibox command per line". A line starting with "@<name>" switches the
+# selected character for the lines after it, blank lines and "#" comments are skipped.
+CHARACTER_PREFIX = "@"
+
+
+class NullBrowser(webbrowser.BaseBrowser):
+    def open(self, url, new=0, autoraise=True):
+        return True
+
+
+def point_evex_at(url: str):
+    from evex import commands, esi
+    from evex.jwks import JwksCache
+
+    esi.TOKEN_URL = f"{url}/v2/oauth/token/"
+    esi.JWKS_URL = f"{url}/oauth/jwks"
+    esi.ESI_BASE_URL = f"{url}/latest"
+    esi._jwks_cache = JwksCache(esi.JWKS_URL, None, esi.JWK_ALGORITHM)
+    esi.esi_cache.clear()
+
+    commands.FUZZWORK_URL = url
+    commands.DSCAN_URL = url
+
+    # Commands that open a page must not launch a real browser
+    webbrowser.register("evex-replay", None, NullBrowser("evex-replay"), preferred=True)
+
+
+def load_stream(path: str | Path) -> list[str]:
+    with open(path, "r") as stream_file:
+        lines = [line.strip() for line in stream_file]
+
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0
+
+    ordered = sorted(values)
+
+    return ordered[min(max(math.ceil(fraction * len(ordered)) - 1, 0), len(ordered) - 1)]
+
+
+class ReplayReport:
+    def __init__(self, latencies: list[float], finished: int, failed: list[str], elapsed: float):
+        self.latencies = latencies
+        self.finished = finished
+        self.failed = failed
+        self.elapsed = elapsed
+
+
+    @property
+    def commands(self) -> int:
+        return len(self.latencies)
+
+
+    @property
+    def throughput(self) -> float:
+        return self.commands / self.elapsed if self.elapsed else 0
+
+
+    @property
+    def p50(self) -> float:
+        return statistics.median(self.latencies) if self.latencies else 0
+
+
+    @property
+    def p99(self) -> float:
+        return percentile(self.latencies, 0.99)
+
+
+    def __str__(self) -> str:
+        return (
+            f"{self.commands} commands in {self.elapsed:.2f}s ({self.throughput:.1f}/s), "
+            f"{len(self.failed)} failed, p50 {self.p50 * 1000:.1f}ms, p99 {self.p99 * 1000:.1f}ms"
+        )
+
+
+async def replay(widget, stream: list[str], pace: float = 0) -> ReplayReport:
+    finished = 0
+    failed: list[str] = []
+
+    def on_finished(title, message):
+        nonlocal finished
+        finished += 1
+
+    def on_failed(title, message):
+        failed.append(f"{title}: {message}")
+
+    widget.runner.finished.connect(on_finished)
+    widget.runner.failed.connect(on_failed)
+
+    latencies: list[float] = []
+    tasks = []
+
+    def record(started_at: float):
+        return lambda task: latencies.append(time.perf_counter() - started_at)
+
+    started = time.perf_counter()
+
+    try:
+        for line in stream:
+            if line.startswith(CHARACTER_PREFIX):
+                widget.show_and_focus(line.removeprefix(CHARACTER_PREFIX).strip())
+                continue
+
+            widget.textbox.setPlainText(line)
+
+            submitted_at = time.perf_counter()
+            task = widget.exec_command()
+
+            if task:
+                task.add_done_callback(record(submitted_at))
+                tasks.append(task)
+
+            # Let the loop breathe between keystrokes like a person would
+            await asyncio.sleep(pace)
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        widget.runner.finished.disconnect(on_finished)
+        widget.runner.failed.disconnect(on_failed)
+
+    return ReplayReport(latencies, finished, failed, time.perf_counter() - started)
+
+
+def create_characters(server, count: int):
+    from evex.models import EsiCharacter
+
+    characters = {}
+    for i in range(count):
+        character_id = 90000001 + i
+        server.add_character(character_id, f"Replay Pilot {i + 1}")
+
+        # Already expired, so the first command for each runs the full SSO refresh
+        characters[character_id] = EsiCharacter(
+            id=character_id,
+            name=f"Replay Pilot {i + 1}",
+            access_token="",
+            refresh_token=f"refresh-{character_id}",
+            expires_at=0,
+        )
+
+    return characters
+
+
+def create_widget(characters: dict, groups: dict[str, list[str]] | None = None):
+    from evex.gui.omnibox_widget import OmniboxWidget
+    from evex.settings import get_settings_store
+
+    def change(settings):
+        settings.characters = dict(characters)
+        settings.groups = dict(groups or {})
+
+    get_settings_store().update(change)
+
+    widget = OmniboxWidget()
+    widget.setEsiCharacters(characters)
+
+    return widget
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay omnibox command streams against local ESI, SSO and paste service stand-ins.")
+    parser.add_argument("streams", nargs="+", help="command stream files")
+    parser.add_argument("--characters", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--error-limit", type=int, default=100)
+    parser.add_argument("--cache-seconds", type=int, default=5)
+    parser.add_argument("--pace", type=float, default=0, help="seconds between commands")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parents[2]
+    sys.path[:0] = [str(root), str(root / "tests")]
+
+    # Never touch the real config dir, and run without a display
+    home = tempfile.mkdtemp(prefix="evex-replay-")
+    os.environ["HOME"] = home
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from evex.sde import SDE_PATH_ENV
+    from evex.utils import get_resource
+    from fixture_sde import build_fixture_sde
+
+    if not os.environ.get(SDE_PATH_ENV) and not os.path.isfile(get_resource("sde.sqlite")):
+        os.environ[SDE_PATH_ENV] = os.path.join(home, "sde.sqlite")
+        build_fixture_sde(os.environ[SDE_PATH_ENV])
+
+    from qasync import QApplication, QEventLoop
+    from standin import StandinConfig, StandinServer
+
+    app = QApplication([])
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+
+    config = StandinConfig(args.latency, args.jitter, args.error_rate, args.error_limit, cache_seconds=args.cache_seconds)
+
+    with StandinServer(config) as server, loop:
+        point_evex_at(server.url)
+
+        characters = create_characters(server, args.characters)
+        widget = create_widget(characters, {"replay": [character.name for character in characters.values()]})
+
+        for path in args.streams:
+            stream = load_stream(path) * args.repeat
+            report = loop.run_until_complete(replay(widget, stream, args.pace))
+
+            print(f"{path}: {report}")
+            for failure in report.failed[:10]:
+                print(f"  {failure}")
+
+        print(f"stand-in requests: {dict(sorted(server.state.requests.items()))}")
+
+
+if __name__ == "__main__":
+    main()
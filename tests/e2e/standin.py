@@ -0,0 +1,336 @@
+import base64
+import email.utils
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import rsa
+from jose import jwt
+
+KEY_ID = "JWT-Signature-Key"
+ISSUER = "https://login.eveonline.com"
+AUDIENCE = "EVE Online"
+
+TOKEN_LIFETIME = 20 * 60
+
+
+def b64url_uint(value: int) -> str:
+    data = value.to_bytes((value.bit_length() + 7) // 8, "big")
+
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+class StandinConfig:
+    def __init__(self, latency: float = 0, jitter: float = 0, error_rate: float = 0, error_limit: int = 100, error_limit_window: int = 60, cache_seconds: int = 5, seed: int | None = None):
+        # Seconds added to every response, plus up to jitter more
+        self.latency = latency
+        self.jitter = jitter
+
+        # Share of ESI requests answered with a 502, each one costs error limit like on Tranquility
+        self.error_rate = error_rate
+        self.error_limit = error_limit
+        self.error_limit_window = error_limit_window
+
+        # Expires on ESI responses
+        self.cache_seconds = cache_seconds
+
+        self.random = random.Random(seed)
+
+
+class StandinState:
+    def __init__(self, config: StandinConfig, key_bits: int):
+        self.config = config
+
+        self.public_key, self.private_key = rsa.newkeys(key_bits)
+        self.private_pem = self.private_key.save_pkcs1().decode()
+
+        # character id -> name, location and waypoints
+        self.characters: dict[int, str] = {}
+        self.locations: dict[int, int] = {}
+        self.waypoints: dict[int, list[int]] = {}
+
+        # Bulk universe activity, system id -> counts for the last hour
+        self.system_kills: dict[int, dict] = {}
+        self.system_jumps: dict[int, int] = {}
+
+        self.requests: dict[str, int] = {}
+        self.error_limit_remain = config.error_limit
+        self.error_limit_reset_at = time.time() + config.error_limit_window
+
+        self.lock = threading.Lock()
+
+
+    def jwks(self) -> dict:
+        return {
+            "keys": [
+                {"kid": KEY_ID, "alg": "RS256", "kty": "RSA", "use": "sig", "n": b64url_uint(self.public_key.n), "e": b64url_uint(self.public_key.e)},
+            ],
+        }
+
+
+    def access_token(self, character_id: int) -> str:
+        claims = {
+            "sub": f"CHARACTER:EVE:{character_id}",
+            "name": self.characters[character_id],
+            "iss": ISSUER,
+            "aud": [AUDIENCE, "evex"],
+            "exp": int(time.time()) + TOKEN_LIFETIME,
+        }
+
+        return jwt.encode(claims, self.private_pem, algorithm="RS256", headers={"kid": KEY_ID})
+
+
+    def count(self, name: str):
+        with self.lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+
+
+    def spend_error_limit(self) -> tuple[int, int]:
+        with self.lock:
+            now = time.time()
+            if now >= self.error_limit_reset_at:
+                self.error_limit_remain = self.config.error_limit
+                self.error_limit_reset_at = now + self.config.error_limit_window
+
+            self.error_limit_remain = max(self.error_limit_remain - 1, 0)
+
+            return self.error_limit_remain, int(self.error_limit_reset_at - now)
+
+
+    def error_limit_headers(self) -> tuple[int, int]:
+        with self.lock:
+            now = time.time()
+            if now >= self.error_limit_reset_at:
+                self.error_limit_remain = self.config.error_limit
+                self.error_limit_reset_at = now + self.config.error_limit_window
+
+            return self.error_limit_remain, int(self.error_limit_reset_at - now)
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server: "StandinServer"
+    protocol_version = "HTTP/1.1"
+
+    ROUTES = [
+        ("POST", re.compile(r"^/v2/oauth/token/$"), "token"),
+        ("GET", re.compile(r"^/oauth/jwks$"), "jwks"),
+        ("GET", re.compile(r"^/latest/status/$"), "status"),
+        ("GET", re.compile(r"^/latest/characters/(\d+)/location/$"), "location"),
+        ("GET", re.compile(r"^/latest/characters/(\d+)/ship/$"), "ship"),
+        ("GET", re.compile(r"^/latest/characters/(\d+)/online/$"), "online"),
+        ("POST", re.compile(r"^/latest/ui/autopilot/waypoint/$"), "waypoint"),
+        ("GET", re.compile(r"^/latest/universe/system_kills/$"), "system_kills"),
+        ("GET", re.compile(r"^/latest/universe/system_jumps/$"), "system_jumps"),
+        ("POST", re.compile(r"^/appraisal/$"), "fuzzwork"),
+        ("POST", re.compile(r"^/$"), "dscan"),
+    ]
+
+
+    def log_message(self, format, *args):
+        pass
+
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+
+    def dispatch(self, method: str):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode() if length else ""
+
+        state = self.server.state
+        config = state.config
+
+        if config.latency or config.jitter:
+            time.sleep(config.latency + config.random.uniform(0, config.jitter))
+
+        for route_method, pattern, name in self.ROUTES:
+            match = pattern.match(url.path)
+            if route_method == method and match:
+                state.count(name)
+
+                if url.path.startswith("/latest/") and not self.esi_allowed():
+                    return
+
+                return getattr(self, f"handle_{name}")(match, parse_qs(url.query), parse_qs(body))
+
+        self.respond(404, {"error": "not found"})
+
+
+    def esi_allowed(self) -> bool:
+        state = self.server.state
+
+        remain, reset = state.error_limit_headers()
+        if remain <= 0:
+            self.respond(420, {"error": "error limited"}, self.error_limit_headers(remain, reset))
+            return False
+
+        if state.config.random.random() < state.config.error_rate:
+            remain, reset = state.spend_error_limit()
+            self.respond(502, {"error": "bad gateway"}, self.error_limit_headers(remain, reset))
+            return False
+
+        return True
+
+
+    def error_limit_headers(self, remain: int, reset: int) -> dict:
+        return {"X-Esi-Error-Limit-Remain": str(remain), "X-Esi-Error-Limit-Reset": str(reset)}
+
+
+    def esi_headers(self) -> dict:
+        now = time.time()
+        remain, reset = self.server.state.error_limit_headers()
+
+        return {
+            "Date": email.utils.formatdate(now, usegmt=True),
+            "Expires": email.utils.formatdate(now + self.server.state.config.cache_seconds, usegmt=True),
+            **self.error_limit_headers(remain, reset),
+        }
+
+
+    def handle_token(self, match, query, form):
+        state = self.server.state
+
+        if form.get("grant_type") == ["refresh_token"]:
+            character_id = int(form["refresh_token"][0].removeprefix("refresh-"))
+        else:
+            character_id = int(form["code"][0].removeprefix("code-"))
+
+        if character_id not in state.characters:
+            return self.respond(400, {"error": "invalid_grant"})
+
+        self.respond(200, {
+            "access_token": state.access_token(character_id),
+            "expires_in": TOKEN_LIFETIME,
+            "token_type": "Bearer",
+            "refresh_token": f"refresh-{character_id}",
+        })
+
+
+    def handle_jwks(self, match, query, form):
+        self.respond(200, self.server.state.jwks())
+
+
+    def handle_status(self, match, query, form):
+        self.respond(200, {"players": 20000, "server_version": "standin", "start_time": "2026-01-01T11:00:00Z"}, self.esi_headers())
+
+
+    def handle_location(self, match, query, form):
+        character_id = int(match.group(1))
+
+        self.respond(200, {"solar_system_id": self.server.state.locations.get(character_id, 30000142)}, self.esi_headers())
+
+
+    def handle_ship(self, match, query, form):
+        self.respond(200, {"ship_type_id": 587, "ship_item_id": 1, "ship_name": "Replay"}, self.esi_headers())
+
+
+    def handle_online(self, match, query, form):
+        self.respond(200, {"online": True}, self.esi_headers())
+
+
+    def handle_waypoint(self, match, query, form):
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            return self.respond(401, {"error": "authorization not provided"})
+
+        character_id = int(jwt.get_unverified_claims(self.headers["Authorization"].removeprefix("Bearer "))["sub"].split(":")[-1])
+        destination_id = int(query["destination_id"][0])
+
+        with self.server.state.lock:
+            waypoints = self.server.state.waypoints.setdefault(character_id, [])
+
+            if query.get("clear_other_waypoints") == ["true"]:
+                waypoints.clear()
+
+            if query.get("add_to_beginning") == ["true"]:
+                waypoints.insert(0, destination_id)
+            else:
+                waypoints.append(destination_id)
+
+        self.respond(204, None, self.esi_headers())
+
+
+    def handle_system_kills(self, match, query, form):
+        kills = [{"system_id": system_id, "ship_kills": 0, "pod_kills": 0, "npc_kills": 0, **counts} for system_id, counts in self.server.state.system_kills.items()]
+
+        self.respond(200, kills, self.esi_headers())
+
+
+    def handle_system_jumps(self, match, query, form):
+        jumps = [{"system_id": system_id, "ship_jumps": count} for system_id, count in self.server.state.system_jumps.items()]
+
+        self.respond(200, jumps, self.esi_headers())
+
+
+    def handle_fuzzwork(self, match, query, form):
+        self.respond(302, None, {"Location": f"/appraisal/view/{random.getrandbits(32):x}"})
+
+
+    def handle_dscan(self, match, query, form):
+        self.respond(200, f"OK;{random.getrandbits(32):x}".encode(), {"Content-Type": "text/plain"})
+
+
+    def respond(self, status: int, body, headers: dict | None = None):
+        data = body if isinstance(body, bytes) else (json.dumps(body).encode() if body is not None else b"")
+
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if data:
+            self.send_header("Content-Type", (headers or {}).get("Content-Type", "application/json"))
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+
+        if data:
+            self.wfile.write(data)
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config: StandinConfig | None = None, key_bits: int = 1024):
+        super().__init__(("127.0.0.1", 0), StandinHandler)
+
+        self.state = StandinState(config or StandinConfig(), key_bits)
+        self._thread: threading.Thread | None = None
+
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+
+        return f"http://{host}:{port}"
+
+
+    def add_character(self, character_id: int, name: str, solar_system_id: int = 30000142):
+        self.state.characters[character_id] = name
+        self.state.locations[character_id] = solar_system_id
+
+
+    def start(self) -> "StandinServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="evex-standin", daemon=True)
+        self._thread.start()
+
+        return self
+
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+    def __enter__(self) -> "StandinServer":
+        return self.start()
+
+
+    def __exit__(self, *exc_info):
+        self.stop()
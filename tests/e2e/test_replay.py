@@ -0,0 +1,133 @@
+from pathlib import Path
+
+import pytest
+
+from evex.sde import get_solar_system_id
+from replay import create_characters, create_widget, load_stream, point_evex_at, replay
+from standin import StandinConfig, StandinServer
+
+STREAMS = Path(__file__).parent / "streams"
+
+
+@pytest.fixture
+def server():
+    with StandinServer(StandinConfig(latency=0.01, cache_seconds=5, seed=1)) as server:
+        point_evex_at(server.url)
+
+        yield server
+
+
+@pytest.fixture
+def characters(server):
+    return create_characters(server, 4)
+
+
+@pytest.fixture
+def widget(qapp, characters):
+    return create_widget(characters, {"replay": [character.name for character in characters.values()]})
+
+
+def test_replay_waypoints(event_loop, server, characters, widget):
+    report = event_loop.run_until_complete(replay(widget, load_stream(STREAMS / "waypoints.txt")))
+
+    assert not report.failed
+    assert report.commands == 9
+    assert report.p99 >= report.p50 > 0
+
+    # "all add waypoint Tama" went last, for every character
+    tama = get_solar_system_id("Tama")
+    assert all(server.state.waypoints[character_id][-1] == tama for character_id in characters)
+
+    # Each character refreshed its expired token exactly once, and the signing key was fetched once
+    assert server.state.requests["token"] == len(characters)
+    assert server.state.requests["jwks"] == 1
+
+
+def test_replay_mixed(event_loop, server, widget):
+    report = event_loop.run_until_complete(replay(widget, load_stream(STREAMS / "mixed.txt")))
+
+    assert not report.failed
+    assert server.state.requests["fuzzwork"] == 1
+    assert server.state.requests["dscan"] == 1
+
+
+def test_replay_esi_errors(event_loop, server, widget):
+    server.state.config.error_rate = 1
+    server.state.error_limit_remain = 3
+
+    report = event_loop.run_until_complete(replay(widget, ["@Replay Pilot 1", "set destination Jita", "add waypoint Amarr", "show kills in current"] * 2))
+
+    assert len(report.failed) == report.commands == 6
+
+    # Once the error limit is spent every ESI call is refused outright
+    assert server.state.error_limit_remain == 0
+
+
+def test_unparsed_commands_report_why(event_loop, server, widget):
+    failures = []
+    widget.runner.failed.connect(lambda title, message: failures.append((title, message)))
+
+    for text in ["all show kills in Jita", "fly me to the moon", "   "]:
+        widget.textbox.setPlainText(text)
+        assert widget.exec_command() is None
+
+    assert failures == [
+        ("all show kills in Jita", "show kills in can't target multiple characters"),
+        ("fly me to the moon", "unknown command"),
+    ]
+
+
+def test_system_activity_annotations(event_loop, server, widget):
+    from PySide6 import QtCore
+
+    from evex.activity import refresh_system_activity
+    from evex.completion import CompletionIndex
+
+    jita, amarr = get_solar_system_id("Jita"), get_solar_system_id("Amarr")
+    server.state.system_kills = {jita: {"ship_kills": 12, "pod_kills": 3, "npc_kills": 40}, 1: {"ship_kills": 5}}
+    server.state.system_jumps = {jita: 900, amarr: 450}
+
+    activity = event_loop.run_until_complete(refresh_system_activity())
+    widget.setSystemActivity(activity)
+
+    assert activity.annotation("Jita") == "12 ships  3 pods  40 npc  900 jumps"
+    assert activity.annotation("Amarr") == "0 ships  0 pods  0 npc  450 jumps"
+    assert activity.annotation("Perimeter") == ""
+
+    # One request per endpoint, not one per system
+    assert server.state.requests["system_kills"] == server.state.requests["system_jumps"] == 1
+
+    widget.setCompletionIndex(CompletionIndex(["Amarr", "Jita", "Perimeter"]))
+
+    model = widget.textbox.completer().system_name_model
+    model.setQuery("jit")
+
+    display = model.data(model.index(0), QtCore.Qt.ItemDataRole.DisplayRole)
+    edit = model.data(model.index(0), QtCore.Qt.ItemDataRole.EditRole)
+
+    assert display.startswith("Jita") and "900 jumps" in display
+    assert edit == "Jita"
+
+
+def test_prefetch_on_show(event_loop, server, characters, widget):
+    import asyncio
+
+    widget.show_and_focus("Replay Pilot 1")
+    event_loop.run_until_complete(widget.prefetch_task)
+
+    assert server.state.requests["token"] == 1
+    assert server.state.requests["location"] == 1
+
+    # Auth headers and "current" were already settled when the command ran
+    report = event_loop.run_until_complete(replay(widget, ["show kills in current", "set destination Jita"]))
+
+    assert not report.failed
+    assert server.state.requests["token"] == 1
+    assert server.state.requests["location"] == 1
+
+    widget.show_and_focus("Replay Pilot 2")
+    task = widget.prefetch_task
+    widget.cancel_command()
+
+    event_loop.run_until_complete(asyncio.wait([task]))
+    assert task.cancelled() and widget.prefetch_task is None
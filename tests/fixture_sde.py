@@ -0,0 +1,121 @@
+import random
+import sqlite3
+
+LIGHT_YEAR = 9_460_528_400_000_000
+
+# Roughly the size of New Eden, so timings carry over to the real SDE
+SYSTEM_COUNT = 8000
+REGION_COUNT = 64
+TYPE_COUNT = 30000
+
+SYSTEM_NAMES = ["Jita", "Amarr", "Perimeter", "New Caldari", "Tama", "Rancer", "Dodixie", "Hek", "Rens", "1DQ1-A"]
+
+GROUPS = [
+    (18, 4, "Mineral"),
+    (25, 6, "Frigate"),
+    (26, 6, "Cruiser"),
+    (541, 6, "Interdictor"),
+    (894, 6, "Heavy Interdiction Cruiser"),
+    (485, 6, "Dreadnought"),
+    (46, 7, "Propulsion Module"),
+]
+
+TYPES = [
+    (34, 18, "Tritanium", 0.01),
+    (35, 18, "Pyerite", 0.01),
+    (587, 25, "Rifter", 27289),
+    (620, 26, "Osprey", 107000),
+    (22456, 541, "Sabre", 43000),
+    (11995, 894, "Onyx", 185000),
+    (19720, 485, "Revelation", 18500000),
+    (12076, 46, "100MN Afterburner I", 50),
+]
+
+
+def build_fixture_sde(path: str, seed: int = 1):
+    rnd = random.Random(seed)
+
+    with sqlite3.connect(path) as con:
+        cur = con.cursor()
+
+        cur.execute("CREATE TABLE mapRegions (regionID INTEGER PRIMARY KEY, regionName TEXT)")
+        cur.execute("CREATE TABLE mapConstellations (constellationID INTEGER PRIMARY KEY, regionID INTEGER, constellationName TEXT)")
+        cur.execute("CREATE TABLE mapSolarSystems (regionID INTEGER, constellationID INTEGER, solarSystemID INTEGER PRIMARY KEY, solarSystemName TEXT, x REAL, y REAL, z REAL, security REAL)")
+        cur.execute("CREATE TABLE mapSolarSystemJumps (fromRegionID INTEGER, fromConstellationID INTEGER, fromSolarSystemID INTEGER, toSolarSystemID INTEGER, toConstellationID INTEGER, toRegionID INTEGER)")
+        cur.execute("CREATE TABLE invCategories (categoryID INTEGER PRIMARY KEY, categoryName TEXT)")
+        cur.execute("CREATE TABLE invGroups (groupID INTEGER PRIMARY KEY, categoryID INTEGER, groupName TEXT)")
+        cur.execute("CREATE TABLE invTypes (typeID INTEGER PRIMARY KEY, groupID INTEGER, typeName TEXT, volume REAL, published INTEGER)")
+
+        cur.executemany("INSERT INTO mapRegions VALUES (?, ?)", [(10000001 + r, f"Region {r}") for r in range(REGION_COUNT)])
+
+        systems = []
+        constellations = {}
+        for i in range(SYSTEM_COUNT):
+            name = SYSTEM_NAMES[i] if i < len(SYSTEM_NAMES) else "".join(rnd.choice("ABCDEFGHJKLMNPQRSTUVWXYZ0123456789") for _ in range(4)) + f"-{i}"
+            region_id = 10000001 + i % REGION_COUNT
+            constellation_id = 20000001 + i // 8
+            constellations[constellation_id] = region_id
+
+            x, y, z = (rnd.uniform(-50, 50) * LIGHT_YEAR, rnd.uniform(-10, 10) * LIGHT_YEAR, rnd.uniform(-50, 50) * LIGHT_YEAR)
+            systems.append((region_id, constellation_id, 30000001 + i, name, x, y, z, rnd.uniform(-1, 1)))
+
+        cur.executemany("INSERT INTO mapConstellations VALUES (?, ?, ?)", [(c, r, f"Constellation {c}") for c, r in constellations.items()])
+        cur.executemany("INSERT INTO mapSolarSystems VALUES (?, ?, ?, ?, ?, ?, ?, ?)", systems)
+
+        jumps = []
+        for i in range(SYSTEM_COUNT):
+            for j in {(i + 1) % SYSTEM_COUNT, (i * 7 + 3) % SYSTEM_COUNT} - {i}:
+                jumps.append((0, 0, 30000001 + i, 30000001 + j, 0, 0))
+                jumps.append((0, 0, 30000001 + j, 30000001 + i, 0, 0))
+
+        cur.executemany("INSERT INTO mapSolarSystemJumps VALUES (?, ?, ?, ?, ?, ?)", jumps)
+
+        cur.executemany("INSERT INTO invCategories VALUES (?, ?)", [(4, "Material"), (6, "Ship"), (7, "Module")])
+        cur.executemany("INSERT INTO invGroups VALUES (?, ?, ?)", GROUPS)
+        cur.executemany("INSERT INTO invTypes VALUES (?, ?, ?, ?, 1)", TYPES)
+        cur.executemany(
+            "INSERT INTO invTypes VALUES (?, 46, ?, ?, 1)",
+            [(100000 + i, f"Module {rnd.randrange(10 ** 6)} {i}", rnd.uniform(1, 50)) for i in range(TYPE_COUNT)],
+        )
+
+
+def build_fixture_sde_zip(sqlite_path: str, zip_path: str, extension: str = ".yaml"):
+    # The same data laid out like CCP's static data export, one file per table keyed by id
+    import json
+    import zipfile
+
+    import yaml
+
+    with sqlite3.connect(sqlite_path) as con:
+        cur = con.cursor()
+
+        files = {
+            "mapRegions": {row[0]: {"name": {"en": row[1]}} for row in cur.execute("SELECT regionID, regionName FROM mapRegions")},
+            "mapConstellations": {
+                row[0]: {"name": {"en": row[2]}, "regionID": row[1]}
+                for row in cur.execute("SELECT constellationID, regionID, constellationName FROM mapConstellations")
+            },
+            "mapSolarSystems": {
+                row[0]: {"name": {"en": row[1]}, "regionID": row[2], "constellationID": row[3], "securityStatus": row[4], "position": {"x": row[5], "y": row[6], "z": row[7]}}
+                for row in cur.execute("SELECT solarSystemID, solarSystemName, regionID, constellationID, security, x, y, z FROM mapSolarSystems")
+            },
+            "mapStargates": {
+                50000001 + i: {"solarSystemID": row[0], "destination": {"solarSystemID": row[1], "stargateID": 0}, "typeID": 16}
+                for i, row in enumerate(cur.execute("SELECT fromSolarSystemID, toSolarSystemID FROM mapSolarSystemJumps"))
+            },
+            "types": {
+                row[0]: {"name": {"en": row[1]}, "groupID": row[2], "volume": row[3], "published": True}
+                for row in cur.execute("SELECT typeID, typeName, groupID, volume FROM invTypes")
+            },
+            "groups": {row[0]: {"name": {"en": row[2]}, "categoryID": row[1]} for row in cur.execute("SELECT groupID, categoryID, groupName FROM invGroups")},
+            "categories": {row[0]: {"name": {"en": row[1]}} for row in cur.execute("SELECT categoryID, categoryName FROM invCategories")},
+        }
+
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, entries in files.items():
+            if extension == ".jsonl":
+                data = "".join(json.dumps({"_key": key, **entry}) + "\n" for key, entry in entries.items())
+            else:
+                data = yaml.dump(entries, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper), allow_unicode=True, sort_keys=False)
+
+            archive.writestr(f"{name}{extension}", data)
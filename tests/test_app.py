@@ -0,0 +1,68 @@
+import pytest
+
+
+@pytest.fixture
+def app_module(qapp, tmp_path, monkeypatch):
+    # MainWindow touches the config dir through the settings store and tracer
+    monkeypatch.setenv("HOME", str(tmp_path))
+
+    return pytest.importorskip("app")
+
+
+def test_main_window_builds(app_module):
+    from evex.models import EsiCharacter
+    from evex.settings import Settings
+
+    character = EsiCharacter(id=90000001, name="Window Pilot", access_token="", refresh_token="refresh", expires_at=0)
+    window = app_module.MainWindow(Settings(characters={character.id: character}))
+
+    assert window.activity_refresher.on_refresh == window.omnibox.setSystemActivity
+    assert [action.text() for action in window.character_actions.values()] == ["Window Pilot"]
+
+
+def test_main_window_builds_without_settings(app_module):
+    window = app_module.MainWindow()
+
+    assert window.omnibox is not None
+
+
+def test_main_window_follows_settings_changes(app_module, qapp, tmp_path):
+    import threading
+
+    from evex.models import EsiCharacter
+    from evex.settings import SettingsStore
+
+    store = SettingsStore(tmp_path / "settings.json", delay=60)
+    window = app_module.MainWindow(store.settings)
+    unsubscribe = store.subscribe(window.settings_changed.emit)
+
+    # Logins land from the Qt thread, token refreshes from worker threads
+    store.put_character(EsiCharacter(id=1, name="First Pilot", access_token="", refresh_token="refresh", expires_at=0))
+
+    thread = threading.Thread(target=store.put_character, args=(EsiCharacter(id=2, name="Second Pilot", access_token="", refresh_token="refresh", expires_at=0),))
+    thread.start()
+    thread.join()
+    qapp.processEvents()
+
+    unsubscribe()
+
+    assert [action.text() for action in window.character_actions.values()] == ["First Pilot", "Second Pilot"]
+    assert list(window.omnibox.esi_characters) == [1, 2]
+
+
+def test_main_window_shows_character_locations(app_module):
+    from evex.location_tracker import CharacterLocation
+    from evex.models import EsiCharacter
+    from evex.sde import get_solar_system_id
+    from evex.settings import Settings
+
+    character = EsiCharacter(id=90000002, name="Roaming Pilot", access_token="", refresh_token="refresh", expires_at=0)
+    window = app_module.MainWindow(Settings(characters={character.id: character}))
+
+    jita = get_solar_system_id("Jita")
+    window.location_tracker.locations[character.id] = CharacterLocation(character_id=character.id, solar_system_id=jita, online=True)
+    window.location_tracker.system_changed.emit(character.id, jita)
+
+    del window.location_tracker.locations[character.id]
+
+    assert window.character_actions[character.id].text() == "Roaming Pilot (Jita)"
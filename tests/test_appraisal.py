@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from evex.appraisal import appraise, format_isk, parse_line, parse_quantity
+from evex.prices import PriceTable
+from evex.sde import TypeIndex
+
+
+@pytest.fixture
+def types():
+    return TypeIndex(
+        np.array([34, 35, 587, 12066], dtype=np.int64),
+        ["Tritanium", "Pyerite", "Rifter", "100MN Afterburner I"],
+        np.array([18, 18, 25, 46], dtype=np.int64),
+        np.array([4, 4, 6, 7], dtype=np.int64),
+        np.array([0.01, 0.01, 27289, 50], dtype=np.float64),
+    )
+
+
+@pytest.fixture
+def prices():
+    # Pyerite only has an adjusted price, Rifter and the afterburner have none
+    return PriceTable(
+        np.array([34, 35], dtype=np.int64),
+        np.array([5.0, np.nan]),
+        np.array([4.0, 10.0]),
+        0,
+    )
+
+
+@pytest.mark.parametrize("text, quantity", [("1000", 1000), ("1,000", 1000), ("1 000", 1000), ("1.000", 1000), ("1'000x", 1000), ("x", None)])
+def test_parse_quantity(text, quantity):
+    assert parse_quantity(text) == quantity
+
+
+@pytest.mark.parametrize("line, parsed", [
+    ("Tritanium", (0, 1)),
+    ("Tritanium\t1,000\tMineral", (0, 1000)),
+    ("1000 Tritanium", (0, 1000)),
+    ("1 000 x Tritanium", (0, 1000)),
+    ("Tritanium x 1000", (0, 1000)),
+    ("Tritanium x1000", (0, 1000)),
+    ("100MN Afterburner I", (3, 1)),
+    ("2 100MN Afterburner I", (3, 2)),
+    ("100MN Afterburner I x2", (3, 2)),
+])
+def test_parse_line(types, line, parsed):
+    assert parse_line(line, types) == parsed
+
+
+@pytest.mark.parametrize("line", ["", "Veldspar", "1000 Veldspar", "Veldspar x 1000", "Tritanium please"])
+def test_parse_line_unknown(types, line):
+    assert parse_line(line, types) is None
+
+
+def test_appraise(types, prices):
+    appraisal = appraise("1000 Tritanium\nTritanium x 500\n\nPyerite\t20\n2 Rifter\n", types, prices)
+
+    assert [(line.name, line.quantity, line.unit_price, line.value) for line in appraisal.lines] == [
+        ("Tritanium", 1500, 5.0, 7500.0),
+        ("Pyerite", 20, 10.0, 200.0),
+        ("Rifter", 2, None, 0.0),
+    ]
+    assert appraisal.total_value == 7700
+    assert appraisal.total_quantity == 1522
+    assert appraisal.total_volume == pytest.approx(15.2 + 2 * 27289)
+
+
+def test_appraise_unknown_items(types, prices):
+    appraisal = appraise("Veldspar x 1000\n2 Rifter\nnot an item\n100MN Afterburner I", types, prices)
+
+    assert appraisal.unresolved == ["Veldspar x 1000", "not an item"]
+    assert [line.name for line in appraisal.unpriced] == ["Rifter", "100MN Afterburner I"]
+    assert appraisal.total_value == 0
+
+
+def test_appraise_without_prices(types):
+    appraisal = appraise("Tritanium", types, None)
+
+    assert appraisal.unpriced == appraisal.lines
+    assert appraisal.total_value == 0
+
+
+def test_appraise_nothing_resolved(types, prices):
+    appraisal = appraise("Veldspar\nScordite", types, prices)
+
+    assert appraisal.lines == []
+    assert appraisal.unresolved == ["Veldspar", "Scordite"]
+    assert appraisal.total_value == 0
+
+
+@pytest.mark.parametrize("value, text", [(0, "0.00"), (999.5, "999.50"), (1500, "1.50k"), (2.5e6, "2.50m"), (3e9, "3.00b"), (4.2e12, "4.20t"), (-2e6, "-2.00m")])
+def test_format_isk(value, text):
+    assert format_isk(value) == text
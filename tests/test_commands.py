@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from evex import commands
+from evex.models import EsiCharacter
+from evex.settings import SettingsStore
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def character(tmp_path, monkeypatch):
+    store = SettingsStore(tmp_path / "settings.json")
+    monkeypatch.setattr(commands, "get_settings_store", lambda: store)
+
+    return EsiCharacter(id=90000001, name="Jump Pilot", access_token="", refresh_token="", expires_at=0)
+
+
+def test_jump_range_uses_jdc_argument(character):
+    assert "within 7 LY of Jita (Archon, JDC 5)" in run(commands.jump_range(character, None, ["Jita", ""]))
+    assert "within 3.5 LY of Jita (Archon, JDC 0)" in run(commands.jump_range(character, None, ["Jita", "0"]))
+    assert "within 5.6 LY of Jita (Marshal, JDC 2)" in run(commands.jump_range(character, "blops", ["Jita", "2"]))
+
+
+def test_jump_range_uses_character_jdc(character):
+    commands.get_settings_store().update(lambda settings: settings.jump_drive_calibration.update({character.id: 3}))
+
+    assert "within 5.6 LY of Jita (Archon, JDC 3)" in run(commands.jump_range(character, None, ["Jita", ""]))
+    # The argument still wins
+    assert "(Archon, JDC 4)" in run(commands.jump_range(character, None, ["Jita", "4"]))
+
+
+@pytest.mark.parametrize("level", ["6", "four", "-1"])
+def test_jump_range_rejects_bad_jdc(character, level):
+    with pytest.raises(Exception, match="jump drive calibration must be 0 to 5"):
+        run(commands.jump_range(character, None, ["Jita", level]))
+
+
+def test_jdc_parses_after_optional_predicates():
+    parsed = commands.COMMAND_GRAMMAR.parse("jf jump plan from Jita to Amarr jdc 4")
+
+    assert parsed.command.action is commands.jump_plan
+    assert parsed.args == ["Jita", "Amarr", "", "4"]
+
+    assert commands.COMMAND_GRAMMAR.parse("jump range Jita jdc 3").args == ["Jita", "3"]
+
+
+def test_jump_plan_rejects_unknown_objective(character):
+    with pytest.raises(Exception, match="unknown objective speed, plan by jumps, ly, fatigue"):
+        run(commands.jump_plan(character, None, ["Jita", "Amarr", "speed", ""]))
@@ -0,0 +1,67 @@
+import pytest
+
+from evex.completion import CompletionIndex, prefix_distance
+
+NAMES = ["Jita", "Jatate", "Amarr", "Amamake", "Mannar", "Old Man Star", "New Caldari", "Niarja", "Perimeter", "Tama"]
+
+
+@pytest.fixture
+def index():
+    return CompletionIndex(NAMES)
+
+
+def search(index: CompletionIndex, query: str, limit: int = 20) -> list[str]:
+    return [index.names[i] for i in index.search(query, limit)]
+
+
+def test_empty_query_is_alphabetical(index):
+    assert search(index, "") == sorted(NAMES, key=str.lower)
+    assert search(index, "  ", limit=3) == ["Amamake", "Amarr", "Jatate"]
+
+
+def test_prefix_matches_rank_shortest_first(index):
+    assert search(index, "ama")[:2] == ["Amarr", "Amamake"]
+    assert search(index, "JITA")[0] == "Jita"
+
+
+def test_prefix_matches_rank_before_substrings(index):
+    assert search(index, "man")[:2] == ["Mannar", "Old Man Star"]
+    # Substrings rank by where the query starts in the name
+    assert search(index, "ama")[2] == "Tama"
+
+
+def test_exact_matches_rank_before_typos(index):
+    matches = search(index, "jita")
+
+    assert matches[0] == "Jita"
+    assert "Jatate" in matches
+
+
+@pytest.mark.parametrize("query, name", [
+    ("jtia", "Jita"),
+    ("amrr", "Amarr"),
+    ("niraja", "Niarja"),
+    ("nwe cal", "New Caldari"),
+    ("perimetre", "Perimeter"),
+])
+def test_typo_tolerance(index, query, name):
+    assert search(index, query)[0] == name
+
+
+@pytest.mark.parametrize("query", ["x", "zzz", "jtiaaaa", "caldari new"])
+def test_no_matches(index, query):
+    assert search(index, query) == []
+
+
+def test_limit(index):
+    assert len(search(index, "a", limit=2)) == 2
+    assert len(search(index, "", limit=4)) == 4
+
+
+def test_prefix_distance():
+    assert prefix_distance("jita", "jita 4-4", 2) == 0
+    assert prefix_distance("jtia", "jita", 2) == 1
+    assert prefix_distance("jiat", "jita", 2) == 1
+    assert prefix_distance("amrr", "amarr", 1) == 1
+    # Gives up past the limit
+    assert prefix_distance("xxxx", "jita", 1) == 2
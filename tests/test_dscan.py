@@ -0,0 +1,80 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from evex.dscan import DscanHistory, DscanResult, diff_dscan, parse_dscan
+from evex.sde import TypeIndex
+
+
+@pytest.fixture
+def types():
+    return TypeIndex(
+        np.array([34, 587, 620, 22456, 19720], dtype=np.int64),
+        ["Tritanium", "Rifter", "Osprey", "Sabre", "Revelation"],
+        np.array([18, 25, 26, 541, 485], dtype=np.int64),
+        np.array([4, 6, 6, 6, 6], dtype=np.int64),
+        np.array([0.01, 27289, 107000, 43000, 18500000], dtype=np.float64),
+        {18: "Mineral", 25: "Frigate", 26: "Cruiser", 541: "Interdictor", 485: "Dreadnought"},
+        {4: "Material", 6: "Ship"},
+    )
+
+
+def scan(*rows: tuple[int, str]) -> str:
+    return "\n".join(f"{type_id}\tSomeone's {name}\t{name}\t1,000 km" for type_id, name in rows)
+
+
+def test_parse_dscan(types):
+    result = parse_dscan(scan((587, "Rifter"), (587, "Rifter"), (22456, "Sabre"), (19720, "Revelation"), (34, "Tritanium"), (0, "Unknown Thing")), types)
+
+    assert result.ships == {"Rifter": 2, "Sabre": 1, "Revelation": 1}
+    assert result.classes == {"Frigate": 2, "Interdictor": 1, "Dreadnought": 1}
+    assert result.flags == {"dictor": 1, "capital": 1}
+    assert result.others == 1
+    assert result.unresolved == 1
+    assert result.total_ships == 4
+
+
+def test_parse_dscan_falls_back_to_type_name(types):
+    # Some tools drop the type id column contents, the name still resolves
+    assert parse_dscan("x\tSomeone's Osprey\tOsprey\t-", types).ships == {"Osprey": 1}
+
+
+def test_diff_dscan():
+    previous = DscanResult(ships={"Rifter": 3, "Sabre": 1})
+    current = DscanResult(ships={"Rifter": 1, "Osprey": 4, "Sabre": 1})
+
+    assert diff_dscan(previous, current) == {"Osprey": 4, "Rifter": -2}
+
+
+def test_dscan_history():
+    history = DscanHistory()
+
+    assert history.push(DscanResult(ships={"Rifter": 1})) is None
+    assert history.push(DscanResult(ships={"Rifter": 1})) == {}
+    assert history.push(DscanResult(ships={"Sabre": 2})) == {"Sabre": 2, "Rifter": -1}
+
+
+def test_dscan_clipboard_keeps_history_on_empty_paste(qapp, monkeypatch):
+    from PySide6 import QtGui
+
+    from evex import commands
+
+    history = DscanHistory()
+    monkeypatch.setattr(commands, "dscan_history", history)
+
+    def run(text: str) -> str:
+        QtGui.QGuiApplication.clipboard().setText(text)
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(commands.dscan_clipboard(None, None, []))
+        finally:
+            loop.close()
+
+    run(scan((587, "Rifter"), (587, "Rifter")))
+
+    assert run("not a scan") == "nothing to analyse in the clipboard"
+    assert history.previous.ships == {"Rifter": 2}
+
+    assert "since last scan: -1 Rifter, +1 Sabre" in run(scan((587, "Rifter"), (22456, "Sabre")))
@@ -0,0 +1,197 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from evex import esi
+from evex.esi_cache import EsiCache, EsiCacheEntry, get_expires_at
+from evex.models import EsiCharacter
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body=None, headers: dict | None = None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+
+    def json(self):
+        return self.body
+
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"{self.status_code} error")
+
+
+class FakeSession:
+    def __init__(self):
+        self.responses: list[FakeResponse] = []
+        self.requests: list[tuple[str, dict]] = []
+
+
+    def get(self, url, headers=None):
+        self.requests.append((url, dict(headers or {})))
+
+        return self.responses.pop(0)
+
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+@pytest.fixture
+def fake_session(monkeypatch):
+    fake = FakeSession()
+
+    monkeypatch.setattr(esi, "session", lambda: fake)
+    monkeypatch.setattr(esi, "esi_cache", EsiCache())
+
+    return fake
+
+
+@pytest.fixture
+def character():
+    return EsiCharacter(id=90000001, name="Cached Pilot", access_token="token", refresh_token="refresh", expires_at=int(time.time()) + 1200)
+
+
+def test_lru_eviction():
+    cache = EsiCache(max_entries=2)
+
+    cache.put((None, "/a/"), EsiCacheEntry("a", 0))
+    cache.put((None, "/b/"), EsiCacheEntry("b", 0))
+
+    # Reading an entry makes it the most recently used
+    cache.get((None, "/a/"))
+    cache.put((None, "/c/"), EsiCacheEntry("c", 0))
+
+    assert len(cache) == 2
+    assert cache.get((None, "/b/")) is None
+    assert cache.get((None, "/a/")).data == "a" and cache.get((None, "/c/")).data == "c"
+
+    # Replacing an entry doesn't grow the cache
+    cache.put((None, "/c/"), EsiCacheEntry("c2", 0))
+    cache.put((None, "/d/"), EsiCacheEntry("d", 0))
+
+    assert cache.get((None, "/a/")) is None
+    assert cache.get((None, "/c/")).data == "c2"
+
+
+def test_clear_character():
+    cache = EsiCache()
+
+    cache.put((1, "/characters/1/location/"), EsiCacheEntry("one", 0))
+    cache.put((2, "/characters/2/location/"), EsiCacheEntry("two", 0))
+    cache.put((None, "/status/"), EsiCacheEntry("status", 0))
+
+    cache.clear(1)
+    assert cache.get((1, "/characters/1/location/")) is None
+    assert len(cache) == 2
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_get_fresh():
+    cache = EsiCache()
+
+    cache.put((None, "/fresh/"), EsiCacheEntry("fresh", time.time() + 60))
+    cache.put((None, "/stale/"), EsiCacheEntry("stale", time.time() - 1))
+
+    assert cache.get_fresh((None, "/fresh/")) == "fresh"
+    assert cache.get_fresh((None, "/stale/")) is None
+    assert cache.get_fresh((None, "/missing/")) is None
+
+
+def test_expires_at_uses_server_clock():
+    now = time.time()
+
+    # The server's clock is an hour behind, only the difference between its headers counts
+    served_at = now - 3600
+    response = FakeResponse(200, headers={"Date": http_date(served_at), "Expires": http_date(served_at + 300)})
+    assert get_expires_at(response) == pytest.approx(now + 300, abs=2)
+
+    # No Date header, measure against the local clock
+    response = FakeResponse(200, headers={"Expires": http_date(now + 300)})
+    assert get_expires_at(response) == pytest.approx(now + 300, abs=2)
+
+    # Already expired when served
+    response = FakeResponse(200, headers={"Date": http_date(now), "Expires": http_date(now - 60)})
+    assert get_expires_at(response) == pytest.approx(now, abs=2)
+
+
+@pytest.mark.parametrize("headers", [{}, {"Expires": "not a date"}, {"Expires": http_date(time.time()), "Date": "garbage"}])
+def test_expires_at_without_usable_headers(headers):
+    assert get_expires_at(FakeResponse(200, headers=headers)) == 0
+
+
+def test_esi_get_serves_fresh_responses_from_cache(fake_session, character):
+    now = time.time()
+    fake_session.responses.append(FakeResponse(200, {"solar_system_id": 30000142}, {"Date": http_date(now), "Expires": http_date(now + 5)}))
+
+    first = esi.esi_get("/characters/90000001/location/", character)
+    second = esi.esi_get("/characters/90000001/location/", character)
+
+    assert first == second == {"solar_system_id": 30000142}
+    assert len(fake_session.requests) == 1
+
+    url, headers = fake_session.requests[0]
+    assert url == f"{esi.ESI_BASE_URL}/characters/90000001/location/"
+    assert headers == {"Authorization": "Bearer token"}
+
+
+def test_esi_get_revalidates_stale_responses(fake_session, character):
+    now = time.time()
+    fake_session.responses.append(FakeResponse(200, {"solar_system_id": 30000142}, {
+        "Date": http_date(now),
+        "Expires": http_date(now - 1),
+        "ETag": '"abc"',
+        "Last-Modified": http_date(now - 600),
+    }))
+    fake_session.responses.append(FakeResponse(304, None, {"Date": http_date(now), "Expires": http_date(now + 60)}))
+
+    first = esi.esi_get("/characters/90000001/location/", character)
+    second = esi.esi_get("/characters/90000001/location/", character)
+
+    # Not modified, the body cached from the first response is handed out again
+    assert second is first
+
+    _, headers = fake_session.requests[1]
+    assert headers["If-None-Match"] == '"abc"'
+    assert headers["If-Modified-Since"] == http_date(now - 600)
+
+    entry = esi.esi_cache.get(esi.esi_cache_key("/characters/90000001/location/", character))
+    assert entry.expires_at == pytest.approx(now + 60, abs=2)
+    assert entry.etag == '"abc"'
+
+    # Fresh again, no third request
+    assert esi.esi_get("/characters/90000001/location/", character) is first
+    assert len(fake_session.requests) == 2
+
+
+def test_esi_get_replaces_modified_responses(fake_session):
+    now = time.time()
+    fake_session.responses.append(FakeResponse(200, {"players": 1}, {"Date": http_date(now), "Expires": http_date(now - 1), "ETag": '"one"'}))
+    fake_session.responses.append(FakeResponse(200, {"players": 2}, {"Date": http_date(now), "Expires": http_date(now + 30), "ETag": '"two"'}))
+
+    esi.esi_get("/status/")
+
+    assert esi.esi_get("/status/") == {"players": 2}
+    assert fake_session.requests[1][1] == {"If-None-Match": '"one"'}
+    assert esi.esi_cache.get(esi.esi_cache_key("/status/")).etag == '"two"'
+
+
+def test_esi_get_errors_are_not_cached(fake_session):
+    fake_session.responses.append(FakeResponse(502))
+
+    with pytest.raises(Exception, match="502"):
+        esi.esi_get("/status/")
+
+    assert len(esi.esi_cache) == 0
+
+
+def test_cache_keys_are_per_character(character):
+    other = character.model_copy(update={"id": 90000002})
+
+    assert esi.esi_cache_key("/characters/location/", character) != esi.esi_cache_key("/characters/location/", other)
+    assert esi.esi_cache_key("/status/") == (None, "/status/")
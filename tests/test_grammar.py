@@ -0,0 +1,134 @@
+import pytest
+
+from evex.grammar import CharacterSelector, Command, CommandGrammar, CommandPredicate, CompletionType
+
+
+def action(character, modifier, args):
+    return None
+
+
+ROUTE = Command(
+    modifiers=["safest", "shortest"],
+    predicates=[
+        CommandPredicate(text="route", arg_completion_type=CompletionType.SYSTEM),
+        CommandPredicate(text="to", arg_completion_type=CompletionType.SYSTEM),
+        CommandPredicate(text="avoid", arg_completion_type=CompletionType.SYSTEM, optional=True),
+    ],
+    action=action,
+)
+
+WAYPOINT = Command(
+    predicates=[CommandPredicate(text="set waypoint", arg_completion_type=CompletionType.SYSTEM)],
+    fan_out=True,
+    action=action,
+)
+
+LOGOUT = Command(
+    predicates=[CommandPredicate(text="logout", arg_completion_type=CompletionType.NONE)],
+    action=action,
+)
+
+GRAMMAR = CommandGrammar([ROUTE, WAYPOINT, LOGOUT])
+
+
+def test_parse_args():
+    parsed = GRAMMAR.parse("route Jita to New Caldari")
+
+    assert parsed.command is ROUTE
+    assert parsed.modifier is None
+    assert parsed.selector is None
+    assert parsed.args == ["Jita", "New Caldari", ""]
+    assert parsed.predicate_index == 1
+    assert parsed.completion_type == CompletionType.SYSTEM
+
+
+def test_parse_modifier():
+    parsed = GRAMMAR.parse("Safest route Jita to Amarr avoid Niarja")
+
+    assert parsed.command is ROUTE
+    assert parsed.modifier == "safest"
+    assert parsed.args == ["Jita", "Amarr", "Niarja"]
+    assert parsed.predicate_index == 2
+
+
+def test_parse_optional_predicate_after_required():
+    # avoid is only reachable once the required "to" has been passed
+    assert GRAMMAR.parse("route Jita avoid Niarja").args == ["Jita avoid Niarja", "", ""]
+    assert GRAMMAR.parse("route Jita to Amarr").args == ["Jita", "Amarr", ""]
+
+
+def test_parse_predicate_word_as_argument():
+    # Straight after a keyword the next word is always the argument, even if it is a predicate word
+    assert GRAMMAR.parse("route to to avoid").args == ["to", "avoid", ""]
+
+
+def test_parse_multi_word_intent():
+    parsed = GRAMMAR.parse("set waypoint Jita")
+
+    assert parsed.command is WAYPOINT
+    assert parsed.args == ["Jita"]
+
+    # Half an intent isn't a command
+    assert GRAMMAR.parse("set Jita").command is None
+
+
+def test_parse_select_all():
+    parsed = GRAMMAR.parse("all set waypoint Jita")
+
+    assert parsed.command is WAYPOINT
+    assert parsed.selector == CharacterSelector()
+    assert parsed.args == ["Jita"]
+
+
+def test_parse_select_group():
+    parsed = GRAMMAR.parse("group Miners set waypoint Jita")
+
+    assert parsed.command is WAYPOINT
+    assert parsed.selector == CharacterSelector(group="Miners")
+    assert parsed.args == ["Jita"]
+
+
+@pytest.mark.parametrize("text, group", [("group", ""), ("group ", ""), ("group Min", "Min")])
+def test_parse_partial_group(text, group):
+    # Still typing the group name, nothing to complete yet
+    parsed = GRAMMAR.parse(text)
+
+    assert parsed.command is None
+    assert parsed.selector == CharacterSelector(group=group)
+    assert parsed.completion_type == CompletionType.NONE
+
+
+@pytest.mark.parametrize("text", ["all logout", "group Miners route Jita to Amarr"])
+def test_parse_rejects_selector_without_fan_out(text):
+    parsed = GRAMMAR.parse(text)
+
+    assert parsed.command is None
+    assert parsed.selector is not None
+    assert parsed.error.endswith("can't target multiple characters")
+
+
+@pytest.mark.parametrize("text", ["", "warp to Jita", "safest", "all", "shortest logout"])
+def test_parse_unknown_command(text):
+    parsed = GRAMMAR.parse(text)
+
+    assert parsed.command is None
+    assert parsed.error is None
+
+
+def test_command_match():
+    assert ROUTE.match("shortest route Jita to Amarr")
+    assert not ROUTE.match("logout")
+    assert ROUTE.parse("shortest route Jita to Amarr") == ("shortest", ["Jita", "Amarr", ""])
+
+
+@pytest.mark.parametrize("text, start", [
+    ("route Jita to New  Caldari", 14),
+    ("route Jita to New Caldari ", 14),
+    ("route Jita to ", 14),
+    ("route Jita to", 13),
+    ("route to to", 11),
+    ("route to", 6),
+])
+def test_parse_arg_start(text, start):
+    # Completing replaces everything from here on, however many words the argument has
+    assert GRAMMAR.parse(text).arg_start == start
@@ -0,0 +1,192 @@
+import heapq
+import math
+import random
+
+import numpy as np
+import pytest
+
+from evex.jump import LIGHT_YEAR, POCHVEN_REGION_ID, WORMHOLE_REGION_ID_MIN, JumpPlanObjective, JumpRangeEngine, get_jump_range, get_jump_ship
+from evex.sde import SolarSystem, SolarSystemIndex
+
+
+def make_index(systems: list[tuple[int, str, int, float, tuple[float, float, float]]]) -> SolarSystemIndex:
+    solar_systems = [
+        SolarSystem(id=system_id, name=name, region_id=region_id, region_name=None, constellation_id=0, constellation_name=None, security=security)
+        for system_id, name, region_id, security, _ in systems
+    ]
+    coordinates = np.array([position for *_, position in systems], dtype=np.float64) * LIGHT_YEAR
+
+    return SolarSystemIndex.from_systems(solar_systems, coordinates)
+
+
+def test_in_range():
+    engine = JumpRangeEngine(make_index([
+        (1, "Origin", 10000001, 0.1, (0, 0, 0)),
+        (2, "Near", 10000001, -0.2, (3, 0, 0)),
+        (3, "Far", 10000001, 0.2, (9, 0, 0)),
+        (4, "Highsec", 10000001, 0.9, (1, 0, 0)),
+    ]))
+
+    positions, distances = engine.in_range(0, 5)
+
+    assert positions.tolist() == [1]
+    assert distances.tolist() == [3]
+
+
+def test_in_range_without_candidates():
+    engine = JumpRangeEngine(make_index([
+        (1, "Isolated", 10000001, 0.1, (0, 0, 0)),
+        (2, "Elsewhere", 10000001, 0.1, (500, 0, 0)),
+        (31000001, "J100001", WORMHOLE_REGION_ID_MIN, -1.0, (250, 0, 0)),
+    ]))
+
+    for position in (0, 2):
+        positions, distances = engine.in_range(position, 5)
+
+        assert len(positions) == len(distances) == 0
+
+    origin = engine.index.get("J100001")
+    assert engine.systems_in_range(origin, 5) == []
+    assert engine.plan(engine.index.get("Isolated"), engine.index.get("Elsewhere"), get_jump_ship(None), 5) is None
+
+
+# Each objective has its own best way from A to D within 7 LY (an Archon at JDC 5)
+ROUTES = [
+    (1, "A", 10000001, 0.3, (0, 0, 0)),
+    (2, "D", 10000001, 0.3, (10, 0, 0)),
+    # Two even jumps, the fewest light years of any two jump plan
+    (3, "X", 10000001, 0.3, (5, 1.2, 0)),
+    # Two uneven jumps, further but fatigue grows less
+    (4, "Y", 10000001, 0.3, (3.5, 1.5, 0)),
+    # Three jumps in a straight line
+    (5, "C1", 10000001, 0.3, (2.5, 0, 0)),
+    (6, "C2", 10000001, 0.3, (7.5, 0, 0)),
+]
+
+
+@pytest.mark.parametrize("objective, names", [
+    (JumpPlanObjective.JUMPS, ["X", "D"]),
+    (JumpPlanObjective.DISTANCE, ["C1", "C2", "D"]),
+    (JumpPlanObjective.FATIGUE, ["Y", "D"]),
+])
+def test_plan_objectives(objective, names):
+    engine = JumpRangeEngine(make_index(ROUTES))
+    ship = get_jump_ship(None)
+    range_ly = get_jump_range(ship, 5)
+
+    plan = engine.plan(engine.index.get("A"), engine.index.get("D"), ship, range_ly, objective)
+
+    assert [hop.system.name for hop in plan.hops] == names
+    assert all(hop.distance <= range_ly for hop in plan.hops)
+
+
+def test_plan_fatigue_and_reactivation():
+    engine = JumpRangeEngine(make_index([
+        (1, "A", 10000001, 0.3, (0, 0, 0)),
+        (2, "B", 10000001, 0.3, (3, 0, 0)),
+        (3, "C", 10000001, 0.3, (6, 0, 0)),
+    ]))
+    origin, destination = engine.index.get("A"), engine.index.get("C")
+
+    # Archon at JDC 0 reaches 3.5 LY, two jumps of 3
+    plan = engine.plan(origin, destination, get_jump_ship(None), get_jump_range(get_jump_ship(None), 0))
+
+    assert [(hop.system.name, hop.distance, hop.fatigue, hop.reactivation) for hop in plan.hops] == [
+        ("B", 3, 40, 4),
+        ("C", 3, 144, 4),
+    ]
+    assert plan.distance == 6 and plan.fatigue == 144
+
+    # A jump freighter only feels 10% of each light year
+    plan = engine.plan(origin, destination, get_jump_ship("jf"), 3.5)
+
+    assert [(hop.fatigue, hop.reactivation) for hop in plan.hops] == [
+        pytest.approx((13, 1.3)),
+        pytest.approx((11.7 * 1.3, 1.3)),
+    ]
+
+
+def test_plan_refuses_highsec_and_pochven():
+    engine = JumpRangeEngine(make_index([
+        (1, "Lowsec", 10000001, 0.3, (0, 0, 0)),
+        (2, "Highsec", 10000001, 0.5, (1, 0, 0)),
+        (3, "Pochven", POCHVEN_REGION_ID, -1.0, (2, 0, 0)),
+        (4, "Nullsec", 10000001, -0.5, (3, 0, 0)),
+    ]))
+    ship = get_jump_ship(None)
+    lowsec = engine.index.get("Lowsec")
+
+    for name in ("Highsec", "Pochven"):
+        system = engine.index.get(name)
+
+        assert engine.plan(lowsec, system, ship, 7) is None
+        assert engine.plan(system, lowsec, ship, 7) is None
+
+    assert [system.name for system, _ in engine.systems_in_range(lowsec, 7)] == ["Nullsec"]
+    assert [hop.system.name for hop in engine.plan(lowsec, engine.index.get("Nullsec"), ship, 7).hops] == ["Nullsec"]
+    assert engine.plan(lowsec, lowsec, ship, 7).hops == []
+
+
+def brute_force(distances: np.ndarray, jumpable: np.ndarray, start: int, end: int, range_ly: float, cost) -> float:
+    # Plain Dijkstra over every pair of systems in range
+    best = {start: 0.0}
+    queue = [(0.0, start)]
+    done = set()
+
+    while queue:
+        total, position = heapq.heappop(queue)
+        if position in done:
+            continue
+        if position == end:
+            return total
+
+        done.add(position)
+
+        for neighbour in np.flatnonzero(jumpable & (distances[position] <= range_ly)).tolist():
+            if neighbour == position:
+                continue
+
+            candidate = total + cost(distances[position, neighbour])
+            if candidate < best.get(neighbour, math.inf):
+                best[neighbour] = candidate
+                heapq.heappush(queue, (candidate, neighbour))
+
+    return math.inf
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_plan_is_optimal(seed):
+    rng = random.Random(seed)
+    systems = [
+        (i + 1, f"S{i}", 10000001, rng.choice([0.9, 0.3, 0.1, -0.4, -0.8]), (rng.uniform(0, 20), rng.uniform(0, 20), rng.uniform(0, 5)))
+        for i in range(60)
+    ]
+    engine = JumpRangeEngine(make_index(systems))
+
+    coordinates = engine.coordinates
+    distances = np.linalg.norm(coordinates[:, None] - coordinates[None, :], axis=2)
+    jumpable = engine.jumpable
+
+    ship = get_jump_ship(rng.choice([None, "blops", "jf"]))
+    range_ly = get_jump_range(ship, rng.randint(0, 5))
+    efficiency = 1 - ship.fatigue_reduction
+
+    costs = {
+        JumpPlanObjective.JUMPS: lambda distance: 1,
+        JumpPlanObjective.DISTANCE: lambda distance: distance,
+        JumpPlanObjective.FATIGUE: lambda distance: math.log1p(distance * efficiency),
+    }
+
+    pairs = [(start, end) for start in np.flatnonzero(jumpable).tolist() for end in np.flatnonzero(jumpable).tolist() if start != end]
+    for start, end in rng.sample(pairs, 20):
+        for objective, cost in costs.items():
+            expected = brute_force(distances, jumpable, start, end, range_ly, cost)
+            plan = engine.plan(engine.index.systems[start], engine.index.systems[end], ship, range_ly, objective)
+
+            if expected == math.inf:
+                assert plan is None
+                continue
+
+            assert all(hop.distance <= range_ly for hop in plan.hops)
+            assert plan.hops[-1].system.id == engine.index.ids[end]
+            assert sum(cost(hop.distance) for hop in plan.hops) == pytest.approx(expected)
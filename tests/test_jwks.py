@@ -0,0 +1,207 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from evex import jwks
+from evex.jwks import JWKS_MIN_REFETCH_INTERVAL, JWKS_RETIRED_TTL, JWKS_TTL, JwksCache
+
+requests = pytest.importorskip("requests")
+
+KEY = {"kid": "JWT-Signature-Key", "alg": "RS256", "kty": "RSA", "n": "AQAB", "e": "AQAB"}
+NEW_KEY = {"kid": "JWT-Signature-Key-2", "alg": "RS256", "kty": "RSA", "n": "AQAC", "e": "AQAB"}
+OTHER_KEY = {"kid": "JWT-Other-Key", "alg": "ES256", "kty": "EC"}
+
+
+class FakeResponse:
+    def __init__(self, keys: list[dict]):
+        self.keys = keys
+
+
+    def raise_for_status(self):
+        pass
+
+
+    def json(self):
+        return {"keys": self.keys}
+
+
+class FakeSession:
+    def __init__(self):
+        self.keys: list[dict] | None = [KEY]
+        self.requests = 0
+
+
+    def get(self, url, timeout=None):
+        self.requests += 1
+
+        if self.keys is None:
+            raise requests.ConnectionError("keys endpoint is down")
+
+        return FakeResponse(self.keys)
+
+
+@pytest.fixture
+def endpoint(monkeypatch):
+    fake = FakeSession()
+    monkeypatch.setattr(jwks, "session", lambda: fake)
+
+    return fake
+
+
+def allow_refetch(cache: JwksCache):
+    cache.last_attempt_at -= JWKS_MIN_REFETCH_INTERVAL
+
+
+@pytest.fixture
+def unreachable_cache(monkeypatch):
+    cache = JwksCache("http://127.0.0.1:9/oauth/jwks")
+    cache._loaded = True
+
+    attempts = []
+
+    def fetch(now):
+        attempts.append(now)
+        cache.last_attempt_at = now
+
+        raise requests.ConnectionError("keys endpoint is down")
+
+    monkeypatch.setattr(cache, "_fetch", fetch)
+
+    return cache, attempts
+
+
+def test_stale_key_served_while_endpoint_is_down(unreachable_cache):
+    cache, attempts = unreachable_cache
+    cache.keys = {KEY["kid"]: KEY}
+    cache.fetched_at = time.time() - JWKS_TTL - 1
+
+    # One refetch attempt, then the stale key is served without waiting on the endpoint again
+    assert cache.get_key(KEY["kid"]) == KEY
+    assert cache.get_key(KEY["kid"]) == KEY
+    assert cache.get_key(None) == KEY
+    assert len(attempts) == 1
+
+    cache.last_attempt_at -= JWKS_MIN_REFETCH_INTERVAL
+
+    assert cache.get_key(KEY["kid"]) == KEY
+    assert len(attempts) == 2
+
+
+def test_unknown_key_refetch_is_rate_limited(unreachable_cache):
+    cache, attempts = unreachable_cache
+
+    assert cache.get_key("bogus") is None
+    assert cache.get_key("bogus") is None
+    assert len(attempts) == 1
+
+
+def test_esi_import_has_no_side_effects(tmp_path):
+    env = {**os.environ, "HOME": str(tmp_path)}
+
+    subprocess.run([sys.executable, "-c", "import evex.esi"], check=True, env=env, cwd=os.path.dirname(os.path.dirname(__file__)))
+
+    assert not (tmp_path / ".config").exists()
+
+
+def test_kid_rollover_keeps_retired_keys(endpoint):
+    cache = JwksCache("https://login.example/oauth/jwks")
+    endpoint.keys = [KEY, OTHER_KEY]
+
+    assert cache.get_key(KEY["kid"]) == KEY
+    # Only keys for the expected algorithm are kept
+    assert cache.get_key(OTHER_KEY["kid"]) is None
+    assert list(cache.keys) == [KEY["kid"]]
+
+    # CCP rotates the signing key, the first token signed with it triggers a refetch
+    endpoint.keys = [NEW_KEY]
+    allow_refetch(cache)
+
+    assert cache.get_key(NEW_KEY["kid"]) == NEW_KEY
+    assert cache.get_key(None) == NEW_KEY
+    requests_after_rollover = endpoint.requests
+
+    # Tokens issued before the rollover still verify, without asking again
+    assert cache.get_key(KEY["kid"]) == KEY
+    assert endpoint.requests == requests_after_rollover
+
+    # Until the retired key has been gone for long enough
+    jwk, retired_at = cache.retired[KEY["kid"]]
+    cache.retired[KEY["kid"]] = (jwk, retired_at - JWKS_RETIRED_TTL)
+
+    assert cache.get_key(KEY["kid"]) is None
+
+
+def test_retired_key_that_returns_is_current_again(endpoint):
+    cache = JwksCache("https://login.example/oauth/jwks")
+
+    cache.get_key(KEY["kid"])
+    endpoint.keys = [NEW_KEY]
+    allow_refetch(cache)
+    cache.get_key(NEW_KEY["kid"])
+
+    assert KEY["kid"] in cache.retired
+
+    endpoint.keys = [KEY, NEW_KEY]
+    allow_refetch(cache)
+    cache.get_key("bogus")
+
+    assert cache.retired == {}
+    assert set(cache.keys) == {KEY["kid"], NEW_KEY["kid"]}
+
+
+def test_keys_survive_a_restart(endpoint, tmp_path):
+    path = tmp_path / "jwks.json"
+
+    cache = JwksCache("https://login.example/oauth/jwks", path)
+    cache.get_key(KEY["kid"])
+    endpoint.keys = [NEW_KEY]
+    allow_refetch(cache)
+    cache.get_key(NEW_KEY["kid"])
+
+    # Next start, SSO is unreachable but the keys on disk are still fresh
+    endpoint.keys = None
+    endpoint.requests = 0
+    restarted = JwksCache("https://login.example/oauth/jwks", path)
+
+    assert restarted.get_key(NEW_KEY["kid"]) == NEW_KEY
+    assert restarted.get_key(KEY["kid"]) == KEY
+    assert restarted.fetched_at == cache.fetched_at
+    assert endpoint.requests == 0
+
+
+def test_unreadable_key_file_is_refetched(endpoint, tmp_path):
+    path = tmp_path / "jwks.json"
+    path.write_text('{"fetched_at": 1, "keys": {"JWT-Sig')
+
+    cache = JwksCache("https://login.example/oauth/jwks", path)
+
+    assert cache.get_key(KEY["kid"]) == KEY
+    assert endpoint.requests == 1
+    assert JwksCache("https://login.example/oauth/jwks", path).get_key(KEY["kid"]) == KEY
+
+
+def test_save_replaces_atomically(endpoint, tmp_path, monkeypatch):
+    path = tmp_path / "jwks.json"
+
+    cache = JwksCache("https://login.example/oauth/jwks", path)
+    cache.get_key(KEY["kid"])
+
+    def crash(fd):
+        raise OSError("disk full")
+
+    # Dies halfway through writing the new keys, the old file has to stay loadable
+    monkeypatch.setattr(os, "fsync", crash)
+
+    endpoint.keys = [NEW_KEY]
+    allow_refetch(cache)
+    assert cache.get_key(NEW_KEY["kid"]) == NEW_KEY
+
+    monkeypatch.undo()
+    monkeypatch.setattr(jwks, "session", lambda: endpoint)
+    endpoint.keys = None
+
+    assert JwksCache("https://login.example/oauth/jwks", path).get_key(KEY["kid"]) == KEY
+    assert os.listdir(tmp_path) == ["jwks.json"]
@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+import pytest
+
+from evex import esi, location_tracker
+from evex.esi_cache import EsiCacheEntry
+from evex.location_tracker import OFFLINE_POLL_INTERVAL, ONLINE_POLL_INTERVAL, CharacterLocation, LocationTracker
+from evex.models import EsiCharacter
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def character():
+    character = EsiCharacter(id=90000001, name="Tracked Pilot", access_token="", refresh_token="refresh", expires_at=0)
+
+    yield character
+
+    esi.esi_cache.clear(character.id)
+
+
+@pytest.fixture
+def esi_responses(monkeypatch):
+    # path -> response body, every requested path is recorded
+    responses = {}
+    requested = []
+
+    async def esi_get(path, character=None):
+        requested.append(path)
+        return responses[path]
+
+    monkeypatch.setattr(location_tracker, "esi_get", esi_get)
+
+    return responses, requested
+
+
+@pytest.fixture
+def tracker(qapp):
+    tracker = LocationTracker()
+    changes = []
+    tracker.system_changed.connect(lambda character_id, solar_system_id: changes.append((character_id, solar_system_id)))
+
+    return tracker, changes
+
+
+def set_online(responses, character, online: bool, solar_system_id: int = 30000142):
+    responses[f"/characters/{character.id}/online/"] = {"online": online}
+    responses[f"/characters/{character.id}/location/"] = {"solar_system_id": solar_system_id, "station_id": 60003760}
+    responses[f"/characters/{character.id}/ship/"] = {"ship_type_id": 587, "ship_name": "Speedy"}
+
+
+def test_poll_online(tracker, esi_responses, character):
+    tracker, changes = tracker
+    responses, requested = esi_responses
+    set_online(responses, character, True)
+
+    location = run(tracker.poll(character))
+
+    assert location.online and location.solar_system_id == 30000142 and location.station_id == 60003760
+    assert location.ship_type_id == 587 and location.ship_name == "Speedy"
+    assert tracker.get(character.id) == location
+    assert len(requested) == 3
+
+
+def test_poll_offline_reuses_last_location(tracker, esi_responses, character):
+    tracker, changes = tracker
+    responses, requested = esi_responses
+    set_online(responses, character, True)
+    run(tracker.poll(character))
+
+    set_online(responses, character, False, 30002187)
+    requested.clear()
+
+    location = run(tracker.poll(character))
+
+    # Logged off characters stay where they were, only online status is asked for
+    assert requested == [f"/characters/{character.id}/online/"]
+    assert not location.online and location.solar_system_id == 30000142
+
+
+def test_poll_offline_looks_up_unknown_location(tracker, esi_responses, character):
+    tracker, changes = tracker
+    responses, requested = esi_responses
+    set_online(responses, character, False)
+
+    assert run(tracker.poll(character)).solar_system_id == 30000142
+    assert len(requested) == 3
+
+
+def test_system_changed(tracker, esi_responses, character):
+    tracker, changes = tracker
+    responses, requested = esi_responses
+
+    set_online(responses, character, True)
+    run(tracker.poll(character))
+    run(tracker.poll(character))
+
+    set_online(responses, character, True, 30002187)
+    run(tracker.poll(character))
+
+    assert changes == [(character.id, 30000142), (character.id, 30002187)]
+
+
+def test_next_poll_delay_defaults_to_the_interval(character):
+    tracker = LocationTracker()
+
+    assert tracker.next_poll_delay(character, CharacterLocation(character_id=character.id, online=True)) == ONLINE_POLL_INTERVAL
+    assert tracker.next_poll_delay(character, CharacterLocation(character_id=character.id, online=False)) == OFFLINE_POLL_INTERVAL
+
+
+def test_next_poll_delay_waits_for_expires(character):
+    tracker = LocationTracker()
+
+    esi.esi_cache.put(esi.esi_cache_key(f"/characters/{character.id}/location/", character), EsiCacheEntry({}, time.time() + 30))
+    esi.esi_cache.put(esi.esi_cache_key(f"/characters/{character.id}/online/", character), EsiCacheEntry({}, time.time() + 120))
+
+    assert tracker.next_poll_delay(character, CharacterLocation(character_id=character.id, online=True)) == pytest.approx(30, abs=1)
+    assert tracker.next_poll_delay(character, CharacterLocation(character_id=character.id, online=False)) == pytest.approx(120, abs=1)
+
+    # Expired or about to, the interval still spaces out polls
+    esi.esi_cache.put(esi.esi_cache_key(f"/characters/{character.id}/location/", character), EsiCacheEntry({}, time.time() + 1))
+    assert tracker.next_poll_delay(character, CharacterLocation(character_id=character.id, online=True)) == ONLINE_POLL_INTERVAL
+
+
+@pytest.mark.parametrize("online, age, fresh", [
+    (True, ONLINE_POLL_INTERVAL, True),
+    (True, 3 * ONLINE_POLL_INTERVAL, False),
+    (False, 3 * ONLINE_POLL_INTERVAL, True),
+    (False, 3 * OFFLINE_POLL_INTERVAL, False),
+])
+def test_location_max_age_follows_online_status(online, age, fresh):
+    tracker = LocationTracker()
+    location = CharacterLocation(character_id=1, solar_system_id=30000142, online=online, updated_at=time.time() - age)
+    tracker.locations[1] = location
+
+    assert location.is_fresh() is fresh
+    assert (tracker.get(1) is not None) is fresh
@@ -0,0 +1,63 @@
+import pytest
+
+from evex.completion import CompletionIndex
+
+SYSTEMS = ["New Caldari", "BCAL-5707", "1DQ1-A", "1-SMEB", "Jita", "Amarr"]
+
+
+@pytest.fixture
+def omnibox(qapp):
+    from evex.gui.omnibox_widget import OmniboxWidget
+
+    widget = OmniboxWidget()
+    widget.setCompletionIndex(CompletionIndex(SYSTEMS))
+    widget.show()
+
+    yield widget
+
+    widget.textbox.completer().popup().hide()
+    widget.close()
+
+
+def type_text(omnibox, text: str):
+    from PySide6 import QtTest
+
+    QtTest.QTest.keyClicks(omnibox.textbox, text)
+
+
+def complete(omnibox):
+    from PySide6 import QtCore, QtTest
+
+    QtTest.QTest.keyClick(omnibox.textbox, QtCore.Qt.Key.Key_Tab)
+
+
+def test_system_query_is_the_whole_argument(omnibox):
+    type_text(omnibox, "show kills in new cal")
+
+    completer = omnibox.textbox.completer()
+    assert completer.completionPrefix() == "new cal"
+    assert completer.currentCompletion() == "New Caldari"
+
+    complete(omnibox)
+    assert omnibox.textbox.toPlainText() == "show kills in New Caldari"
+
+
+@pytest.mark.parametrize("typed, completed", [
+    ("show kills in 1dq1-", "show kills in 1DQ1-A"),
+    ("show kills in bcal-5", "show kills in BCAL-5707"),
+    ("route from Jita to ama", "route from Jita to Amarr"),
+])
+def test_system_completion_replaces_the_argument(omnibox, typed, completed):
+    type_text(omnibox, typed)
+    complete(omnibox)
+
+    assert omnibox.textbox.toPlainText() == completed
+
+
+def test_fuzzy_completion_replaces_what_was_typed(omnibox):
+    type_text(omnibox, "route from jtia to nwe cal")
+
+    assert omnibox.textbox.completer().completionPrefix() == "nwe cal"
+
+    complete(omnibox)
+    assert omnibox.textbox.toPlainText() == "route from jtia to New Caldari"
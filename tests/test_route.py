@@ -0,0 +1,89 @@
+import random
+
+import numpy as np
+import pytest
+
+from evex.route import SECURITY_PENALTY, RoutePreference, build_route_graph
+from evex.sde import SolarSystem, SolarSystemIndex
+
+
+def make_graph(security: list[float], edges: list[tuple[int, int]]):
+    systems = [
+        SolarSystem(id=30000001 + i, name=f"System {i}", region_id=10000001, region_name=None, constellation_id=20000001, constellation_name=None, security=s)
+        for i, s in enumerate(security)
+    ]
+    jumps = np.array([(30000001 + a, 30000001 + b) for a, b in edges] + [(30000001 + b, 30000001 + a) for a, b in edges], dtype=np.int64).reshape(-1, 2)
+
+    return build_route_graph(SolarSystemIndex.from_systems(systems), jumps)
+
+
+def route_cost(graph, path: list[int], preference: RoutePreference) -> int:
+    penalise_highsec = preference == RoutePreference.LESS_SECURE
+
+    return sum(SECURITY_PENALTY if (graph.index.security[p] >= 0.45) == penalise_highsec else 1 for p in path[1:])
+
+
+def assert_valid_path(graph, path: list[int], from_position: int, to_position: int, avoid: set[int]):
+    assert path[0] == from_position and path[-1] == to_position
+    assert all(b in graph.neighbours(a) for a, b in zip(path, path[1:]))
+    assert not set(path[1:-1]) & avoid
+
+
+@pytest.fixture
+def line():
+    # 0 - 1 - 2 - 3 - 4, with a lowsec detour 0 - 5 - 6 - 4
+    return make_graph([1.0, 1.0, 1.0, 1.0, 1.0, 0.2, 0.2], [(0, 1), (1, 2), (2, 3), (3, 4), (0, 5), (5, 6), (6, 4)])
+
+
+def test_bfs_and_dijkstra_agree_on_random_graphs():
+    rnd = random.Random(7)
+
+    for _ in range(20):
+        count = 60
+        edges = {(i, (i + 1) % count) for i in range(count)} | {tuple(rnd.sample(range(count), 2)) for _ in range(40)}
+
+        # Every system in one security band, so Dijkstra's costs are plain jump counts
+        graph = make_graph([0.9] * count, sorted(edges))
+
+        for _ in range(20):
+            from_position, to_position = rnd.sample(range(count), 2)
+            avoid = set(rnd.sample(range(count), 8))
+
+            bfs = graph.route(from_position, to_position, RoutePreference.SHORTEST, avoid)
+            dijkstra = graph.route(from_position, to_position, RoutePreference.SAFER, avoid)
+
+            assert (bfs is None) == (dijkstra is None)
+            if bfs:
+                assert len(bfs) == len(dijkstra)
+                assert_valid_path(graph, bfs, from_position, to_position, avoid)
+                assert_valid_path(graph, dijkstra, from_position, to_position, avoid)
+
+
+def test_preferences(line):
+    assert line.route(0, 4, RoutePreference.SHORTEST) == [0, 5, 6, 4]
+    assert line.route(0, 4, RoutePreference.SAFER) == [0, 1, 2, 3, 4]
+    assert line.route(0, 4, RoutePreference.LESS_SECURE) == [0, 5, 6, 4]
+    assert route_cost(line, [0, 1, 2, 3, 4], RoutePreference.SAFER) == 4
+
+
+@pytest.mark.parametrize("preference", list(RoutePreference))
+def test_avoid(line, preference):
+    assert line.route(0, 4, preference, {5}) == [0, 1, 2, 3, 4]
+    assert line.route(0, 4, preference, {2, 6}) is None
+
+
+@pytest.mark.parametrize("preference", list(RoutePreference))
+def test_route_ends_are_never_avoided(line, preference):
+    shortest = line.route(0, 4, preference)
+
+    assert line.route(0, 4, preference, {4}) == shortest
+    assert line.route(0, 4, preference, {0}) == shortest
+    assert line.route(0, 4, preference, {0, 4}) == shortest
+    assert line.route(3, 3, preference, {3}) == [3]
+
+
+@pytest.mark.parametrize("preference", list(RoutePreference))
+def test_unreachable(preference):
+    graph = make_graph([1.0, 1.0, 1.0], [(0, 1)])
+
+    assert graph.route(0, 2, preference) is None
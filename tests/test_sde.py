@@ -0,0 +1,108 @@
+import zipfile
+
+import numpy as np
+import pytest
+
+from evex.sde import SDE_PATH_ENV, get_solar_system, get_solar_system_id, get_solar_system_name, load_solar_system_index, load_solar_system_jumps, load_type_index
+from evex.sde_compact import build_compact_sde
+
+
+@pytest.fixture
+def sqlite_sde():
+    return load_solar_system_index(), load_solar_system_jumps(), load_type_index()
+
+
+def assert_same_sde(expected):
+    index, jumps, types = expected
+
+    compact_index, compact_types = load_solar_system_index(), load_type_index()
+
+    assert list(compact_index.systems) == list(index.systems)
+    assert np.array_equal(compact_index.coordinates, index.coordinates)
+    assert sorted(map(tuple, load_solar_system_jumps().tolist())) == sorted(map(tuple, jumps.tolist()))
+    assert compact_types.names == types.names
+    assert np.array_equal(compact_types.ids, types.ids)
+    assert np.array_equal(compact_types.volumes, types.volumes)
+    assert np.array_equal(compact_types.category_ids, types.category_ids)
+    assert compact_types.group_names == types.group_names
+
+
+def test_solar_system_lookups():
+    jita = get_solar_system("jita ")
+
+    assert jita.id == 30000001 and jita.name == "Jita"
+    assert jita.region_name == "Region 0" and jita.constellation_name == "Constellation 20000001"
+    assert get_solar_system(30000001) is jita
+    assert get_solar_system_id("AMARR") == 30000002
+    assert get_solar_system_name(30000003) == "Perimeter"
+
+    assert get_solar_system("Nowhere") is None and get_solar_system(1) is None
+    assert get_solar_system_id("Nowhere") is None and get_solar_system_name(1) is None
+
+
+def test_compact_sde_matches_sqlite(fixture_sde, sqlite_sde, tmp_path, monkeypatch):
+    build_compact_sde(str(fixture_sde), str(tmp_path))
+    monkeypatch.setenv(SDE_PATH_ENV, str(tmp_path))
+
+    assert_same_sde(sqlite_sde)
+
+
+@pytest.mark.parametrize("extension", [".yaml", ".jsonl"])
+def test_sde_import(fixture_sde, sqlite_sde, tmp_path, monkeypatch, extension):
+    from evex.sde_import import build_sde
+    from fixture_sde import build_fixture_sde_zip
+
+    if extension == ".yaml":
+        pytest.importorskip("yaml")
+
+    export = tmp_path / "sde.zip"
+    output = tmp_path / "sde"
+    build_fixture_sde_zip(str(fixture_sde), str(export), extension)
+
+    assert len(build_sde(str(export), str(output), workers=2, progress=lambda line: None)) == 7
+
+    monkeypatch.setenv(SDE_PATH_ENV, str(output))
+    assert_same_sde(sqlite_sde)
+
+    assert build_sde(str(export), str(output), progress=lambda line: None) == []
+
+    # A patch that only touches groups rebuilds groups, types pick up the new categories without a re-import
+    with zipfile.ZipFile(export, "a") as archive:
+        archive.writestr("sde/groups.jsonl", '{"_key": 18, "name": {"en": "Mineral"}, "categoryID": 6}\n')
+
+    assert build_sde(str(export), str(output), progress=lambda line: None) == ["groups"]
+
+    types = load_type_index()
+    assert types.category_ids[types.find("Tritanium")] == 6
+
+
+def test_sde_import_marks_incomplete_before_writing(fixture_sde, tmp_path, monkeypatch):
+    from evex import sde_import
+    from evex.sde_compact import is_compact_sde
+    from fixture_sde import build_fixture_sde_zip
+
+    export = tmp_path / "sde.zip"
+    output = tmp_path / "sde"
+    build_fixture_sde_zip(str(fixture_sde), str(export), ".jsonl")
+
+    sde_import.build_sde(str(export), str(output), progress=lambda line: None)
+    assert is_compact_sde(str(output))
+
+    class CrashingPool:
+        def __init__(self, max_workers):
+            pass
+
+        def __enter__(self):
+            # Whatever the workers write from here on, the old manifest must not vouch for it
+            assert not is_compact_sde(str(output))
+            raise KeyboardInterrupt
+
+        def __exit__(self, *exc_info):
+            return False
+
+    monkeypatch.setattr(sde_import, "ProcessPoolExecutor", CrashingPool)
+
+    with pytest.raises(KeyboardInterrupt):
+        sde_import.build_sde(str(export), str(output), force=True, progress=lambda line: None)
+
+    assert not is_compact_sde(str(output))
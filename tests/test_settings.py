@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from evex import settings as settings_module
+from evex.models import EsiCharacter
+from evex.settings import Settings, SettingsStore, load_settings, save_settings
+
+
+def character(id: int, name: str | None = None) -> EsiCharacter:
+    return EsiCharacter(id=id, name=name or f"Pilot {id}", access_token="", refresh_token="refresh", expires_at=0)
+
+
+def loaded_store(path, delay: float) -> SettingsStore:
+    store = SettingsStore(path, delay=delay)
+
+    # Loading writes the defaults when there is no file yet
+    store.settings
+
+    return store
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    # Every settings write that reached the disk, in order
+    written = []
+    write = settings_module.write_settings_json
+
+    def counting_write(data, settings_path):
+        write(data, settings_path)
+        written.append(json.loads(data))
+
+    monkeypatch.setattr(settings_module, "write_settings_json", counting_write)
+
+    return written
+
+
+def test_changes_are_batched_into_one_write(tmp_path, writes):
+    store = loaded_store(tmp_path / "settings.json", 0.1)
+    writes.clear()
+
+    for id in range(1, 6):
+        store.put_character(character(id))
+
+    assert writes == []
+
+    wait_for(lambda: writes)
+    time.sleep(0.2)
+
+    assert len(writes) == 1
+    assert sorted(writes[0]["characters"]) == ["1", "2", "3", "4", "5"]
+    assert len(load_settings(tmp_path / "settings.json").characters) == 5
+
+
+def test_flush_writes_now_and_only_when_dirty(tmp_path, writes):
+    store = loaded_store(tmp_path / "settings.json", 60)
+    writes.clear()
+
+    store.put_character(character(1))
+    store.flush()
+    store.flush()
+    store.close()
+
+    assert len(writes) == 1
+    assert load_settings(tmp_path / "settings.json").characters[1].name == "Pilot 1"
+
+
+def test_save_replaces_atomically(tmp_path, monkeypatch):
+    path = tmp_path / "settings.json"
+    save_settings(Settings(groups={"miners": ["Pilot 1"]}), path)
+
+    def crash(fd):
+        raise OSError("disk full")
+
+    # Dies after writing part of the new file, the old one has to survive untouched
+    monkeypatch.setattr(os, "fsync", crash)
+
+    with pytest.raises(OSError):
+        save_settings(Settings(groups={"haulers": ["Pilot 2"] * 1000}), path)
+
+    assert load_settings(path).groups == {"miners": ["Pilot 1"]}
+    assert os.listdir(tmp_path) == ["settings.json"]
+
+
+def test_concurrent_put_character(tmp_path):
+    store = SettingsStore(tmp_path / "settings.json", delay=0.01)
+
+    def put(start: int):
+        for id in range(start, start + 50):
+            store.put_character(character(id))
+
+    threads = [threading.Thread(target=put, args=(start,)) for start in range(0, 400, 50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    store.close()
+
+    assert sorted(load_settings(tmp_path / "settings.json").characters) == list(range(400))
+
+
+def test_failed_background_write_is_retried(tmp_path, monkeypatch, caplog):
+    store = loaded_store(tmp_path / "settings.json", 0.01)
+
+    attempts = []
+    write = settings_module.write_settings_json
+
+    def flaky_write(data, settings_path):
+        attempts.append(data)
+        if len(attempts) == 1:
+            raise OSError("disk full")
+
+        write(data, settings_path)
+
+    monkeypatch.setattr(settings_module, "write_settings_json", flaky_write)
+    monkeypatch.setattr(settings_module, "SAVE_RETRY_DELAY", 0.05)
+
+    store.put_character(character(1))
+
+    wait_for(lambda: len(attempts) == 2)
+    store.close()
+
+    assert "could not write settings" in caplog.text
+    assert load_settings(tmp_path / "settings.json").characters[1].name == "Pilot 1"
+
+
+def test_failed_flush_raises_and_stays_dirty(tmp_path, monkeypatch):
+    store = loaded_store(tmp_path / "settings.json", 60)
+    store.put_character(character(1))
+
+    def failing_write(data, settings_path):
+        raise OSError("read-only file system")
+
+    monkeypatch.setattr(settings_module, "write_settings_json", failing_write)
+
+    with pytest.raises(OSError):
+        store.flush()
+
+    monkeypatch.undo()
+    store.close()
+
+    assert 1 in load_settings(tmp_path / "settings.json").characters
+
+
+def test_subscribers_see_every_change(tmp_path):
+    store = SettingsStore(tmp_path / "settings.json", delay=60)
+    seen = []
+
+    unsubscribe = store.subscribe(lambda settings: seen.append(sorted(settings.characters)))
+
+    store.put_character(character(1))
+    store.put_character(character(2))
+    unsubscribe()
+    store.put_character(character(3))
+
+    assert seen == [[1], [1, 2]]
@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+import pytest
+
+from evex import token_scheduler
+from evex.models import EsiCharacter
+from evex.token_scheduler import REFRESH_AHEAD, REFRESH_JITTER, RETRY_BACKOFF_MAX, RETRY_BACKOFF_MIN, TokenRefreshScheduler
+
+TOKEN_LIFETIME = 1200
+
+
+class Stop(BaseException):
+    pass
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def character():
+    return EsiCharacter(id=90000001, name="Scheduled Pilot", access_token="", refresh_token="refresh", expires_at=0)
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    # Sleeps return straight away, every delay asked for is recorded in order
+    sleeps = []
+    refreshes = []
+    outcomes = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+        if len(sleeps) > 20:
+            raise Stop()
+
+    async def refresh_if_expiring(character, margin):
+        refreshes.append(len(sleeps))
+
+        if not outcomes:
+            raise Stop()
+        if not outcomes.pop(0):
+            raise Exception("SSO is down")
+
+        character.expires_at = int(time.time()) + TOKEN_LIFETIME
+        return character
+
+    monkeypatch.setattr(token_scheduler.asyncio, "sleep", sleep)
+    monkeypatch.setattr(token_scheduler, "refresh_if_expiring", refresh_if_expiring)
+
+    return TokenRefreshScheduler(), sleeps, refreshes, outcomes
+
+
+def test_expired_token_refreshes_immediately(scheduler, character):
+    scheduler, sleeps, refreshes, outcomes = scheduler
+    outcomes.append(True)
+    character.expires_at = int(time.time()) - 60
+
+    with pytest.raises(Stop):
+        run(scheduler._run(character))
+
+    # Refreshed before anything slept, then waits for the new token to come due
+    assert refreshes[0] == 0
+    assert TOKEN_LIFETIME - REFRESH_AHEAD - REFRESH_JITTER - 1 <= sleeps[0] <= TOKEN_LIFETIME - REFRESH_AHEAD
+
+
+def test_refresh_is_scheduled_ahead_of_expiry(scheduler, character):
+    scheduler, sleeps, refreshes, outcomes = scheduler
+    character.expires_at = int(time.time()) + TOKEN_LIFETIME
+
+    with pytest.raises(Stop):
+        run(scheduler._run(character))
+
+    assert len(sleeps) == 1
+    assert TOKEN_LIFETIME - REFRESH_AHEAD - REFRESH_JITTER - 1 <= sleeps[0] <= TOKEN_LIFETIME - REFRESH_AHEAD
+
+
+def test_refresh_jitter_spreads_characters(scheduler):
+    scheduler, sleeps, refreshes, outcomes = scheduler
+    expires_at = int(time.time()) + TOKEN_LIFETIME
+
+    for id in range(20):
+        with pytest.raises(Stop):
+            run(scheduler._run(EsiCharacter(id=id, name=f"Alt {id}", access_token="", refresh_token="refresh", expires_at=expires_at)))
+
+    assert max(sleeps) - min(sleeps) > 1
+
+
+def test_failures_back_off_and_reset_after_success(scheduler, character):
+    scheduler, sleeps, refreshes, outcomes = scheduler
+    outcomes.extend([False] * 8 + [True, False])
+    character.expires_at = int(time.time()) - 60
+
+    with pytest.raises(Stop):
+        run(scheduler._run(character))
+
+    backoffs = [RETRY_BACKOFF_MIN * 2 ** attempt for attempt in range(8)]
+    backoffs = [min(backoff, RETRY_BACKOFF_MAX) for backoff in backoffs]
+    assert backoffs[-1] == RETRY_BACKOFF_MAX
+
+    for delay, backoff in zip(sleeps, backoffs):
+        assert backoff <= delay <= backoff * 1.5
+
+    # The success waits for the next refresh, the failure after it starts over from the minimum
+    assert sleeps[8] > RETRY_BACKOFF_MAX * 1.5
+    assert RETRY_BACKOFF_MIN <= sleeps[9] <= RETRY_BACKOFF_MIN * 1.5
+
+
+def test_schedule_replaces_and_stop_cancels(monkeypatch, character):
+    async def refresh_if_expiring(character, margin):
+        return character
+
+    monkeypatch.setattr(token_scheduler, "refresh_if_expiring", refresh_if_expiring)
+    character.expires_at = int(time.time()) + TOKEN_LIFETIME
+
+    async def scenario():
+        scheduler = TokenRefreshScheduler()
+
+        scheduler.schedule(character)
+        first = scheduler._tasks[character.id]
+        scheduler.schedule(character)
+        second = scheduler._tasks[character.id]
+
+        scheduler.stop()
+        await asyncio.sleep(0)
+
+        return first, second, scheduler._tasks
+
+    first, second, tasks = run(scenario())
+
+    assert first is not second
+    assert first.cancelled() and second.cancelled()
+    assert tasks == {}
@@ -0,0 +1,123 @@
+import json
+import os
+
+import pytest
+
+from evex import tracing
+from evex.tracing import Tracer, percentile
+
+
+def record(tracer: Tracer, name: str, ms: float, **attributes):
+    tracer.record(name, 0, ms / 1000, **attributes)
+
+
+def read_names(path) -> list[str]:
+    with open(path, "r") as trace_file:
+        return [json.loads(line)["name"] for line in trace_file]
+
+
+def test_flush_writes_each_span_once(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer = Tracer(capacity=4)
+
+    for i in range(3):
+        record(tracer, f"first {i}", 1)
+    tracer.flush(path)
+
+    assert read_names(path) == ["first 0", "first 1", "first 2"]
+
+    # Nothing new, nothing written
+    tracer.flush(path)
+    assert len(read_names(path)) == 3
+
+    # The ring buffer wraps, only the spans still in it and not yet written go out
+    for i in range(6):
+        record(tracer, f"second {i}", 1)
+    tracer.flush(path)
+
+    assert read_names(path) == ["first 0", "first 1", "first 2", "second 2", "second 3", "second 4", "second 5"]
+
+    record(tracer, "third", 1)
+    tracer.flush(path)
+
+    assert read_names(path)[-2:] == ["second 5", "third"]
+
+
+def test_flush_rotates_the_trace_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_FILE_MAX_BYTES", 100)
+
+    path = tmp_path / "trace.jsonl"
+    tracer = Tracer()
+
+    batches = []
+    for batch in range(4):
+        names = [f"batch {batch} span {i}" for i in range(3)]
+        for name in names:
+            record(tracer, name, 1)
+
+        tracer.flush(path)
+        batches.append(names)
+
+    # Each batch is bigger than the limit, so every flush starts a new file and keeps one old one
+    assert read_names(path) == batches[3]
+    assert read_names(f"{path}.1") == batches[2]
+    assert sorted(os.listdir(tmp_path)) == ["trace.jsonl", "trace.jsonl.1"]
+
+
+def test_flush_survives_unwritable_paths(tmp_path):
+    tracer = Tracer()
+    record(tracer, "lost", 1)
+
+    tracer.flush(tmp_path / "missing" / "trace.jsonl")
+
+
+def test_span_json(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer = Tracer()
+
+    record(tracer, "esi request", 12.3456, path="/status/")
+    tracer.flush(path)
+
+    with open(path, "r") as trace_file:
+        line = json.loads(trace_file.read())
+
+    assert line["name"] == "esi request" and line["ms"] == 12.346 and line["path"] == "/status/"
+
+
+@pytest.mark.parametrize("values, p50, p95", [
+    ([1], 1, 1),
+    ([2, 1], 1, 2),
+    (list(range(1, 101)), 50, 95),
+    (list(range(1, 21)), 10, 19),
+])
+def test_percentile(values, p50, p95):
+    assert percentile(values, 0.5) == p50
+    assert percentile(values, 0.95) == p95
+
+
+def test_report():
+    tracer = Tracer()
+
+    for ms in range(100, 0, -1):
+        record(tracer, "hotkey to window shown", ms)
+    record(tracer, "command parse", 0.25)
+
+    assert tracer.summary()["hotkey to window shown"] == (100, pytest.approx(0.050), pytest.approx(0.095))
+    assert tracer.report().splitlines() == [
+        "stage                          count       p50       p95",
+        "command parse                      1     0.2ms     0.2ms",
+        "hotkey to window shown           100    50.0ms    95.0ms",
+    ]
+
+
+def test_mark_and_since():
+    tracer = Tracer()
+
+    tracer.since("hotkey", "never marked")
+    assert len(tracer.spans) == 0
+
+    tracer.mark("hotkey")
+    tracer.since("hotkey", "hotkey to window shown")
+    tracer.since("hotkey", "hotkey to window shown")
+
+    assert [span.name for span in tracer.spans] == ["hotkey to window shown"]